@@ -1,6 +1,11 @@
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from hashlib import sha256
+from pathlib import Path
+from typing import AsyncGenerator
 
-from fastapi import FastAPI, Response
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.param_functions import Depends
@@ -8,21 +13,74 @@ from fastapi.responses import JSONResponse
 from mangum import Mangum
 
 import core.service as core_service
+from backend.aws.dynamodb_service import get_dynamodb_pool
 from backend.aws.key_value_db_repository import KeyValueDbRepository
+from backend.cache.key_value_db_repository import (
+    KeyValueDbRepository as CachedKeyValueDbRepository,
+)
 from backend.meteofrance.data_file_repository import DataFileRepository
-from core.entities import RainCompleteInfo
-from core.exceptions import AlreadyAddedData, AlreadyInitialized
+from backend.meteofrance.meteo_france_api_service import get_client_session_pool
+from backend.sqlite.key_value_db_repository import (
+    KeyValueDbRepository as SqliteKeyValueDbRepository,
+)
+from core.entities import RainCompleteInfo, RainStore
+from core.exceptions import (
+    AlreadyAddedData,
+    AlreadyInitialized,
+    InvalidDataFile,
+    InvalidTimespan,
+    MissingDailyData,
+    NotInitialized,
+)
 from core.protocol import DataFileProtocol, KeyValueDbProtocol
 from settings import get_api_settings
 
 settings = get_api_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    """Open HTTP and DynamoDb connection pools on startup, and close them on shutdown."""
+    pools = [get_client_session_pool()]
+    # SQLite connection needs no pooling
+    if not settings.sqlite_db_path:
+        pools.append(get_dynamodb_pool())
+    for pool in pools:
+        await pool.open()
+    try:
+        yield
+    finally:
+        for pool in pools:
+            await pool.close()
+
+
 app = FastAPI(
     title=settings.api_title,
     description=settings.api_description,
     version=settings.api_version,
+    lifespan=lifespan,
 )
 
+
+def configure_key_value_db(app: FastAPI) -> None:
+    """Use SQLite key value db instead of DynamoDb one if a SQLite db path is set."""
+    if settings.sqlite_db_path:
+        app.dependency_overrides[KeyValueDbRepository] = SqliteKeyValueDbRepository
+
+
+configure_key_value_db(app)
+
+
+def configure_compute_executor() -> None:
+    """Run blocking computations in a dedicated thread pool if its size is set."""
+    if settings.compute_thread_workers > 0:
+        core_service.compute_executor = ThreadPoolExecutor(
+            max_workers=settings.compute_thread_workers, thread_name_prefix="compute"
+        )
+
+
+configure_compute_executor()
+
 app_with_middleware = CORSMiddleware(
     app=app,
     allow_origins=settings.cors_origins,
@@ -31,7 +89,9 @@ app_with_middleware = CORSMiddleware(
     allow_headers=["*"],
     expose_headers=["*"],
 )
-handler = Mangum(app_with_middleware)
+# Lambda containers run lifespan around each invocation : it is disabled so that warm
+# containers keep their DynamoDb pool, lazily opened on first request.
+handler = Mangum(app_with_middleware, lifespan="off")
 
 
 class AlreadyInitializedHTTPException(HTTPException):
@@ -52,12 +112,64 @@ class AlreadyAddedDataHTTPException(HTTPException):
         super().__init__(status_code, detail, headers)
 
 
+class NotInitializedHTTPException(HTTPException):
+    """Exception raised when the data is not initialized yet."""
+
+    def __init__(
+        self, status_code=404, detail="Backend data not initialized", headers=None
+    ):
+        super().__init__(status_code, detail, headers)
+
+
+class InvalidTimespanHTTPException(HTTPException):
+    """Exception raised when the requested timespan is not valid."""
+
+    def __init__(self, status_code=422, detail="Invalid timespan", headers=None):
+        super().__init__(status_code, detail, headers)
+
+
+class MissingDailyDataHTTPException(HTTPException):
+    """Exception raised when daily data is not published yet by data source."""
+
+    def __init__(
+        self, status_code=503, detail="Daily data not available yet", headers=None
+    ):
+        super().__init__(status_code, detail, headers)
+
+
+class InvalidDataFileHTTPException(HTTPException):
+    """Exception raised when a data source file does not match its schema."""
+
+    def __init__(self, status_code=502, detail="Invalid data file", headers=None):
+        super().__init__(status_code, detail, headers)
+
+
+def get_key_value_db_repo(
+    key_value_db_repo: KeyValueDbRepository = Depends(KeyValueDbRepository),
+) -> KeyValueDbProtocol:
+    if settings.key_value_cache_size > 0:
+        return CachedKeyValueDbRepository(key_value_db_repo)
+    return key_value_db_repo
+
+
 async def get_last_data_day(
     data_file_repo: DataFileProtocol = Depends(DataFileRepository),
 ) -> date:
     return await core_service.get_last_data_date(data_file_repo)
 
 
+def get_etag(last_data_day: date) -> str:
+    """
+    Get strong ETag of front data, changing with last data day and data version.
+
+    Data version covers API version and mean period, which define stored means.
+    """
+    data_version = sha256(
+        f"{settings.api_version} {settings.year_beg_incl} {settings.year_end_incl}".encode()
+    ).hexdigest()[:16]
+    return f'"{last_data_day.strftime("%Y%m%d")}-{data_version}"'
+
+
 @app.get(
     "/",
     response_class=JSONResponse,
@@ -66,13 +178,63 @@ async def get_last_data_day(
     status_code=200,  # OK
     responses={
         200: {"description": "Data successfully read"},
+        304: {"description": "Data not modified since given ETag"},
+        404: {"description": "Backend not initialized."},
     },
 )
 async def get(
-    key_value_db_repo: KeyValueDbProtocol = Depends(KeyValueDbRepository),
+    request: Request,
+    response: Response,
+    key_value_db_repo: KeyValueDbProtocol = Depends(get_key_value_db_repo),
+    data_file_repo: DataFileProtocol = Depends(DataFileRepository),
     last_data_day: date = Depends(get_last_data_day),
-) -> RainCompleteInfo:
-    return await core_service.get_data(key_value_db_repo, last_data_day)
+) -> RainCompleteInfo | Response:
+    next_data_datetime = await core_service.get_next_data_datetime(
+        data_file_repo, last_data_day
+    )
+    max_age = (next_data_datetime - datetime.now(timezone.utc)).total_seconds()
+    etag = get_etag(last_data_day)
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max(int(max_age), 0)}",
+    }
+    # If-None-Match uses weak comparison : W/ prefix of client tags is ignored
+    if_none_match = request.headers.get("If-None-Match", "")
+    client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if {etag, "*"} & client_tags:
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+    try:
+        return await core_service.get_cached_data(key_value_db_repo, last_data_day)
+    except NotInitialized as exc:
+        raise NotInitializedHTTPException(detail=exc.message)
+
+
+@app.get(
+    "/mean",
+    response_class=JSONResponse,
+    response_model=None,
+    description="Get mean cumulated rain on any calendar period.",
+    status_code=200,  # OK
+    responses={
+        200: {"description": "Mean successfully computed"},
+        404: {"description": "Backend not initialized."},
+        422: {"description": "Invalid timespan."},
+    },
+)
+async def get_mean(
+    timespan_id: str = Query(
+        pattern=r"^M[0-1]\d[0-3]\d-M[0-1]\d[0-3]\d$",
+        description="Mean period, as M%m%d-M%m%d",
+    ),
+    key_value_db_repo: KeyValueDbProtocol = Depends(get_key_value_db_repo),
+) -> RainStore:
+    try:
+        return await core_service.get_mean_data(key_value_db_repo, timespan_id)
+    except NotInitialized as exc:
+        raise NotInitializedHTTPException(detail=exc.message)
+    except InvalidTimespan as exc:
+        raise InvalidTimespanHTTPException(detail=exc.message)
 
 
 @app.get(
@@ -84,19 +246,68 @@ async def get(
     responses={
         201: {"description": "Data added in backend"},
         409: {"description": "Data already added in backend"},
+        502: {"description": "Invalid daily data file"},
+        503: {"description": "Daily data not published yet"},
     },
 )
 async def add(
-    key_value_db_repo: KeyValueDbProtocol = Depends(KeyValueDbRepository),
+    key_value_db_repo: KeyValueDbProtocol = Depends(get_key_value_db_repo),
     data_file_repo: DataFileProtocol = Depends(DataFileRepository),
     last_data_day: date = Depends(get_last_data_day),
 ):
     try:
         await core_service.fetch_daily_data_if_not_in_cache(
-            key_value_db_repo, data_file_repo, last_data_day
+            key_value_db_repo,
+            data_file_repo,
+            last_data_day,
+            strict_validation=settings.strict_validation,
+        )
+    except AlreadyAddedData as exc:
+        raise AlreadyAddedDataHTTPException(detail=exc.message)
+    except MissingDailyData as exc:
+        raise MissingDailyDataHTTPException(detail=exc.message)
+    except InvalidDataFile as exc:
+        raise InvalidDataFileHTTPException(detail=exc.message)
+    return Response(status_code=201)
+
+
+@app.get(
+    "/backfill",
+    response_class=JSONResponse,
+    response_model=None,
+    description="Add daily data of all days missing in backend since a given date.",
+    status_code=201,  # Created
+    responses={
+        201: {"description": "Data added in backend"},
+        409: {"description": "Data already added in backend"},
+        422: {"description": "Invalid begin date."},
+        502: {"description": "Invalid daily data file"},
+        503: {"description": "Daily data not published yet"},
+    },
+)
+async def backfill(
+    begin_date: date = Query(description="First day to backfill"),
+    key_value_db_repo: KeyValueDbProtocol = Depends(get_key_value_db_repo),
+    data_file_repo: DataFileProtocol = Depends(DataFileRepository),
+    last_data_day: date = Depends(get_last_data_day),
+):
+    try:
+        await core_service.backfill_daily_data(
+            key_value_db_repo,
+            data_file_repo,
+            begin_date,
+            last_data_day,
+            strict_validation=settings.strict_validation,
+            max_days=settings.backfill_max_days,
         )
     except AlreadyAddedData as exc:
         raise AlreadyAddedDataHTTPException(detail=exc.message)
+    except MissingDailyData as exc:
+        raise MissingDailyDataHTTPException(detail=exc.message)
+    except InvalidDataFile as exc:
+        raise InvalidDataFileHTTPException(detail=exc.message)
+    except InvalidTimespan as exc:
+        raise InvalidTimespanHTTPException(detail=exc.message)
     return Response(status_code=201)
 
 
@@ -109,10 +320,11 @@ async def add(
     responses={
         201: {"description": "Backend initialized."},
         409: {"description": "Backend already initialized."},
+        502: {"description": "Invalid history data file."},
     },
 )
 async def initialize(
-    key_value_db_repo: KeyValueDbProtocol = Depends(KeyValueDbRepository),
+    key_value_db_repo: KeyValueDbProtocol = Depends(get_key_value_db_repo),
     data_file_repo: DataFileProtocol = Depends(DataFileRepository),
 ):
     try:
@@ -121,7 +333,18 @@ async def initialize(
             data_file_repo,
             settings.year_beg_incl,
             settings.year_end_incl,
+            station_ids=settings.station_ids,
+            departments=settings.departments,
+            max_concurrency=settings.ingestion_concurrency,
+            process_workers=settings.ingestion_process_workers,
+            cache_dir=(
+                Path(settings.history_cache_dir) if settings.history_cache_dir else None
+            ),
+            scalar_means=settings.store_scalar_means,
+            strict_validation=settings.strict_validation,
         )
     except AlreadyInitialized as exc:
         raise AlreadyInitializedHTTPException(detail=exc.message)
+    except InvalidDataFile as exc:
+        raise InvalidDataFileHTTPException(detail=exc.message)
     return Response(status_code=201)
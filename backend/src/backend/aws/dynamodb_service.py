@@ -1,71 +1,288 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import AsyncExitStack
 from functools import cache
 
 from aioboto3 import Session
+from aiobotocore.config import AioConfig
 from mypy_boto3_dynamodb import DynamoDBClient, DynamoDBServiceResource
 from mypy_boto3_dynamodb.type_defs import (
     BatchGetItemInputTypeDef,
     BatchGetItemOutputTypeDef,
+    BatchWriteItemInputTypeDef,
+    BatchWriteItemOutputTypeDef,
     GetItemOutputTypeDef,
 )
 
 from settings import get_api_settings
 
+logger = logging.getLogger(__name__)
+
 settings = get_api_settings()
 
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+TRANSACT_MAX_CLAIMS = 50  # DDB transactions hold 100 actions, 2 per claim
+
+
+class UnprocessedItems(Exception):
+    def __init__(self) -> None:
+        self.message = "DynamoDb batch items left unprocessed after all attempts."
+        super().__init__(self.message)
+
 
 @cache
 def get_aws_session() -> Session:
     return Session()
 
 
-async def get_items(ddb_client: DynamoDBClient, keys: list[str]) -> list[float]:
+class DynamoDbPool:
     """
-    Get rain items from DDB.
+    Long-lived dynamodb client and resource, sharing connections across requests.
+
+    Low-level client serves raw attribute values calls, resource serves table calls.
+    Both are opened on first use and kept open until closed, so that warm Lambdas and
+    long-running servers reuse open connections.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self.client: DynamoDBClient | None = None
+        self.resource: DynamoDBServiceResource | None = None
+        self._exit_stack: AsyncExitStack | None = None
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        """
+        Open pooled dynamodb client and resource, if not opened yet.
+
+        Args:
+        - None
+        Returns:
+        - None
+        """
+        async with self._lock:
+            if self._exit_stack is None:
+                config = AioConfig(
+                    max_pool_connections=settings.aws_max_pool_connections,
+                    tcp_keepalive=True,
+                    connector_args={
+                        "keepalive_timeout": settings.aws_keepalive_timeout
+                    },
+                )
+                endpoint_url = (
+                    {"endpoint_url": settings.aws_endpoint}
+                    if settings.aws_endpoint
+                    else {}
+                )
+                exit_stack = AsyncExitStack()
+                self.client = await exit_stack.enter_async_context(
+                    self.session.client("dynamodb", config=config, **endpoint_url)
+                )
+                self.resource = await exit_stack.enter_async_context(
+                    self.session.resource("dynamodb", config=config, **endpoint_url)
+                )
+                self._exit_stack = exit_stack
+
+    async def close(self) -> None:
+        """
+        Close pooled dynamodb client, resource and their connections, if opened.
+
+        Args:
+        - None
+        Returns:
+        - None
+        """
+        async with self._lock:
+            if self._exit_stack is not None:
+                await self._exit_stack.aclose()
+            self.client = None
+            self.resource = None
+            self._exit_stack = None
+
+
+@cache
+def get_dynamodb_pool() -> DynamoDbPool:
+    return DynamoDbPool(get_aws_session())
+
+
+async def get_dynamodb_client() -> DynamoDBClient:
+    ddb_pool = get_dynamodb_pool()
+    await ddb_pool.open()
+    return ddb_pool.client
 
-    Note that batch_get_item need item handling after 100 items gotten but this is not
-    an expected use case.
+
+async def get_dynamodb_resource() -> DynamoDBServiceResource:
+    ddb_pool = get_dynamodb_pool()
+    await ddb_pool.open()
+    return ddb_pool.resource
+
+
+async def _backoff(attempt: int) -> None:
+    """Wait before retry attempt, with full jitter exponential backoff."""
+    await asyncio.sleep(
+        random.uniform(0, settings.aws_batch_retry_base_delay * 2 ** (attempt - 1))
+    )
+
+
+async def _get_items_chunk(
+    ddb_client: DynamoDBClient, keys: list[str]
+) -> dict[str, float]:
+    """
+    Get rain items of at most BATCH_GET_MAX_KEYS keys from DDB.
+
+    Unprocessed keys, returned by DDB when throttled or over response size limit, are
+    requested again with jittered exponential backoff.
 
     Args:
     - ddb_client, DynamoDBClient: aioboto3 dynamodb client
     - keys, list[str] : list of keys to request table
     Returns:
-    - list[float] : list of rain amounts for given timestamps
+    - dict[str, float] : rain amounts of given timestamps, keys missing in table are
+      absent
+    Raises:
+    - UnprocessedItems: if some keys are still unprocessed after all attempts
     """
     request_items: BatchGetItemInputTypeDef = {
         settings.backend_table_name: {
             "Keys": [{settings.backend_table_key_name: {"S": k}} for k in keys]
         }
     }
-    raw_result: BatchGetItemOutputTypeDef = await ddb_client.batch_get_item(
-        RequestItems=request_items
+    items = {}
+    for attempt in range(settings.aws_batch_max_attempts):
+        if attempt > 0:
+            await _backoff(attempt)
+        raw_result: BatchGetItemOutputTypeDef = await ddb_client.batch_get_item(
+            RequestItems=request_items
+        )
+        items |= {
+            rain_res[settings.backend_table_key_name]["S"]: float(
+                rain_res[settings.backend_table_value_name]["N"]
+            )
+            for rain_res in raw_result["Responses"][settings.backend_table_name]
+        }
+        request_items = raw_result.get("UnprocessedKeys", {})
+        if not request_items:
+            return items
+    raise UnprocessedItems
+
+
+async def get_items(ddb_client: DynamoDBClient, keys: list[str]) -> dict[str, float]:
+    """
+    Get rain items from DDB.
+
+    Keys are requested in concurrent batch_get_item calls of BATCH_GET_MAX_KEYS keys
+    each, and values are mapped back by key as DDB does not keep request order.
+
+    Args:
+    - ddb_client, DynamoDBClient: aioboto3 dynamodb client
+    - keys, list[str] : list of keys to request table
+    Returns:
+    - dict[str, float] : rain amounts of given timestamps, keys missing in table are
+      absent
+    Raises:
+    - UnprocessedItems: if some keys are still unprocessed after all attempts
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    chunks = await asyncio.gather(
+        *(
+            _get_items_chunk(ddb_client, unique_keys[i : i + BATCH_GET_MAX_KEYS])
+            for i in range(0, len(unique_keys), BATCH_GET_MAX_KEYS)
+        )
     )
-    return [
-        float(rain_res[settings.backend_table_value_name]["N"])
-        for rain_res in raw_result["Responses"][settings.backend_table_name]
-    ]
+    return {k: v for chunk in chunks for k, v in chunk.items()}
 
 
-async def write_items(
-    ddb_resource: DynamoDBServiceResource, items: dict[str, float]
-) -> None:
+async def _write_items_chunk(
+    ddb_client: DynamoDBClient,
+    items: list[tuple[str, float]],
+    semaphore: asyncio.Semaphore,
+) -> float:
+    """
+    Write at most BATCH_WRITE_MAX_ITEMS items in DDB table.
+
+    Unprocessed items, returned by DDB when throttled, are written again with
+    jittered exponential backoff.
+
+    Args:
+    - ddb_client, DynamoDBClient: aioboto3 dynamodb client
+    - items, list[tuple[str, float]] : key-value data to store
+    - semaphore, asyncio.Semaphore: bounds concurrent batch_write_item calls
+    Returns:
+    - float: consumed write capacity units
+    Raises:
+    - UnprocessedItems: if some items are still unprocessed after all attempts
+    """
+    request_items: BatchWriteItemInputTypeDef = {
+        settings.backend_table_name: [
+            {
+                "PutRequest": {
+                    "Item": {
+                        settings.backend_table_key_name: {"S": k},
+                        settings.backend_table_value_name: {"N": str(v)},
+                    }
+                }
+            }
+            for k, v in items
+        ]
+    }
+    consumed_capacity = 0.0
+    for attempt in range(settings.aws_batch_max_attempts):
+        if attempt > 0:
+            await _backoff(attempt)
+        async with semaphore:
+            raw_result: BatchWriteItemOutputTypeDef = await ddb_client.batch_write_item(
+                RequestItems=request_items, ReturnConsumedCapacity="TOTAL"
+            )
+        consumed_capacity += sum(
+            capacity.get("CapacityUnits", 0)
+            for capacity in raw_result.get("ConsumedCapacity", [])
+        )
+        request_items = raw_result.get("UnprocessedItems", {})
+        if not request_items:
+            return consumed_capacity
+    raise UnprocessedItems
+
+
+async def write_items(ddb_client: DynamoDBClient, items: dict[str, float]) -> None:
     """
     Write given items in DDB table.
 
+    Items are written in batch_write_item calls of BATCH_WRITE_MAX_ITEMS items each,
+    at most AWS_BATCH_WRITE_CONCURRENCY of them in flight. Write throughput and
+    consumed capacity are logged.
+
     Args:
-    - ddb_resource, DynamoDBServiceResource: aioboto3 dynamodb resource
+    - ddb_client, DynamoDBClient: aioboto3 dynamodb client
     - items, dict[str, float] : key-value data to store
     Returns:
     - None
+    Raises:
+    - UnprocessedItems: if some items are still unprocessed after all attempts
     """
-    ddb_table = await ddb_resource.Table(settings.backend_table_name)
-    async with ddb_table.batch_writer() as writer:
-        for k, v in items.items():
-            await writer.put_item(
-                Item={
-                    settings.backend_table_key_name: k,
-                    settings.backend_table_value_name: v,
-                }
+    item_list = list(items.items())
+    semaphore = asyncio.Semaphore(settings.aws_batch_write_concurrency)
+    start = time.perf_counter()
+    consumed_capacities = await asyncio.gather(
+        *(
+            _write_items_chunk(
+                ddb_client,
+                item_list[i : i + BATCH_WRITE_MAX_ITEMS],
+                semaphore,
             )
+            for i in range(0, len(item_list), BATCH_WRITE_MAX_ITEMS)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "%d items written in %.2fs (%.0f items/s), %.1f write capacity units consumed",
+        len(item_list),
+        elapsed,
+        len(item_list) / elapsed if elapsed > 0 else 0,
+        sum(consumed_capacities),
+    )
 
 
 async def has_item(ddb_client: DynamoDBClient, key: str) -> bool:
@@ -83,3 +300,129 @@ async def has_item(ddb_client: DynamoDBClient, key: str) -> bool:
         Key={settings.backend_table_key_name: {"S": key}},
     )
     return "Item" in response
+
+
+async def claim_items(ddb_client: DynamoDBClient, claims: dict[str, str]) -> bool:
+    """
+    Write claim items in a single transaction, provided claimed items do not exist.
+
+    Transaction checks that each claimed key is absent, and puts its claim key if that
+    one is absent or its lease expired. DDB transactions are limited to 100 actions,
+    i.e. 50 claims.
+    Claim items are leased for claim_lease_time, so that claims left by a crashed run
+    can be taken over, and are removed by DDB TTL on their expiry attribute.
+
+    Args:
+    - ddb_client, DynamoDBClient: aioboto3 dynamodb client
+    - claims, dict[str, str]: claim key of each claimed key
+    Returns:
+    - bool: were all items claimed, False if any one already exists or is claimed
+    Raises:
+    - ValueError: if there are more than TRANSACT_MAX_CLAIMS claims
+    """
+    if len(claims) > TRANSACT_MAX_CLAIMS:
+        raise ValueError(
+            f"Cannot claim {len(claims)} keys in one transaction, "
+            f"at most {TRANSACT_MAX_CLAIMS}"
+        )
+    now = time.time()
+    key_names = {"#key": settings.backend_table_key_name}
+    lease_names = {**key_names, "#expires_at": settings.backend_table_expires_at_name}
+    try:
+        await ddb_client.transact_write_items(
+            TransactItems=[
+                action
+                for key, claim_key in claims.items()
+                for action in (
+                    {
+                        "ConditionCheck": {
+                            "TableName": settings.backend_table_name,
+                            "Key": {settings.backend_table_key_name: {"S": key}},
+                            "ConditionExpression": "attribute_not_exists(#key)",
+                            "ExpressionAttributeNames": key_names,
+                        }
+                    },
+                    {
+                        "Put": {
+                            "TableName": settings.backend_table_name,
+                            "Item": {
+                                settings.backend_table_key_name: {"S": claim_key},
+                                settings.backend_table_expires_at_name: {
+                                    "N": str(int(now + settings.claim_lease_time))
+                                },
+                            },
+                            "ConditionExpression": (
+                                "attribute_not_exists(#key) OR #expires_at < :now"
+                            ),
+                            "ExpressionAttributeNames": lease_names,
+                            "ExpressionAttributeValues": {":now": {"N": str(int(now))}},
+                        }
+                    },
+                )
+            ]
+        )
+    except ddb_client.exceptions.TransactionCanceledException:
+        return False
+    return True
+
+
+async def delete_items(ddb_client: DynamoDBClient, keys: list[str]) -> None:
+    """
+    Delete given keys from backend table.
+
+    Args:
+    - ddb_client, DynamoDBClient: aioboto3 dynamodb client
+    - keys, list[str]: keys to delete
+    Returns:
+    - None
+    """
+    await asyncio.gather(
+        *(
+            ddb_client.delete_item(
+                TableName=settings.backend_table_name,
+                Key={settings.backend_table_key_name: {"S": key}},
+            )
+            for key in keys
+        )
+    )
+
+
+async def get_document(ddb_client: DynamoDBClient, key: str) -> bytes | None:
+    """
+    Get binary document stored under given key in backend table.
+
+    Args:
+    - ddb_client, DynamoDBClient: aioboto3 dynamodb client
+    - key, str: key of the document
+    Returns:
+    - bytes | None: stored document, None if key is not in backend table
+    """
+    response: GetItemOutputTypeDef = await ddb_client.get_item(
+        TableName=settings.backend_table_name,
+        Key={settings.backend_table_key_name: {"S": key}},
+    )
+    if "Item" not in response:
+        return None
+    return response["Item"][settings.backend_table_document_name]["B"]
+
+
+async def write_document(
+    ddb_resource: DynamoDBServiceResource, key: str, document: bytes
+) -> None:
+    """
+    Write given binary document in backend table, replacing any previous one.
+
+    Args:
+    - ddb_resource, DynamoDBServiceResource: aioboto3 dynamodb resource
+    - key, str: key to store document under
+    - document, bytes: document to store
+    Returns:
+    - None
+    """
+    ddb_table = await ddb_resource.Table(settings.backend_table_name)
+    await ddb_table.put_item(
+        Item={
+            settings.backend_table_key_name: key,
+            settings.backend_table_document_name: document,
+        }
+    )
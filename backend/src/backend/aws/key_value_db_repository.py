@@ -1,46 +1,50 @@
 from typing import Self
 
-from aioboto3 import Session
 from fastapi.param_functions import Depends
+from mypy_boto3_dynamodb import DynamoDBClient, DynamoDBServiceResource
 
 from backend.aws.dynamodb_service import (
-    get_aws_session,
+    claim_items,
+    delete_items,
+    get_document,
+    get_dynamodb_client,
+    get_dynamodb_resource,
     get_items,
     has_item,
+    write_document,
     write_items,
 )
-from core.entities import RainStore, TimespanId
-from settings import get_api_settings
+from backend.climatology_index import pack_index, unpack_index
+from core.entities import ClimatologyIndex, RainBatch, RainStore, TimespanId
 
-settings = get_api_settings()
+INDEX_KEY_PREFIX = "INDEX#"
+CLAIM_KEY_PREFIX = "CLAIM#"
 
 
 class KeyValueDbRepository:
-    session: Session
+    ddb_client: DynamoDBClient
+    ddb_resource: DynamoDBServiceResource
 
     def __init__(
         self,
-        session: Session = Depends(get_aws_session),
+        ddb_client: DynamoDBClient = Depends(get_dynamodb_client),
+        ddb_resource: DynamoDBServiceResource = Depends(get_dynamodb_resource),
     ) -> Self:
-        self.session = session
-        self.endpoint_url = (
-            {"endpoint_url": settings.aws_endpoint} if settings.aws_endpoint else {}
-        )
+        self.ddb_client = ddb_client
+        self.ddb_resource = ddb_resource
 
     async def get(self, keys: list[TimespanId]) -> dict[TimespanId, float]:
         """
         Get values corresponding to keys of KeyValueDb.
 
-        We assume values exist in Db.
+        Keys missing in Db are absent from result.
 
         Args:
         - keys, list[TimespanId]: keys to get values
         Returns:
         - dict[TimespanId, float]: dict with input keys & corresponding values
         """
-        async with self.session.client("dynamodb", **self.endpoint_url) as ddb_client:
-            values = await get_items(ddb_client=ddb_client, keys=keys)
-        return {ts_id: rain_mm for ts_id, rain_mm in zip(keys, values)}
+        return await get_items(ddb_client=self.ddb_client, keys=keys)
 
     async def has(self, key: TimespanId) -> bool:
         """
@@ -51,22 +55,80 @@ class KeyValueDbRepository:
         Returns:
         - bool: is the key in Db
         """
-        async with self.session.client("dynamodb", **self.endpoint_url) as ddb_client:
-            result = await has_item(ddb_client=ddb_client, key=key)
-        return result
+        return await has_item(ddb_client=self.ddb_client, key=key)
+
+    async def claim(self, keys: list[TimespanId]) -> bool:
+        """
+        Atomically claim keys not yet in KeyValueDb, in a single round trip.
+
+        Claim fails as a whole if any key is already in Db or already claimed.
+
+        Args:
+        - keys, list[TimespanId]: keys to claim
+        Returns:
+        - bool: were all keys claimed
+        """
+        return await claim_items(
+            ddb_client=self.ddb_client,
+            claims={key: f"{CLAIM_KEY_PREFIX}{key}" for key in keys},
+        )
+
+    async def release(self, keys: list[TimespanId]) -> None:
+        """
+        Release claimed keys, so that they can be claimed again.
+
+        Args:
+        - keys, list[TimespanId]: keys to release
+        Returns:
+        - None
+        """
+        await delete_items(
+            ddb_client=self.ddb_client,
+            keys=[f"{CLAIM_KEY_PREFIX}{key}" for key in keys],
+        )
 
-    async def post(self, rains: list[RainStore]) -> None:
+    async def post(self, rains: list[RainStore] | RainBatch) -> None:
         """
         Post new rain values to backend key value db.
 
         Args:
-        - rains, list[RainStore]: rain values to store in backend
+        - rains, list[RainStore] | RainBatch: rain values to store in backend
         Returns:
         - None
         """
-        async with self.session.resource(
-            "dynamodb", **self.endpoint_url
-        ) as ddb_resource:
-            rain_items = {rain.timespan_id: rain.rain_mm for rain in rains}
-            await write_items(ddb_resource=ddb_resource, items=rain_items)
+        rain_items = RainBatch.of(rains).to_dict()
+        await write_items(ddb_client=self.ddb_client, items=rain_items)
+        return None
+
+    async def get_index(self, station_id: int) -> ClimatologyIndex | None:
+        """
+        Get climatology index of a station from KeyValueDb.
+
+        Args:
+        - station_id, int: station to get index of
+        Returns:
+        - ClimatologyIndex | None: station index, None if not stored yet
+        """
+        document = await get_document(
+            ddb_client=self.ddb_client,
+            key=f"{INDEX_KEY_PREFIX}{station_id}",
+        )
+        if document is None:
+            return None
+        return unpack_index(station_id, document)
+
+    async def post_index(self, index: ClimatologyIndex) -> None:
+        """
+        Post climatology index of a station to KeyValueDb, as one packed binary item.
+
+        Args:
+        - index, ClimatologyIndex: index to store in backend
+        Returns:
+        - None
+        """
+        await write_document(
+            ddb_resource=self.ddb_resource,
+            key=f"{INDEX_KEY_PREFIX}{index.station_id}",
+            document=pack_index(index),
+        )
         return None
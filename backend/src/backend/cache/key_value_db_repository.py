@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+
+from cachetools import LRUCache, TTLCache
+
+from core.entities import ClimatologyIndex, RainBatch, RainStore, TimespanId
+from core.protocol import KeyValueDbProtocol
+from settings import get_api_settings
+
+settings = get_api_settings()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+# Shared by all requests of the process, as repositories are built per request
+climatology_cache: LRUCache = LRUCache(maxsize=settings.key_value_cache_size)
+daily_cache: TTLCache = TTLCache(
+    maxsize=settings.key_value_cache_size, ttl=settings.daily_cache_ttl
+)
+index_cache: LRUCache = LRUCache(maxsize=settings.key_value_cache_size)
+cache_stats = {"climatology": CacheStats(), "daily": CacheStats()}
+
+
+def _is_climatology_key(key: TimespanId) -> bool:
+    """Climatology keys, M%m%d-M%m%d possibly namespaced by station, never change."""
+    return key.split("#")[-1].startswith("M")
+
+
+def _tier(key: TimespanId) -> tuple[LRUCache | TTLCache, CacheStats]:
+    """Get cache and stats of tier key belongs to."""
+    if _is_climatology_key(key):
+        return climatology_cache, cache_stats["climatology"]
+    return daily_cache, cache_stats["daily"]
+
+
+def _cache_values(values: dict[TimespanId, float]) -> None:
+    """Store values in their tier cache."""
+    for key, value in values.items():
+        cache, _ = _tier(key)
+        cache[key] = value
+
+
+def clear_caches() -> None:
+    """Empty all caches and reset their stats."""
+    for cache in (climatology_cache, daily_cache, index_cache):
+        cache.clear()
+    for stats in cache_stats.values():
+        stats.hits = stats.misses = 0
+
+
+class KeyValueDbRepository:
+    """
+    Caching decorator of a KeyValueDb, keeping values in process memory.
+
+    Immutable climatology values and indexes are kept in bounded LRU caches, daily
+    values in a short TTL cache. Posted values are written through to both the
+    decorated KeyValueDb and the caches. Missing keys are never cached.
+    """
+
+    repo: KeyValueDbProtocol
+
+    def __init__(self, repo: KeyValueDbProtocol) -> None:
+        self.repo = repo
+
+    async def get(self, keys: list[TimespanId]) -> dict[TimespanId, float]:
+        """
+        Get values corresponding to keys of KeyValueDb, reading only uncached ones.
+
+        Keys missing in Db are absent from result.
+
+        Args:
+        - keys, list[TimespanId]: keys to get values
+        Returns:
+        - dict[TimespanId, float]: dict with input keys & corresponding values
+        """
+        values = {}
+        missing_keys = []
+        for key in keys:
+            cache, stats = _tier(key)
+            if key in cache:
+                stats.hits += 1
+                values[key] = cache[key]
+            else:
+                stats.misses += 1
+                missing_keys.append(key)
+        if missing_keys:
+            fetched_values = await self.repo.get(missing_keys)
+            _cache_values(fetched_values)
+            values |= fetched_values
+        return values
+
+    async def has(self, key: TimespanId) -> bool:
+        """
+        Checks if KeyValueDb has corresponding key, cached keys being known to exist.
+
+        Args:
+        - key, TimespanId: key to check existence in backend
+        Returns:
+        - bool: is the key in Db
+        """
+        cache, _ = _tier(key)
+        return key in cache or await self.repo.has(key)
+
+    async def claim(self, keys: list[TimespanId]) -> bool:
+        """
+        Atomically claim keys not yet in KeyValueDb, in a single round trip.
+
+        Args:
+        - keys, list[TimespanId]: keys to claim
+        Returns:
+        - bool: were all keys claimed
+        """
+        return await self.repo.claim(keys)
+
+    async def release(self, keys: list[TimespanId]) -> None:
+        """
+        Release claimed keys, so that they can be claimed again.
+
+        Args:
+        - keys, list[TimespanId]: keys to release
+        Returns:
+        - None
+        """
+        await self.repo.release(keys)
+
+    async def post(self, rains: list[RainStore] | RainBatch) -> None:
+        """
+        Post new rain values to backend key value db, and cache them.
+
+        Args:
+        - rains, list[RainStore] | RainBatch: rain values to store in backend
+        Returns:
+        - None
+        """
+        rain_batch = RainBatch.of(rains)
+        await self.repo.post(rain_batch)
+        _cache_values(rain_batch.to_dict())
+
+    async def get_index(self, station_id: int) -> ClimatologyIndex | None:
+        """
+        Get climatology index of a station, from cache if already read.
+
+        Args:
+        - station_id, int: station to get index of
+        Returns:
+        - ClimatologyIndex | None: station index, None if not stored yet
+        """
+        stats = cache_stats["climatology"]
+        if station_id in index_cache:
+            stats.hits += 1
+            return index_cache[station_id]
+        stats.misses += 1
+        index = await self.repo.get_index(station_id)
+        if index is not None:
+            index_cache[station_id] = index
+        return index
+
+    async def post_index(self, index: ClimatologyIndex) -> None:
+        """
+        Post climatology index of a station to KeyValueDb, and cache it.
+
+        Args:
+        - index, ClimatologyIndex: index to store in backend
+        Returns:
+        - None
+        """
+        await self.repo.post_index(index)
+        index_cache[index.station_id] = index
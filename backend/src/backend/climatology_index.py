@@ -0,0 +1,42 @@
+import struct
+
+from core.entities import ClimatologyIndex
+
+# Little endian number of years, then cumulated rain tenths of each calendar day
+INDEX_FORMAT = "<I{}i"
+
+
+def pack_index(index: ClimatologyIndex) -> bytes:
+    """
+    Pack climatology index in a compact binary document, of about 1.5kB.
+
+    Args:
+    - index, ClimatologyIndex: index to pack
+    Returns:
+    - bytes: packed index
+    """
+    return struct.pack(
+        INDEX_FORMAT.format(len(index.cumulated_rain_tenths)),
+        index.number_of_years,
+        *index.cumulated_rain_tenths,
+    )
+
+
+def unpack_index(station_id: int, document: bytes) -> ClimatologyIndex:
+    """
+    Unpack climatology index of a station from its binary document.
+
+    Args:
+    - station_id, int: station of the index
+    - document, bytes: packed index
+    Returns:
+    - ClimatologyIndex: unpacked index
+    """
+    number_of_years, *cumulated_rain_tenths = struct.unpack(
+        INDEX_FORMAT.format((len(document) - 4) // 4), document
+    )
+    return ClimatologyIndex(
+        station_id=station_id,
+        number_of_years=number_of_years,
+        cumulated_rain_tenths=cumulated_rain_tenths,
+    )
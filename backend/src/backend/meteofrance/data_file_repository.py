@@ -1,33 +1,56 @@
 from contextlib import asynccontextmanager
-from datetime import date
+from datetime import date, datetime
+from functools import partial
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 from aiohttp import ClientSession
-from anyio import TemporaryDirectory, open_file
+from anyio import TemporaryDirectory
+from fastapi import HTTPException
 
-from backend.meteofrance.data_gouv_service import get_bulk_file_content
+from backend.meteofrance.data_gouv_service import (
+    download_bulk_file,
+    get_bulk_file_version,
+)
 from backend.meteofrance.meteo_france_api_service import (
     fetch_daily_data_computation_results,
     get_client_session,
     get_last_mfapi_data_date,
-    get_mf_access_token,
+    get_next_mfapi_data_datetime,
     launch_daily_data_computation,
+    mf_token_manager,
 )
 
 
 class DataFileRepository:
     session: ClientSession | None = None
-    mf_api_token: str | None = None
 
     async def lazy_init(self) -> None:
         """
         Init must be lazy as aiohttp.ClientSession() must be initialized in an event loop.
         That's impossible in __init__ sync method called through Depends().
+        Session is the pooled one, shared across requests.
         """
         if self.session is None:
-            self.session = get_client_session()
-            self.mf_api_token = await get_mf_access_token(self.session)
+            self.session = await get_client_session()
+
+    async def _call_with_token[T](self, call: Callable[..., Awaitable[T]]) -> T:
+        """
+        Call Meteo France API with access token, retrying once with a new one on 401.
+
+        Args:
+        - call, Callable[..., Awaitable[T]]: API call taking token keyword argument
+        Returns:
+        - T: API call result
+        """
+        token = await mf_token_manager.get_token(self.session)
+        try:
+            return await call(token=token)
+        except HTTPException as exception:
+            if exception.status_code != 401:
+                raise
+        token = await mf_token_manager.refresh(self.session, rejected_token=token)
+        return await call(token=token)
 
     async def get_last_data_date(self) -> date:
         """
@@ -40,45 +63,71 @@ class DataFileRepository:
         """
         return await get_last_mfapi_data_date()
 
-    @asynccontextmanager
-    async def get_daily_file_path(self, begin_date: date) -> AsyncGenerator[Path]:
+    async def get_next_data_datetime(self, last_data_date: date) -> datetime:
         """
-        Get daily data file and yield its path.
+        Get time at which data following given last data date becomes available.
+
+        Args:
+        - last_data_date, date: last data date available
+        Returns:
+        - datetime: UTC time of next data date availability on DataFile backend
+        """
+        return get_next_mfapi_data_datetime(last_data_date)
+
+    async def get_daily_file_buffer(self, begin_date: date) -> bytes:
+        """
+        Get daily data file contents in memory, as received from the API.
 
         Args:
         - begin_date, date : date to begin daily data fetch
-        Yields:
-        - Path: temporary path of daily data fetched file
+        Returns:
+        - bytes: daily data file contents
         """
         await self.lazy_init()
-        id_command = await launch_daily_data_computation(
-            session=self.session, begin_date=begin_date, token=self.mf_api_token
+        id_command = await self._call_with_token(
+            partial(
+                launch_daily_data_computation,
+                session=self.session,
+                begin_date=begin_date,
+            )
         )
-        results = await fetch_daily_data_computation_results(
-            session=self.session, id_command=id_command, token=self.mf_api_token
+        return await self._call_with_token(
+            partial(
+                fetch_daily_data_computation_results,
+                session=self.session,
+                id_command=id_command,
+            )
         )
-        async with TemporaryDirectory() as tmp_dir_name:
-            daily_file_name = "daily_file.csv"
-            daily_file_path = Path(tmp_dir_name, daily_file_name)
-            async with await open_file(daily_file_path, "w") as daily_file:
-                await daily_file.write(results)
-            yield daily_file_path
 
     @asynccontextmanager
-    async def get_bulk_file_path(self) -> AsyncGenerator[Path]:
+    async def get_bulk_file_path(
+        self, department: str | None = None
+    ) -> AsyncGenerator[Path]:
         """
-        Get bulk data file and yield its path.
+        Get bulk data file and yield its path, gunzipped.
 
         Args:
-        - None
+        - department, str | None: department to get bulk file of, default one if None
         Yields:
         - Path: temporary path of bulk data fetched file
         """
         await self.lazy_init()
-        content = await get_bulk_file_content(session=self.session)
         async with TemporaryDirectory() as tmp_dir_name:
-            bulk_file_name = "bulk_file.csv.gz"
+            bulk_file_name = "bulk_file.csv"
             bulk_file_path = Path(tmp_dir_name, bulk_file_name)
-            async with await open_file(bulk_file_path, "wb") as bulk_file:
-                await bulk_file.write(content)
+            await download_bulk_file(
+                session=self.session, file_path=bulk_file_path, department=department
+            )
             yield bulk_file_path
+
+    async def get_bulk_file_version(self, department: str | None = None) -> str | None:
+        """
+        Get bulk data file version identifier.
+
+        Args:
+        - department, str | None: department to get bulk file of, default one if None
+        Returns:
+        - str | None: version identifier, None if source exposes none
+        """
+        await self.lazy_init()
+        return await get_bulk_file_version(session=self.session, department=department)
@@ -1,31 +1,116 @@
+import logging
+import time
+import zlib
+from pathlib import Path
+
 from aiohttp import ClientSession
+from anyio import open_file, to_thread
 from fastapi import HTTPException
 
 from settings import get_api_settings
 
 settings = get_api_settings()
 
+logger = logging.getLogger(__name__)
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS  # zlib window bits of gzip format
+
 
-async def get_bulk_file_content(session: ClientSession) -> bytes:
+def get_bulk_file_url(department: str | None = None) -> str:
     """
-    Get bulk file content and return it.
+    Get bulk file URL of a department.
+
+    Args:
+    - department, str | None: department number (e.g. "75", "2A"), default bulk file
+      if None
+    Returns:
+    - str: bulk file URL
+    """
+    if department is None:
+        return settings.dgf_historical_data_url
+    return settings.dgf_historical_data_url_template.format(department=department)
 
-    As an improvement, it could be worth to stream the contents and write them
-    as chunked data rather than load the whole thing in memory.
-    https://docs.aiohttp.org/en/stable/client_quickstart.html#streaming-response-content
 
-    That said, file is around 4MB zipped, and has to be handled only once.
-    Things should be ok in a 128MB lambda.
+async def get_bulk_file_version(
+    session: ClientSession, department: str | None = None
+) -> str | None:
+    """
+    Get bulk file version identifier, from its URL and ETag or Last-Modified headers.
 
     Args:
     - session, ClientSession: aiohttp session
+    - department, str | None: department to get bulk file version of, default bulk
+      file if None
     Returns:
-    - bytes: file content to later write to memory
+    - str | None: version identifier, None if server exposes no validator
     """
-    async with session.get(url=settings.dgf_historical_data_url) as download:
+    url = get_bulk_file_url(department)
+    async with session.head(url=url, allow_redirects=True) as head:
+        if (sc := head.status) // 100 > 2:
+            raise HTTPException(status_code=sc, detail=f"Cannot get {url} version")
+        validator = head.headers.get("ETag") or head.headers.get("Last-Modified")
+
+    if validator is None:
+        return None
+    return f"{url} {validator}"
+
+
+async def download_bulk_file(
+    session: ClientSession, file_path: Path, department: str | None = None
+) -> int:
+    """
+    Download gzipped bulk file of a department and write it gunzipped to given path.
+
+    Contents are streamed by chunks of settings.dgf_download_chunk_size bytes,
+    gunzipped out of event loop and written straight to the file, so memory usage
+    does not depend on file size. File is thus written as plain CSV, which Polars
+    scans without inflating it whole in memory as it does for gzipped files.
+    https://docs.aiohttp.org/en/stable/client_quickstart.html#streaming-response-content
+
+    Args:
+    - session, ClientSession: aiohttp session
+    - file_path, Path: path to write gunzipped file content to
+    - department, str | None: department to download bulk file of, default bulk file
+      if None
+    Returns:
+    - int: number of bytes downloaded, before gunzipping
+    """
+    async with session.get(url=get_bulk_file_url(department)) as download:
         if (sc := download.status) // 100 > 2:
             text = await download.text()
             raise HTTPException(status_code=sc, detail=text)
-        content = await download.read()
 
-    return content
+        total_size = download.content_length
+        downloaded_size = 0
+        gunzipped_size = 0
+        decompressor = zlib.decompressobj(wbits=GZIP_WBITS)
+        start = time.perf_counter()
+        async with await open_file(file_path, "wb") as bulk_file:
+            async for chunk in download.content.iter_chunked(
+                settings.dgf_download_chunk_size
+            ):
+                gunzipped_chunk = await to_thread.run_sync(
+                    decompressor.decompress, chunk
+                )
+                await bulk_file.write(gunzipped_chunk)
+                downloaded_size += len(chunk)
+                gunzipped_size += len(gunzipped_chunk)
+                logger.debug(
+                    "Bulk file download progress : %d / %s bytes",
+                    downloaded_size,
+                    total_size or "?",
+                )
+            gunzipped_chunk = decompressor.flush()
+            await bulk_file.write(gunzipped_chunk)
+            gunzipped_size += len(gunzipped_chunk)
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Bulk file %s downloaded : %d bytes (%d gunzipped) in %.2fs (%.2f MB/s)",
+        department or "",
+        downloaded_size,
+        gunzipped_size,
+        elapsed,
+        downloaded_size / 1e6 / elapsed if elapsed > 0 else 0,
+    )
+    return downloaded_size
@@ -1,17 +1,23 @@
+import asyncio
 import datetime as dt
+import logging
+import random
+from functools import cache
 
-from aiohttp import ClientSession
-from async_lru import alru_cache
-from cachetools import TTLCache, cached
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 from fastapi import HTTPException
 
 from settings import get_api_settings
 
+logger = logging.getLogger(__name__)
 settings = get_api_settings()
 
 ID_STATION = "75114001"  # Paris Montsouris
 COMPUTE_DAILY_DATA_ROUTE = "commande-station/quotidienne"
 DOWNLOAD_ROUTE = "commande/fichier"
+DATA_ROLLOVER_TIME = dt.time(11, 35, 00)
+RESULTS_NOT_READY_STATUSES = (202, 204)
+DEFAULT_TOKEN_LIFETIME = 3600
 
 
 async def get_last_mfapi_data_date() -> dt.date:
@@ -30,7 +36,7 @@ async def get_last_mfapi_data_date() -> dt.date:
     """
     if settings.fake_last_data_day is None:
         now = dt.datetime.now(dt.timezone.utc)
-        delta_days = 2 if now.time() < dt.time(11, 35, 00) else 1
+        delta_days = 2 if now.time() < DATA_ROLLOVER_TIME else 1
         last_data_date = now.date() - dt.timedelta(days=delta_days)
     else:
         last_data_date = dt.datetime.strptime(
@@ -39,31 +45,184 @@ async def get_last_mfapi_data_date() -> dt.date:
     return last_data_date
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=3600))
-def get_client_session():
-    return ClientSession()
-
-
-@alru_cache(maxsize=1, ttl=3600)
-async def get_mf_access_token(session: ClientSession) -> str:
+def get_next_mfapi_data_datetime(last_data_date: dt.date) -> dt.datetime:
     """
-    Get access token to authentify to Meteo France API.
+    Get time at which data following given last data date becomes available.
 
-    Tokens last one hour, and should be fetched through a Depends operation.
+    Data for D-1 is available from D at rollover time on, see get_last_mfapi_data_date.
 
     Args:
-    - session, ClientSession: aiohttp client session
+    - last_data_date, dt.date: last data date available
     Returns:
-    - str: token to use, valid one hour
+    - dt.datetime: UTC time when next data date becomes available
+    """
+    return dt.datetime.combine(
+        last_data_date + dt.timedelta(days=2), DATA_ROLLOVER_TIME, dt.timezone.utc
+    )
+
+
+class ClientSessionPool:
+    """
+    Long-lived aiohttp client session, sharing connections across requests.
+
+    Its connector bounds connections per host, so that Meteo France API and data.gouv
+    each get their own share, and caches DNS resolutions. Session is opened on first
+    use and kept open until closed, so that warm Lambdas and long-running servers
+    reuse open connections.
+    Requests have no total timeout, as bulk files take long to download, but a
+    stalled response fails once no data is read for settings.http_sock_read_timeout.
+    """
+
+    def __init__(self) -> None:
+        self.session: ClientSession | None = None
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        """
+        Open pooled client session, if not opened yet.
+
+        Args:
+        - None
+        Returns:
+        - None
+        """
+        async with self._lock:
+            if self.session is None:
+                connector = TCPConnector(
+                    limit=settings.http_max_connections,
+                    limit_per_host=settings.http_max_connections_per_host,
+                    ttl_dns_cache=settings.http_dns_cache_ttl,
+                    keepalive_timeout=settings.http_keepalive_timeout,
+                )
+                self.session = ClientSession(
+                    connector=connector,
+                    timeout=ClientTimeout(
+                        total=None,
+                        connect=settings.http_connect_timeout,
+                        sock_read=settings.http_sock_read_timeout,
+                    ),
+                )
+
+    async def close(self) -> None:
+        """
+        Close pooled client session and its connections, if opened.
+
+        Args:
+        - None
+        Returns:
+        - None
+        """
+        async with self._lock:
+            if self.session is not None:
+                await self.session.close()
+            self.session = None
+
+
+@cache
+def get_client_session_pool() -> ClientSessionPool:
+    return ClientSessionPool()
+
+
+async def get_client_session() -> ClientSession:
+    session_pool = get_client_session_pool()
+    await session_pool.open()
+    return session_pool.session
+
+
+def get_mf_request_timeout() -> ClientTimeout:
+    """Timeout of Meteo France API calls, which answer small payloads quickly."""
+    return ClientTimeout(
+        total=settings.mf_request_timeout,
+        connect=settings.http_connect_timeout,
+        sock_read=settings.http_sock_read_timeout,
+    )
+
+
+class MfTokenManager:
+    """
+    Holder of the access token to authentify to Meteo France API.
+
+    Concurrent refreshes are deduplicated into a single token request. Once a token
+    is close to its expiry, it is refreshed in the background while still being
+    served, so that only the very first request waits for the token endpoint.
     """
-    data = {"grant_type": "client_credentials"}
-    headers = {"Authorization": "Basic " + settings.mf_climate_app_id}
-    async with session.post(
-        url=settings.mf_token_url, data=data, headers=headers, allow_redirects=False
-    ) as access_token_response:
-        payload = await access_token_response.json()
-        token = payload["access_token"]
-    return token
+
+    token: str | None
+    expires_at: float
+    refresh_task: asyncio.Task | None
+
+    def __init__(self) -> None:
+        self.token = None
+        self.expires_at = 0.0
+        self.refresh_task = None
+
+    async def _fetch_token(self, session: ClientSession) -> str:
+        """Request a new token and store it along with its expiry loop time."""
+        data = {"grant_type": "client_credentials"}
+        headers = {"Authorization": "Basic " + settings.mf_climate_app_id}
+        async with session.post(
+            url=settings.mf_token_url,
+            data=data,
+            headers=headers,
+            allow_redirects=False,
+            timeout=get_mf_request_timeout(),
+        ) as access_token_response:
+            payload = await access_token_response.json()
+        self.token = payload["access_token"]
+        self.expires_at = asyncio.get_running_loop().time() + payload.get(
+            "expires_in", DEFAULT_TOKEN_LIFETIME
+        )
+        return self.token
+
+    def _refreshed(self, task: asyncio.Task) -> None:
+        """Forget finished refresh, logging its failure as no caller may await it."""
+        self.refresh_task = None
+        if not task.cancelled() and (exception := task.exception()) is not None:
+            logger.warning("Meteo France token refresh failed: %r", exception)
+
+    def _refresh(self, session: ClientSession) -> asyncio.Task:
+        """Get running token refresh, starting one if none is running."""
+        if self.refresh_task is None:
+            self.refresh_task = asyncio.ensure_future(self._fetch_token(session))
+            self.refresh_task.add_done_callback(self._refreshed)
+        return self.refresh_task
+
+    async def get_token(self, session: ClientSession) -> str:
+        """
+        Get a valid access token, refreshing it ahead of its expiry.
+
+        Args:
+        - session, ClientSession: aiohttp client session
+        Returns:
+        - str: token to use
+        """
+        now = asyncio.get_running_loop().time()
+        if self.token is None or now >= self.expires_at:
+            # Shielded so that a cancelled caller does not cancel others' refresh
+            return await asyncio.shield(self._refresh(session))
+        if now >= self.expires_at - settings.mf_token_refresh_margin:
+            self._refresh(session)
+        return self.token
+
+    async def refresh(self, session: ClientSession, rejected_token: str) -> str:
+        """
+        Get a new access token after the API rejected one.
+
+        Token is only requested again if no other caller already renewed it.
+
+        Args:
+        - session, ClientSession: aiohttp client session
+        - rejected_token, str: token the API answered 401 to
+        Returns:
+        - str: token to use
+        """
+        if self.token is not None and self.token != rejected_token:
+            return self.token
+        self.token = None
+        return await asyncio.shield(self._refresh(session))
+
+
+mf_token_manager = MfTokenManager()
 
 
 async def launch_daily_data_computation(
@@ -93,6 +252,7 @@ async def launch_daily_data_computation(
             "date-fin-periode": end_time,
         },
         headers={"Authorization": f"Bearer {token}"},
+        timeout=get_mf_request_timeout(),
     ) as launch_computation:
         if (sc := launch_computation.status) // 100 > 2:
             raise HTTPException(status_code=sc, detail=await launch_computation.text())
@@ -101,26 +261,61 @@ async def launch_daily_data_computation(
     return payload["elaboreProduitAvecDemandeResponse"]["return"]
 
 
+def _poll_delay(attempt: int) -> float:
+    """Exponential backoff delay before polling again, with jitter on its upper half."""
+    delay = min(settings.mf_poll_max_delay, settings.mf_poll_base_delay * 2**attempt)
+    return random.uniform(delay / 2, delay)
+
+
+async def _fetch_results_if_ready(
+    session: ClientSession, id_command: str, token: str
+) -> bytes | None:
+    """Fetch daily data computation results, None if not computed yet."""
+    async with session.get(
+        url=f"{settings.mf_climate_app_url}/{DOWNLOAD_ROUTE}",
+        params={"id-cmde": id_command},
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=get_mf_request_timeout(),
+    ) as result_computation:
+        if result_computation.status in RESULTS_NOT_READY_STATUSES:
+            return None
+        if (sc := result_computation.status) // 100 > 2:
+            raise HTTPException(status_code=sc, detail=await result_computation.text())
+        body = await result_computation.read()
+
+    return body
+
+
 async def fetch_daily_data_computation_results(
     session: ClientSession, id_command: str, token: str
-) -> str:
+) -> bytes:
     """
-    Fetch daily data computation results.
+    Fetch daily data computation results, polling until they are computed.
+
+    Meteo France answers "not ready" statuses while computing, so results are polled
+    after a first delay then with jittered exponential backoff. Deadline bounds the
+    whole polling, requests in flight included.
 
     Args:
     - session, ClientSession: aiohttp client session
     - id_command, str: the id of the requested data computation
     - token, str: token to identify this app
     Returns:
-    - str: result CSV file as string
+    - bytes: result CSV file as received, not decoded
     """
-    async with session.get(
-        url=f"{settings.mf_climate_app_url}/{DOWNLOAD_ROUTE}",
-        params={"id-cmde": id_command},
-        headers={"Authorization": f"Bearer {token}"},
-    ) as result_computation:
-        text = await result_computation.text()
-        if (sc := result_computation.status) // 100 > 2:
-            raise HTTPException(status_code=sc, detail=text)
+    try:
+        async with asyncio.timeout(settings.mf_poll_timeout):
+            await asyncio.sleep(settings.mf_poll_first_delay)
+            attempt = 0
+            while (
+                body := await _fetch_results_if_ready(session, id_command, token)
+            ) is None:
+                await asyncio.sleep(_poll_delay(attempt))
+                attempt += 1
+    except TimeoutError as exception:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Daily data computation {id_command} not ready in time",
+        ) from exception
 
-    return text
+    return body
@@ -0,0 +1,143 @@
+import sqlite3
+from typing import Callable, Self, TypeVar
+
+from anyio import to_thread
+from fastapi.param_functions import Depends
+
+from backend.climatology_index import pack_index, unpack_index
+from backend.sqlite.sqlite_service import (
+    claim_items,
+    connection_lock,
+    delete_items,
+    get_document,
+    get_items,
+    get_sqlite_connection,
+    has_item,
+    write_document,
+    write_items,
+)
+from core.entities import ClimatologyIndex, RainBatch, RainStore, TimespanId
+
+INDEX_KEY_PREFIX = "INDEX#"
+CLAIM_KEY_PREFIX = "CLAIM#"
+
+T = TypeVar("T")
+
+
+class KeyValueDbRepository:
+    connection: sqlite3.Connection
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection = Depends(get_sqlite_connection),
+    ) -> Self:
+        self.connection = connection
+
+    async def _run(self, function: Callable[..., T], **kwargs) -> T:
+        """Run SQLite function in a worker thread, holding connection lock."""
+
+        def run_locked() -> T:
+            with connection_lock:
+                return function(connection=self.connection, **kwargs)
+
+        return await to_thread.run_sync(run_locked)
+
+    async def get(self, keys: list[TimespanId]) -> dict[TimespanId, float]:
+        """
+        Get values corresponding to keys of KeyValueDb.
+
+        Keys missing in Db are absent from result.
+
+        Args:
+        - keys, list[TimespanId]: keys to get values
+        Returns:
+        - dict[TimespanId, float]: dict with input keys & corresponding values
+        """
+        return await self._run(get_items, keys=keys)
+
+    async def has(self, key: TimespanId) -> bool:
+        """
+        Checks if KeyValueDb has corresponding key.
+
+        Args:
+        - key, TimespanId: key to check existence in backend
+        Returns:
+        - bool: is the key in Db
+        """
+        return await self._run(has_item, key=key)
+
+    async def claim(self, keys: list[TimespanId]) -> bool:
+        """
+        Atomically claim keys not yet in KeyValueDb, in a single round trip.
+
+        Claim fails as a whole if any key is already in Db or already claimed.
+
+        Args:
+        - keys, list[TimespanId]: keys to claim
+        Returns:
+        - bool: were all keys claimed
+        """
+        return await self._run(
+            claim_items,
+            claims={key: f"{CLAIM_KEY_PREFIX}{key}" for key in keys},
+        )
+
+    async def release(self, keys: list[TimespanId]) -> None:
+        """
+        Release claimed keys, so that they can be claimed again.
+
+        Args:
+        - keys, list[TimespanId]: keys to release
+        Returns:
+        - None
+        """
+        await self._run(
+            delete_items,
+            keys=[f"{CLAIM_KEY_PREFIX}{key}" for key in keys],
+        )
+
+    async def post(self, rains: list[RainStore] | RainBatch) -> None:
+        """
+        Post new rain values to backend key value db.
+
+        Args:
+        - rains, list[RainStore] | RainBatch: rain values to store in backend
+        Returns:
+        - None
+        """
+        rain_items = RainBatch.of(rains).to_dict()
+        await self._run(write_items, items=rain_items)
+        return None
+
+    async def get_index(self, station_id: int) -> ClimatologyIndex | None:
+        """
+        Get climatology index of a station from KeyValueDb.
+
+        Args:
+        - station_id, int: station to get index of
+        Returns:
+        - ClimatologyIndex | None: station index, None if not stored yet
+        """
+        document = await self._run(
+            get_document,
+            key=f"{INDEX_KEY_PREFIX}{station_id}",
+        )
+        if document is None:
+            return None
+        return unpack_index(station_id, document)
+
+    async def post_index(self, index: ClimatologyIndex) -> None:
+        """
+        Post climatology index of a station to KeyValueDb, as one packed binary item.
+
+        Args:
+        - index, ClimatologyIndex: index to store in backend
+        Returns:
+        - None
+        """
+        await self._run(
+            write_document,
+            key=f"{INDEX_KEY_PREFIX}{index.station_id}",
+            document=pack_index(index),
+        )
+        return None
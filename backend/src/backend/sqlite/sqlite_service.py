@@ -0,0 +1,236 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import cache
+from typing import Generator
+
+from settings import get_api_settings
+
+settings = get_api_settings()
+
+# Well below SQLite maximum number of host parameters in a statement
+GET_MAX_KEYS = 500
+
+connection_lock = threading.Lock()
+
+
+def open_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Open SQLite database in WAL mode, creating backend table if needed.
+
+    Claims expiry column is added to tables created before claims were leased.
+
+    Connection is shared across threads : callers serialize its use through
+    connection_lock.
+
+    Args:
+    - db_path, str: path of SQLite database file
+    Returns:
+    - sqlite3.Connection: connection in autocommit mode, transactions being explicit
+    """
+    connection = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(
+        f'CREATE TABLE IF NOT EXISTS "{settings.backend_table_name}" ('
+        f'"{settings.backend_table_key_name}" TEXT PRIMARY KEY, '
+        f'"{settings.backend_table_value_name}" REAL, '
+        f'"{settings.backend_table_document_name}" BLOB, '
+        f'"{settings.backend_table_expires_at_name}" REAL'
+        ") WITHOUT ROWID"
+    )
+    columns = connection.execute(
+        f'PRAGMA table_info("{settings.backend_table_name}")'
+    ).fetchall()
+    if settings.backend_table_expires_at_name not in (column[1] for column in columns):
+        connection.execute(
+            f'ALTER TABLE "{settings.backend_table_name}" '
+            f'ADD COLUMN "{settings.backend_table_expires_at_name}" REAL'
+        )
+    return connection
+
+
+@cache
+def get_sqlite_connection() -> sqlite3.Connection:
+    return open_connection(settings.sqlite_db_path)
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection) -> Generator[None, None, None]:
+    """Run statements in an immediate transaction, rolled back on failure."""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _select_keys(
+    connection: sqlite3.Connection, columns: str, keys: list[str]
+) -> list[tuple]:
+    """Select given columns of rows with given keys, in chunks of GET_MAX_KEYS."""
+    rows = []
+    for i in range(0, len(keys), GET_MAX_KEYS):
+        chunk = keys[i : i + GET_MAX_KEYS]
+        rows += connection.execute(
+            f'SELECT {columns} FROM "{settings.backend_table_name}" '
+            f'WHERE "{settings.backend_table_key_name}" '
+            f"IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall()
+    return rows
+
+
+def get_items(connection: sqlite3.Connection, keys: list[str]) -> dict[str, float]:
+    """
+    Get rain items from SQLite table.
+
+    Args:
+    - connection, sqlite3.Connection: SQLite connection
+    - keys, list[str] : list of keys to request table
+    Returns:
+    - dict[str, float] : rain amounts of given timestamps, keys missing in table are
+      absent
+    """
+    return dict(
+        _select_keys(
+            connection,
+            f'"{settings.backend_table_key_name}", '
+            f'"{settings.backend_table_value_name}"',
+            list(dict.fromkeys(keys)),
+        )
+    )
+
+
+def has_item(connection: sqlite3.Connection, key: str) -> bool:
+    """
+    Checks if given key is in backend table.
+
+    Args:
+    - connection, sqlite3.Connection: SQLite connection
+    - key, str: key to check existence
+    Returns:
+    - bool: is the key in backend table
+    """
+    row = connection.execute(
+        f'SELECT 1 FROM "{settings.backend_table_name}" '
+        f'WHERE "{settings.backend_table_key_name}" = ?',
+        (key,),
+    ).fetchone()
+    return row is not None
+
+
+def write_items(connection: sqlite3.Connection, items: dict[str, float]) -> None:
+    """
+    Write given items in backend table, in a single transaction.
+
+    Args:
+    - connection, sqlite3.Connection: SQLite connection
+    - items, dict[str, float] : key-value data to store
+    Returns:
+    - None
+    """
+    with _transaction(connection):
+        connection.executemany(
+            f'INSERT OR REPLACE INTO "{settings.backend_table_name}" '
+            f'("{settings.backend_table_key_name}", '
+            f'"{settings.backend_table_value_name}") VALUES (?, ?)',
+            ((k, float(v)) for k, v in items.items()),
+        )
+
+
+def claim_items(connection: sqlite3.Connection, claims: dict[str, str]) -> bool:
+    """
+    Write claim items in a single transaction, provided claimed items do not exist.
+
+    Claim items are leased for claim_lease_time : a claim key whose lease expired,
+    e.g. left by a crashed run, is taken over.
+
+    Args:
+    - connection, sqlite3.Connection: SQLite connection
+    - claims, dict[str, str]: claim key of each claimed key
+    Returns:
+    - bool: were all items claimed, False if any one already exists or is claimed
+    """
+    now = time.time()
+    with _transaction(connection):
+        if _select_keys(connection, "1", list(claims.keys())):
+            return False
+        claim_leases = _select_keys(
+            connection,
+            f'"{settings.backend_table_expires_at_name}"',
+            list(claims.values()),
+        )
+        if any(
+            expires_at is None or expires_at >= now for (expires_at,) in claim_leases
+        ):
+            return False
+        connection.executemany(
+            f'INSERT OR REPLACE INTO "{settings.backend_table_name}" '
+            f'("{settings.backend_table_key_name}", '
+            f'"{settings.backend_table_expires_at_name}") VALUES (?, ?)',
+            (
+                (claim_key, now + settings.claim_lease_time)
+                for claim_key in claims.values()
+            ),
+        )
+    return True
+
+
+def delete_items(connection: sqlite3.Connection, keys: list[str]) -> None:
+    """
+    Delete given keys from backend table.
+
+    Args:
+    - connection, sqlite3.Connection: SQLite connection
+    - keys, list[str]: keys to delete
+    Returns:
+    - None
+    """
+    with _transaction(connection):
+        connection.executemany(
+            f'DELETE FROM "{settings.backend_table_name}" '
+            f'WHERE "{settings.backend_table_key_name}" = ?',
+            ((key,) for key in keys),
+        )
+
+
+def get_document(connection: sqlite3.Connection, key: str) -> bytes | None:
+    """
+    Get binary document stored under given key in backend table.
+
+    Args:
+    - connection, sqlite3.Connection: SQLite connection
+    - key, str: key of the document
+    Returns:
+    - bytes | None: stored document, None if key is not in backend table
+    """
+    row = connection.execute(
+        f'SELECT "{settings.backend_table_document_name}" '
+        f'FROM "{settings.backend_table_name}" '
+        f'WHERE "{settings.backend_table_key_name}" = ?',
+        (key,),
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def write_document(connection: sqlite3.Connection, key: str, document: bytes) -> None:
+    """
+    Write given binary document in backend table, replacing any previous one.
+
+    Args:
+    - connection, sqlite3.Connection: SQLite connection
+    - key, str: key to store document under
+    - document, bytes: document to store
+    Returns:
+    - None
+    """
+    connection.execute(
+        f'INSERT OR REPLACE INTO "{settings.backend_table_name}" '
+        f'("{settings.backend_table_key_name}", '
+        f'"{settings.backend_table_document_name}") VALUES (?, ?)',
+        (key, document),
+    )
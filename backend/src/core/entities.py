@@ -2,19 +2,25 @@ from datetime import date
 from decimal import Decimal
 from typing import Annotated
 
-import pandera.polars as pa
+import polars as pl
 from pydantic import BaseModel, Field
 
+from core.validation import ColumnSchema, FrameSchema
+
 STATION_ID = 75114001  # Montsouris old weather station
+CALENDAR_YEAR = 2000  # leap year, so that every calendar day has its own slot
+DAYS_IN_CALENDAR = 366
 
 
+TIMESPAN_ID_PATTERN = r"^(\d+#)?(M|20\d{2})[0-1]\d[0-3]\d-(M|20\d{2})[0-1]\d[0-3]\d$"
 TimespanId = Annotated[
     str,
     Field(
-        pattern=r"^(M|20\d{2})[0-1]\d[0-3]\d-(M|20\d{2})[0-1]\d[0-3]\d$",
+        pattern=TIMESPAN_ID_PATTERN,
         description=(
             "Timespan identifier in the form of date1-date2. Each date is format %Y%m%d,"
-            " with year replaced by 'M' if it's a mean period."
+            " with year replaced by 'M' if it's a mean period. Can be prefixed by"
+            " 'station_id#' for stations other than the reference one."
         ),
     ),
 ]
@@ -50,18 +56,100 @@ class RainStore(BaseModel):
     )
 
 
-class BulkFileSchema(pa.DataFrameModel):
-    station_id: int = pa.Field(
-        in_range={"min_value": 75e6, "max_value": 76e6}, nullable=False
-    )
-    date: int = pa.Field(
-        in_range={"min_value": 19500101, "max_value": 20250101}, nullable=False
-    )
-    rainfall_mm: float = pa.Field(ge=0, nullable=True)
+RainBatchSchema = FrameSchema(
+    name="RainBatchSchema",
+    columns={
+        "timespan_id": ColumnSchema(pl.String, pattern=TIMESPAN_ID_PATTERN),
+        "rain_mm": ColumnSchema(pl.Float64, min_value=0.0),
+    },
+)
+
+
+class RainBatch:
+    """
+    Columnar batch of rain values to store, as timespan_id and rain_mm columns.
+
+    Batches are built straight from computed frames, without one object per value,
+    and validated against RainStore constraints in a single vectorized pass. Rains are
+    rounded to tenths of mm, as stored.
+    """
+
+    __slots__ = ("df",)
+
+    def __init__(self, df: pl.DataFrame) -> None:
+        df = df.select(
+            pl.col("timespan_id").cast(pl.String),
+            pl.col("rain_mm").cast(pl.Float64).round(1),
+        )
+        report = RainBatchSchema.validate(df)
+        if not report.is_valid:
+            raise ValueError(f"Invalid rain batch: {report}")
+        self.df = df
+
+    @classmethod
+    def from_columns(
+        cls, timespan_ids: list[TimespanId], rains_mm: list[float]
+    ) -> "RainBatch":
+        """Build batch from parallel timespan_ids and rains_mm lists."""
+        return cls(
+            pl.DataFrame(
+                {"timespan_id": timespan_ids, "rain_mm": rains_mm},
+                schema={"timespan_id": pl.String, "rain_mm": pl.Float64},
+            )
+        )
+
+    @classmethod
+    def of(cls, rains: "list[RainStore] | RainBatch") -> "RainBatch":
+        """Get rains as a batch, building it if rains are RainStore objects."""
+        if isinstance(rains, RainBatch):
+            return rains
+        return cls.from_columns(
+            [rain.timespan_id for rain in rains],
+            [float(rain.rain_mm) for rain in rains],
+        )
 
+    @classmethod
+    def concat(cls, batches: "list[RainBatch]") -> "RainBatch":
+        """Concatenate batches, in order."""
+        concatenated = cls.__new__(cls)
+        concatenated.df = pl.concat([batch.df for batch in batches])
+        return concatenated
 
-class CurrentFileSchema(pa.DataFrameModel):
-    date: int = pa.Field(
-        in_range={"min_value": 20250101, "max_value": 20990101}, nullable=False
+    def __len__(self) -> int:
+        return self.df.height
+
+    def to_dict(self) -> dict[TimespanId, float]:
+        """Get rain of each timespan, last one winning for duplicated timespans."""
+        return dict(zip(self.df["timespan_id"].to_list(), self.df["rain_mm"].to_list()))
+
+
+class ClimatologyIndex(BaseModel):
+    station_id: int = Field(description="Station the index was computed for")
+    number_of_years: int = Field(gt=0, description="Number of years summed in index")
+    cumulated_rain_tenths: list[int] = Field(
+        min_length=DAYS_IN_CALENDAR + 1,
+        max_length=DAYS_IN_CALENDAR + 1,
+        description=(
+            "Rain in tenths of mm fallen before each calendar day of a leap year,"
+            " summed over all years. Last value is the whole year rain."
+        ),
     )
-    rainfall_mm: float = pa.Field(ge=0, nullable=False)
+
+
+BulkFileSchema = FrameSchema(
+    name="BulkFileSchema",
+    columns={
+        "station_id": ColumnSchema(pl.Int64, min_value=1_000_000, max_value=99_000_000),
+        "date": ColumnSchema(pl.Int64, min_value=19500101, max_value=20250101),
+        "rainfall_mm": ColumnSchema(pl.Float64, nullable=True, min_value=0.0),
+    },
+)
+
+
+CurrentFileSchema = FrameSchema(
+    name="CurrentFileSchema",
+    columns={
+        "date": ColumnSchema(pl.Int64, min_value=20250101, max_value=20990101),
+        "rainfall_mm": ColumnSchema(pl.Float64, min_value=0.0),
+    },
+)
@@ -8,3 +8,28 @@ class AlreadyAddedData(Exception):
     def __init__(self) -> None:
         self.message = "Data is already in backend."
         super().__init__(self.message)
+
+
+class NotInitialized(Exception):
+    def __init__(self) -> None:
+        self.message = "Key value DB is not initialized yet."
+        super().__init__(self.message)
+
+
+class InvalidTimespan(Exception):
+    def __init__(self) -> None:
+        self.message = "Timespan is not made of valid calendar days."
+        super().__init__(self.message)
+
+
+class InvalidDataFile(Exception):
+    def __init__(self, report) -> None:
+        self.report = report
+        self.message = f"Data file does not match its schema: {report}."
+        super().__init__(self.message)
+
+
+class MissingDailyData(Exception):
+    def __init__(self) -> None:
+        self.message = "Daily data is not published yet for all requested days."
+        super().__init__(self.message)
@@ -1,9 +1,9 @@
 from contextlib import contextmanager
-from datetime import date
+from datetime import date, datetime
 from pathlib import Path
 from typing import Generator, Protocol
 
-from core.entities import RainStore, TimespanId
+from core.entities import ClimatologyIndex, RainBatch, RainStore, TimespanId
 
 
 class KeyValueDbProtocol(Protocol):
@@ -11,7 +11,7 @@ class KeyValueDbProtocol(Protocol):
         """
         Get values corresponding to keys of KeyValueDb.
 
-        We assume values exist in Db.
+        Keys missing in Db are absent from result.
 
         Args:
         - keys, list[TimespanId]: keys to get values
@@ -31,12 +31,58 @@ class KeyValueDbProtocol(Protocol):
         """
         ...
 
-    async def post(self, rains: list[RainStore]) -> None:
+    async def claim(self, keys: list[TimespanId]) -> bool:
+        """
+        Atomically claim keys not yet in KeyValueDb, in a single round trip.
+
+        Claim fails as a whole if any key is already in Db or already claimed.
+
+        Args:
+        - keys, list[TimespanId]: keys to claim
+        Returns:
+        - bool: were all keys claimed
+        """
+        ...
+
+    async def release(self, keys: list[TimespanId]) -> None:
+        """
+        Release claimed keys, so that they can be claimed again.
+
+        Args:
+        - keys, list[TimespanId]: keys to release
+        Returns:
+        - None
+        """
+        ...
+
+    async def post(self, rains: list[RainStore] | RainBatch) -> None:
         """
         Post new rain values to backend key value db.
 
         Args:
-        - rains, list[RainStore]: rain values to store in backend
+        - rains, list[RainStore] | RainBatch: rain values to store in backend
+        Returns:
+        - None
+        """
+        ...
+
+    async def get_index(self, station_id: int) -> ClimatologyIndex | None:
+        """
+        Get climatology index of a station from KeyValueDb.
+
+        Args:
+        - station_id, int: station to get index of
+        Returns:
+        - ClimatologyIndex | None: station index, None if not stored yet
+        """
+        ...
+
+    async def post_index(self, index: ClimatologyIndex) -> None:
+        """
+        Post climatology index of a station to KeyValueDb.
+
+        Args:
+        - index, ClimatologyIndex: index to store in backend
         Returns:
         - None
         """
@@ -46,10 +92,21 @@ class KeyValueDbProtocol(Protocol):
 class DataFileProtocol(Protocol):
     async def get_last_data_date(self) -> date: ...
 
+    async def get_next_data_datetime(self, last_data_date: date) -> datetime: ...
+
+    async def get_daily_file_buffer(self, begin_date: date) -> bytes:
+        """
+        Get daily data file contents in memory, without going through a file.
+        """
+        ...
+
     @contextmanager
-    async def get_daily_file_path(
-        self, begin_date: date
+    async def get_bulk_file_path(
+        self, department: str | None = None
     ) -> Generator[Path, None, None]: ...
 
-    @contextmanager
-    async def get_bulk_file_path(self) -> Generator[Path, None, None]: ...
+    async def get_bulk_file_version(self, department: str | None = None) -> str | None:
+        """
+        Get an identifier of bulk file current version, None if source has none.
+        """
+        ...
@@ -1,20 +1,62 @@
-from copy import deepcopy
-from datetime import date, timedelta
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import partial
+from hashlib import sha256
+from multiprocessing import get_context
 from pathlib import Path
+from typing import AsyncGenerator, Callable
 
 import polars as pl
 
 from core.entities import (
+    CALENDAR_YEAR,
+    DAYS_IN_CALENDAR,
     STATION_ID,
     BulkFileSchema,
+    ClimatologyIndex,
     CurrentFileSchema,
+    RainBatch,
     RainCompleteInfo,
     RainStore,
     TimespanId,
 )
-from core.exceptions import AlreadyAddedData, AlreadyInitialized
+from core.exceptions import (
+    AlreadyAddedData,
+    AlreadyInitialized,
+    InvalidTimespan,
+    MissingDailyData,
+    NotInitialized,
+)
 from core.protocol import DataFileProtocol, KeyValueDbProtocol
 
+# Pool blocking Polars computations run in, event loop default one if None
+compute_executor: Executor | None = None
+
+
+async def _run_blocking[T](
+    function: Callable[..., T], *args, executor: Executor | None = None
+) -> T:
+    """
+    Run blocking computation out of event loop, so that it keeps serving requests.
+
+    Polars releases GIL while computing, so that a thread pool is enough for its work.
+    A process pool can be given for work holding GIL.
+
+    Args :
+    - function, Callable[..., T] : blocking function to run, picklable if run in a
+      process pool
+    - args : function positional arguments
+    - executor, Executor | None : pool to run function in, compute_executor if None
+    Returns :
+    - T : function result
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        executor or compute_executor, partial(function, *args)
+    )
+
 
 async def get_data(
     key_value_db_repo: KeyValueDbProtocol, last_data_day: date
@@ -22,11 +64,16 @@ async def get_data(
     """
     Get all data useful for front display. This assumes all data is already cached.
 
+    Daily rains are read in one batch, while means are all answered from the single
+    climatology index item of reference station, read concurrently.
+
     Args :
     - key_value_db_repo : cache db backend repository
     - last_data_day, date : last known date to fetch data for
     Returns :
     - RainCompleteInfo : object with all info for frontend
+    Raises :
+    - NotInitialized : if reference station climatology index is not stored yet
     """
     month_beg = date(last_data_day.year, last_data_day.month, 1)
     prev_30_days = last_data_day - timedelta(days=30)
@@ -39,181 +86,526 @@ async def get_data(
     last_31_days_tsid: TimespanId = (
         f"{prev_30_days.strftime('%Y%m%d')}-{last_data_day.strftime('%Y%m%d')}"
     )
-    mean_month_beg_tsid: TimespanId = (
-        f"M{month_beg.strftime('%m%d')}-M{last_data_day.strftime('%m%d')}"
-    )
-    mean_31_days_tsid: TimespanId = (
-        f"M{prev_30_days.strftime('%m%d')}-M{last_data_day.strftime('%m%d')}"
-    )
-    rain_data = await key_value_db_repo.get(
-        keys=[
-            last_day_tsid,
-            since_month_beg_tsid,
-            last_31_days_tsid,
-            mean_month_beg_tsid,
-            mean_31_days_tsid,
-        ]
+    rain_data, index = await asyncio.gather(
+        key_value_db_repo.get(
+            keys=[last_day_tsid, since_month_beg_tsid, last_31_days_tsid]
+        ),
+        key_value_db_repo.get_index(STATION_ID),
     )
+    if index is None:
+        raise NotInitialized
     return RainCompleteInfo(
         last_day=last_data_day,
         last_day_rain_mm=rain_data[last_day_tsid],
         month_beg=month_beg,
         since_month_beg_mm=rain_data[since_month_beg_tsid],
-        mean_month_beg_mm=rain_data[mean_month_beg_tsid],
+        mean_month_beg_mm=_get_index_mean(
+            index, _calendar_day(month_beg), _calendar_day(last_data_day)
+        ),
         prev_30_days=prev_30_days,
         last_31_days_mm=rain_data[last_31_days_tsid],
-        mean_31_days_mm=rain_data[mean_31_days_tsid],
+        mean_31_days_mm=_get_index_mean(
+            index, _calendar_day(prev_30_days), _calendar_day(last_data_day)
+        ),
     )
 
 
-async def _compute_daily_data(
-    file_path: Path, this_day: date
-) -> tuple[float, float, float]:
+_data_cache: dict[date, RainCompleteInfo] = {}
+_data_in_flight: dict[date, asyncio.Task[RainCompleteInfo]] = {}
+
+
+def _cache_data(last_data_day: date, task: asyncio.Task[RainCompleteInfo]) -> None:
+    """
+    Release in flight read of last_data_day data, and cache its result if any.
+
+    Cached data is only replaced by data of the same or a later day, so that a slow
+    read of a previous day does not evict the current one.
+    """
+    del _data_in_flight[last_data_day]
+    if (
+        not task.cancelled()
+        and task.exception() is None
+        and all(last_data_day >= cached_day for cached_day in _data_cache)
+    ):
+        _data_cache.clear()
+        _data_cache[last_data_day] = task.result()
+
+
+async def get_cached_data(
+    key_value_db_repo: KeyValueDbProtocol, last_data_day: date
+) -> RainCompleteInfo:
+    """
+    Get all data useful for front display, read from Db once per last data day.
+
+    Only data of latest last data day is kept in memory : as last data day flips on
+    daily data rollover, cached data expires exactly then. Concurrent cache misses
+    share a single Db read.
+
+    Args :
+    - key_value_db_repo : cache db backend repository
+    - last_data_day, date : last known date to fetch data for
+    Returns :
+    - RainCompleteInfo : object with all info for frontend
+    """
+    if last_data_day in _data_cache:
+        return _data_cache[last_data_day]
+    task = _data_in_flight.get(last_data_day)
+    if task is None:
+        task = asyncio.ensure_future(get_data(key_value_db_repo, last_data_day))
+        _data_in_flight[last_data_day] = task
+        task.add_done_callback(partial(_cache_data, last_data_day))
+    return await asyncio.shield(task)
+
+
+def _read_daily_data(
+    source: Path | bytes, strict_validation: bool = False
+) -> dict[date, float]:
     """
-    Extracts all daily data : this day rain, this month rain and last 31 days rain.
+    Extracts all daily rains of a daily data file.
 
     Args :
-    - file_path, Path : path to read CSV file with daily data
-    - this_day, date : day to consider data from
+    - source, Path | bytes : path to read CSV file with daily data, or its contents
+    - strict_validation, bool : also validate data file with pandera, besides native
+      validation
     Returns :
-    - float : this day rain
-    - float : this month rain
-    - float : last 31 days cumulated rain
+    - dict[date, float] : rain of each day in file
     """
     current_data_df = pl.read_csv(
-        file_path,
+        source,
         has_header=True,
         columns=["DATE", "RR"],
         new_columns=["date", "rainfall_mm"],
         separator=";",
         decimal_comma=True,
     )
-    CurrentFileSchema.validate(current_data_df)
+    CurrentFileSchema.raise_if_invalid(current_data_df, strict=strict_validation)
     current_data_df = current_data_df.select(
         pl.col("date").cast(pl.String).str.strptime(pl.Date, format="%Y%m%d"),
         pl.col("rainfall_mm"),
     )
+    return dict(current_data_df.iter_rows())
+
+
+def _day_timespan_id(day: date) -> TimespanId:
+    """Get timespan identifier of a single day."""
+    return f"{day.strftime('%Y%m%d')}-{day.strftime('%Y%m%d')}"
+
+
+def _last_31_days_timespan_id(day: date) -> TimespanId:
+    """Get timespan identifier of the 31 days ending on a day."""
+    return f"{(day - timedelta(days=30)).strftime('%Y%m%d')}-{day.strftime('%Y%m%d')}"
+
+
+def _compute_daily_derived_rains(
+    daily_rains: dict[date, float], days: list[date]
+) -> RainBatch:
+    """
+    Compute day, since month beginning and last 31 days rains of each given day.
+
+    All days are computed in one vectorized pass over the daily rains series, which
+    must hold rains from 30 days before first given day on. Days with no known rain
+    count as dry in sums.
+
+    Args :
+    - daily_rains, dict[date, float] : known rain of each day
+    - days, list[date] : sorted days to compute rains of, with known rain, at least
+      one
+    Returns :
+    - RainBatch : day, since month beginning and last 31 days rains of each day
+    """
+    days_df = pl.DataFrame(
+        {"date": pl.date_range(days[0] - timedelta(days=30), days[-1], eager=True)}
+    )
+    rains_df = pl.DataFrame(
+        {"date": list(daily_rains.keys()), "rain_mm": list(daily_rains.values())},
+        schema={"date": pl.Date, "rain_mm": pl.Float64},
+    )
+    derived_df = (
+        days_df.join(rains_df, on="date", how="left")
+        .with_columns(
+            month_beg=pl.col("date").dt.month_start(),
+            prev_30_days=pl.col("date").dt.offset_by("-30d"),
+            since_month_beg_mm=pl.col("rain_mm")
+            .fill_null(0)
+            .cum_sum()
+            .over(pl.col("date").dt.month_start())
+            .round(1),
+            last_31_days_mm=pl.col("rain_mm").fill_null(0).rolling_sum(31).round(1),
+        )
+        .filter(pl.col("date").is_in(days))
+        .with_columns(day=pl.col("date").dt.strftime("%Y%m%d"))
+        .select(
+            timespan_id=pl.concat_list(
+                pl.format("{}-{}", "day", "day"),
+                pl.format("{}-{}", pl.col("month_beg").dt.strftime("%Y%m%d"), "day"),
+                pl.format("{}-{}", pl.col("prev_30_days").dt.strftime("%Y%m%d"), "day"),
+            ),
+            rain_mm=pl.concat_list("rain_mm", "since_month_beg_mm", "last_31_days_mm"),
+        )
+        .explode("timespan_id", "rain_mm")
+    )
+    return RainBatch(derived_df)
+
+
+async def _add_daily_data(
+    key_value_db_repo: KeyValueDbProtocol,
+    data_file_repo: DataFileProtocol,
+    begin_date: date,
+    end_date: date,
+    strict_validation: bool = False,
+) -> None:
+    """
+    Fetch daily rains missing from cache and store rains derived for period days.
+
+    A period day is added if its last 31 days rain is missing from cache : its day
+    rain alone may already be stored, as a preceding day of a later period. Daily
+    rains are stored per day : only days missing from cache in the period and its
+    preceding 30 days are fetched, in a single daily data command beginning on the
+    first missing one.
+
+    Args :
+    - key_value_db_repo : cache db backend repository
+    - data_file_repo : download data backend repository
+    - begin_date, date : first day to add data for
+    - end_date, date : last day to add data for
+    - strict_validation, bool : also validate data file with pandera, besides native
+      validation
+    Returns :
+    - None
+    Raises :
+    - AlreadyAddedData : if all period days are already in cache
+    - MissingDailyData : if a period day to add is neither in cache nor in fetched
+      file, so that nothing is stored and the period can be added again later
+    """
+    window_days = [
+        begin_date - timedelta(days=30) + timedelta(days=i)
+        for i in range((end_date - begin_date).days + 31)
+    ]
+    period_days = window_days[30:]
+    stored_rains = await key_value_db_repo.get(
+        keys=[_day_timespan_id(day) for day in window_days]
+        + [_last_31_days_timespan_id(day) for day in period_days]
+    )
+    days_to_add = [
+        day for day in period_days if _last_31_days_timespan_id(day) not in stored_rains
+    ]
+    if not days_to_add:
+        raise AlreadyAddedData
+
+    daily_rains = {
+        day: stored_rains[_day_timespan_id(day)]
+        for day in window_days
+        if _day_timespan_id(day) in stored_rains
+    }
+    missing_days = [day for day in window_days if day not in daily_rains]
+    new_rains = {}
+    if missing_days:
+        daily_file_buffer = await data_file_repo.get_daily_file_buffer(
+            begin_date=missing_days[0]
+        )
+        fetched_rains = await _run_blocking(
+            _read_daily_data, daily_file_buffer, strict_validation
+        )
+        if any(
+            day not in daily_rains and day not in fetched_rains for day in days_to_add
+        ):
+            raise MissingDailyData
+        new_rains = {
+            day: fetched_rains[day] for day in missing_days if day in fetched_rains
+        }
+        daily_rains |= new_rains
+    derived_rains = await _run_blocking(
+        _compute_daily_derived_rains, daily_rains, days_to_add
+    )
+
+    previous_days = [day for day in new_rains if day < begin_date]
+    await key_value_db_repo.post(
+        RainBatch.concat(
+            [
+                RainBatch.from_columns(
+                    [_day_timespan_id(day) for day in previous_days],
+                    [new_rains[day] for day in previous_days],
+                ),
+                derived_rains,
+            ]
+        )
+    )
+
+
+@asynccontextmanager
+async def _claim(
+    key_value_db_repo: KeyValueDbProtocol,
+    keys: list[TimespanId],
+    exception: type[Exception],
+    release_on_success: bool = False,
+) -> AsyncGenerator[None]:
+    """
+    Claim keys for the time of computing their data, released back if it fails.
 
-    this_day_rain = current_data_df.filter(pl.col("date") == this_day)[
-        "rainfall_mm"
-    ].first()
-    last_31_days_rain = current_data_df["rainfall_mm"].sum()
-    current_month_beg = date(this_day.year, this_day.month, 1)
-    this_month_rain = current_data_df.filter(pl.col("date") >= current_month_beg)[
-        "rainfall_mm"
-    ].sum()
-    return this_day_rain, this_month_rain, last_31_days_rain
+    Claims are leased by the backend, so that keys of a run killed before releasing
+    them can be claimed again once the lease expired.
+
+    Args :
+    - key_value_db_repo : cache db backend repository
+    - keys, list[TimespanId] : keys to claim
+    - exception, type[Exception] : exception raised if keys are already claimed
+    - release_on_success, bool : also release keys once data is computed, when
+      stored data itself guards against computing it again
+    Yields :
+    - None
+    """
+    if not await key_value_db_repo.claim(keys):
+        raise exception
+    try:
+        yield
+    except BaseException:
+        await key_value_db_repo.release(keys)
+        raise
+    if release_on_success:
+        await key_value_db_repo.release(keys)
 
 
 async def fetch_daily_data_if_not_in_cache(
     key_value_db_repo: KeyValueDbProtocol,
     data_file_repo: DataFileProtocol,
     last_data_day: date,
+    strict_validation: bool = False,
 ) -> None:
     """
     Checks if data for last_day is in cache, and if not, fetch it and store it.
 
+    Last day key is claimed before any fetch, so that concurrent calls fail fast.
+
+    Daily rains are stored per day : only days of the last 31 days window missing
+    from cache are fetched, from the first missing one on. Since month beginning and
+    last 31 days rains are then summed from stored and fetched daily rains.
+
     Args :
     - key_value_db_repo : cache db backend repository
     - data_file_repo : download data backend repository
     - last_data_day, date : last known date to check data for
+    - strict_validation, bool : also validate data file with pandera, besides native
+      validation
     Returns :
     - None
     """
-    last_day_tsid: TimespanId = (
-        f"{last_data_day.strftime('%Y%m%d')}-{last_data_day.strftime('%Y%m%d')}"
-    )
+    # If daily data not in cache, claim it up front and compute it, stored day key
+    # then guards against adding it again
+    async with _claim(
+        key_value_db_repo,
+        [_day_timespan_id(last_data_day)],
+        AlreadyAddedData,
+        release_on_success=True,
+    ):
+        await _add_daily_data(
+            key_value_db_repo,
+            data_file_repo,
+            last_data_day,
+            last_data_day,
+            strict_validation,
+        )
 
-    # If daily data not in cache, compute it
-    if await key_value_db_repo.has(last_day_tsid):
-        raise AlreadyAddedData
 
-    month_beg = date(last_data_day.year, last_data_day.month, 1)
-    prev_30_days = last_data_day - timedelta(days=30)
-    async with data_file_repo.get_daily_file_path(
-        begin_date=prev_30_days
-    ) as daily_file_path:
-        (
-            last_day_rain_mm,
-            since_month_beg_mm,
-            last_31_days_mm,
-        ) = await _compute_daily_data(daily_file_path, last_data_day)
-    since_month_beg_tsid: TimespanId = (
-        f"{month_beg.strftime('%Y%m%d')}-{last_data_day.strftime('%Y%m%d')}"
-    )
-    last_31_days_tsid: TimespanId = (
-        f"{prev_30_days.strftime('%Y%m%d')}-{last_data_day.strftime('%Y%m%d')}"
+# Daily data files hold no day before CurrentFileSchema lower bound, and the last 31
+# days rain of a day is summed over the 30 days before it too
+MIN_BACKFILL_DAY = datetime.strptime(
+    str(CurrentFileSchema.columns["date"].min_value), "%Y%m%d"
+).date() + timedelta(days=30)
+
+
+async def backfill_daily_data(
+    key_value_db_repo: KeyValueDbProtocol,
+    data_file_repo: DataFileProtocol,
+    begin_date: date,
+    last_data_day: date,
+    strict_validation: bool = False,
+    max_days: int = 366,
+) -> None:
+    """
+    Add data of all days missing from cache between begin_date and last_data_day.
+
+    Whole gap is fetched in a single daily data command, and day, since month
+    beginning and last 31 days rains of every missing day are stored in one write.
+
+    Args :
+    - key_value_db_repo : cache db backend repository
+    - data_file_repo : download data backend repository
+    - begin_date, date : first day to backfill
+    - last_data_day, date : last known date to backfill
+    - strict_validation, bool : also validate data file with pandera, besides native
+      validation
+    - max_days, int : maximum number of days to backfill at once
+    Returns :
+    - None
+    Raises :
+    - InvalidTimespan : if begin_date is after last_data_day, before
+      MIN_BACKFILL_DAY, or more than max_days before last_data_day
+    - AlreadyAddedData : if no day of period is missing from cache
+    """
+    if (
+        begin_date > last_data_day
+        or begin_date < MIN_BACKFILL_DAY
+        or (last_data_day - begin_date).days >= max_days
+    ):
+        raise InvalidTimespan
+    await _add_daily_data(
+        key_value_db_repo, data_file_repo, begin_date, last_data_day, strict_validation
     )
-    await key_value_db_repo.post(
-        [
-            RainStore(timespan_id=last_day_tsid, rain_mm=last_day_rain_mm),
-            RainStore(timespan_id=since_month_beg_tsid, rain_mm=since_month_beg_mm),
-            RainStore(timespan_id=last_31_days_tsid, rain_mm=last_31_days_mm),
-        ]
+
+
+def _scan_bulk_file(file_path: Path) -> pl.LazyFrame:
+    """
+    Lazily scan bulk data file, with station_id, date and rainfall_mm columns.
+
+    Args :
+    - file_path, Path : path of either raw CSV bulk file (possibly gzipped) or its
+      Arrow IPC cached version (".arrow" suffix), which is memory mapped
+    Returns :
+    - pl.LazyFrame : bulk data scan
+    """
+    if file_path.suffix == ".arrow":
+        return pl.scan_ipc(file_path, memory_map=True)
+    return pl.scan_csv(
+        file_path,
+        has_header=True,
+        separator=";",
+        schema_overrides={
+            "NUM_POSTE": pl.Int64,
+            "AAAAMMJJ": pl.Int64,
+            "RR": pl.Float64,
+        },
+    ).select(
+        pl.col("NUM_POSTE").alias("station_id"),
+        pl.col("AAAAMMJJ").alias("date"),
+        pl.col("RR").alias("rainfall_mm"),
     )
 
 
-async def _preprocess_bulk_data(
-    df: pl.DataFrame, begin_date: date, end_date: date
+def _scan_bulk_data(
+    file_path: Path,
+    begin_date: date,
+    end_date: date,
+    station_ids: list[int] | None = None,
 ) -> pl.DataFrame:
     """
-    Preprocess raw bulk data file. Bit of filtering and renaming.
+    Read bulk data file, keeping only selected station_ids and dates rows.
+
+    File is scanned lazily : station and date filters are pushed down to the file
+    reader and collected in streaming mode, so that rows of other stations or years
+    are never materialized. This only holds for plain CSV files : a gzipped one is
+    inflated whole in memory before being scanned.
 
     Args :
-    - df, pl.DataFrame : bulk data df
+    - file_path, Path : path to read CSV bulk file (possibly gzipped) or its Arrow
+      IPC cached version
     - begin_date, date : date to keep measurements from
     - end_date, date : date to keep measurements until
+    - station_ids, list[int] | None : stations to keep, all of them if None
     Returns :
-    - pl.DataFrame : for selected station_id only and between begin and end dates
+    - pl.DataFrame : raw bulk data for selected station_ids and dates
     """
-    prep_df = (
-        df.select(
-            pl.col("station_id"),
-            pl.col("date").cast(pl.String).str.strptime(pl.Date, format="%Y%m%d"),
-            pl.col("rainfall_mm"),
-        )
-        .filter(
-            pl.col("station_id") == STATION_ID,
-            pl.col("date").is_between(begin_date, end_date),
-        )
-        .select(
-            pl.col("date"),
-            pl.col("rainfall_mm"),
-            pl.col("date").dt.month().alias("month"),
-            pl.col("date").dt.day().alias("day"),
+    filters = [
+        pl.col("date").is_between(
+            int(begin_date.strftime("%Y%m%d")), int(end_date.strftime("%Y%m%d"))
         )
+    ]
+    if station_ids is not None:
+        filters.append(pl.col("station_id").is_in(station_ids))
+    return _scan_bulk_file(file_path).filter(*filters).collect(engine="streaming")
+
+
+def _cache_bulk_file(file_path: Path, cache_path: Path) -> None:
+    """
+    Convert whole bulk CSV file to an Arrow IPC file, streaming rows through.
+
+    Cache file is written under a temporary name first, so that a failed conversion
+    never leaves a partial cache file behind.
+
+    Args :
+    - file_path, Path : path of raw CSV bulk file (possibly gzipped)
+    - cache_path, Path : path to write Arrow IPC file to
+    Returns :
+    - None
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_cache_path = cache_path.with_suffix(".tmp")
+    _scan_bulk_file(file_path).sink_ipc(tmp_cache_path)
+    tmp_cache_path.replace(cache_path)
+
+
+@asynccontextmanager
+async def _get_bulk_data_path(
+    data_file_repo: DataFileProtocol, department: str | None, cache_dir: Path | None
+) -> AsyncGenerator[Path]:
+    """
+    Get bulk data of a department and yield its path, from local cache if possible.
+
+    Cache files are keyed by bulk file version (source URL and ETag or Last-Modified),
+    so that a new version of the file is downloaded again.
+
+    Args :
+    - data_file_repo : download data backend repository
+    - department, str | None : department to get bulk data of, default one if None
+    - cache_dir, Path | None : directory of cached bulk data, no cache if None
+    Yields :
+    - Path : path of raw bulk file or of its Arrow IPC cached version
+    """
+    version = None
+    if cache_dir is not None:
+        version = await data_file_repo.get_bulk_file_version(department)
+    if version is None:
+        async with data_file_repo.get_bulk_file_path(department) as bulk_file_path:
+            yield bulk_file_path
+        return
+
+    cache_path = cache_dir / f"{sha256(version.encode()).hexdigest()}.arrow"
+    if not cache_path.exists():
+        async with data_file_repo.get_bulk_file_path(department) as bulk_file_path:
+            await _run_blocking(_cache_bulk_file, bulk_file_path, cache_path)
+    yield cache_path
+
+
+def _preprocess_bulk_data(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Preprocess raw bulk data file. Bit of parsing and renaming.
+
+    Args :
+    - df, pl.DataFrame : bulk data df, already filtered on stations and dates
+    Returns :
+    - pl.DataFrame : with parsed dates, and month and day of each measurement
+    """
+    prep_df = df.select(
+        pl.col("station_id"),
+        pl.col("date").cast(pl.String).str.strptime(pl.Date, format="%Y%m%d"),
+        pl.col("rainfall_mm"),
+    ).with_columns(
+        pl.col("date").dt.month().alias("month"),
+        pl.col("date").dt.day().alias("day"),
     )
     return prep_df
 
 
-async def _get_mean_data_between_two_mon_day_dates(
-    df: pl.DataFrame,
-    beg_mon: int,
-    beg_day: int,
-    end_mon: int,
-    end_day: int,
-    number_of_years: int,
-) -> float:
+def _compute_climatology_indexes(df: pl.DataFrame) -> list[ClimatologyIndex]:
     """
-    Compute mean cumulated rain data on df between two dates.
+    Compute cumulated rain by calendar day, summed over every year of df, per station.
 
-    Dates are in month and day only as we average it on multiple years.
+    All stations are aggregated in a single grouped pass. Calendar days are laid out
+    on a leap year so that February 29th has its own slot. Rains are summed as
+    integer tenths of mm so that subtracting two cumulated values gives back an exact
+    period sum.
 
     Args :
-    - df, pl.DataFrame : df with data to average
-    - beg_mon, int : month of period to begin average
-    - beg_day, int : day of period to begin average
-    - end_mon, int : month of period to end average
-    - end_day, int : day of period to end average
-    - number_of_years, int : number of years of data in df
+    - df, pl.DataFrame : preprocessed df with station_id, date, rainfall_mm, month
+      and day columns
     Returns :
-    - float : Mean rainfall on considered period, at tenth of mm
+    - list[ClimatologyIndex] : for each station (ordered by station_id), index with
+      367 cumulated rain tenths, i-th value being the rain fallen before i-th
+      calendar day (first value is 0, last one is the whole year rain)
     """
-    year_offset = 1 if (beg_mon, beg_day) > (end_mon, end_day) else 0
-    date_beg = date(2020, beg_mon, beg_day)
-    date_end = date(2020 + year_offset, end_mon, end_day)
-    date_df = (
-        pl.date_range(date_beg, date_end, "1d", eager=True)
+    calendar_df = (
+        pl.date_range(
+            date(CALENDAR_YEAR, 1, 1), date(CALENDAR_YEAR, 12, 31), "1d", eager=True
+        )
         .alias("date")
         .to_frame()
         .select(
@@ -221,80 +613,268 @@ async def _get_mean_data_between_two_mon_day_dates(
             pl.col("date").dt.day().alias("day"),
         )
     )
-    joined_df = df.join(date_df, on=["month", "day"], how="inner")
-    return round(joined_df["rainfall_mm"].sum() / number_of_years, 1)
+    stations_df = (
+        df.group_by("station_id")
+        .agg(
+            (1 + pl.col("date").max().dt.year() - pl.col("date").min().dt.year())
+            .cast(pl.Int64)
+            .alias("number_of_years")
+        )
+        .sort("station_id")
+    )
+    day_sums_df = df.group_by("station_id", "month", "day").agg(
+        (pl.col("rainfall_mm").fill_null(0) * 10)
+        .round(0)
+        .cast(pl.Int64)
+        .sum()
+        .alias("rain_tenths")
+    )
+    indexes_df = (
+        stations_df.join(calendar_df, how="cross", maintain_order="left_right")
+        .join(
+            day_sums_df,
+            on=["station_id", "month", "day"],
+            how="left",
+            maintain_order="left",
+        )
+        .group_by("station_id", "number_of_years", maintain_order=True)
+        .agg(pl.col("rain_tenths").fill_null(0).cum_sum())
+        .select(
+            pl.col("station_id"),
+            pl.col("number_of_years"),
+            pl.concat_list(pl.lit(0, dtype=pl.Int64), pl.col("rain_tenths")).alias(
+                "cumulated_rain_tenths"
+            ),
+        )
+    )
+    return [
+        ClimatologyIndex(
+            station_id=station_id,
+            number_of_years=number_of_years,
+            cumulated_rain_tenths=cumulated_rain_tenths,
+        )
+        for station_id, number_of_years, cumulated_rain_tenths in indexes_df.iter_rows()
+    ]
+
+
+def _calendar_index(col: pl.Expr) -> pl.Expr:
+    """
+    Get calendar day index (0 for January 1st, 365 for December 31st) of a date.
+
+    Dates outside of calendar year wrap around, so that December 2nd of previous
+    year gets the same index as December 2nd of calendar year.
+    """
+    return (col - date(CALENDAR_YEAR, 1, 1)).dt.total_days() % DAYS_IN_CALENDAR
 
 
-async def _compute_history_means(
-    df: pl.DataFrame, this_day: date, number_of_years: int
-) -> tuple[float, float]:
+def _compute_history_means(
+    indexes: list[ClimatologyIndex],
+) -> RainBatch:
     """
-    Compute history averages since beginning of month and last 31 days.
+    Compute history averages since beginning of month and last 31 days, for every day.
 
-    This works with dataframes with complete year data, otherwise there can
+    All periods of all stations are computed at once from calendar cumulated sums :
+    a period sum is the difference of two cumulated values, plus the whole year rain
+    if the period wraps over new year. Leap years add a 32 days period ending in
+    March, as "30 previous days" rolling period then includes February 29th.
+
+    This works with indexes built on complete year data, otherwise there can
     be some side effects for periods between years.
 
     Args :
-    - df, pl.DataFrame: df with data to average
-    - this_day, date : end day for both periods
-    - number_of_years, int : number of years in df
+    - indexes, list[ClimatologyIndex] : calendar cumulated sums to average, one per
+      station
     Returns :
-    - float : average on beg_month-this_day period
-    - float : average on prev_30_days-this_day period
+    - RainBatch : for each station and calendar day, average on
+      beg_month-this_day period, on prev_30_days-this_day period and in leap year
+      case on prev_31_days-this_day period. Timespans are namespaced by station.
     """
-    mean_month_beg_tsid: TimespanId = (
-        f"M{this_day.strftime('%m')}01-M{this_day.strftime('%m%d')}"
-    )
-    prev_30_days = this_day - timedelta(days=30)
-    mean_30_days_tsid: TimespanId = (
-        f"M{prev_30_days.strftime('%m%d')}-M{this_day.strftime('%m%d')}"
-    )
-    means = [
-        RainStore(
-            timespan_id=mean_month_beg_tsid,
-            rain_mm=await _get_mean_data_between_two_mon_day_dates(
-                df, this_day.month, 1, this_day.month, this_day.day, number_of_years
-            ),
-        ),
-        RainStore(
-            timespan_id=mean_30_days_tsid,
-            rain_mm=await _get_mean_data_between_two_mon_day_dates(
-                df,
-                prev_30_days.month,
-                prev_30_days.day,
-                this_day.month,
-                this_day.day,
-                number_of_years,
-            ),
-        ),
-    ]
-
-    # Handle leap year case messing "30 previous days" rolling period
-    this_year = this_day.year
-    if (
-        (this_year % 4 == 0 and this_year % 100 != 0) or (this_year % 400 == 0)
-    ) and (  # leap year
-        prev_30_days <= date(this_year, 2, 29) < this_day
-    ):
-        prev_31_days = prev_30_days - timedelta(days=1)
-        mean_31_days_tsid: TimespanId = (
-            f"M{prev_31_days.strftime('%m%d')}-M{this_day.strftime('%m%d')}"
+    feb_29 = date(CALENDAR_YEAR, 2, 29)
+    days_df = (
+        pl.date_range(
+            date(CALENDAR_YEAR, 1, 1), date(CALENDAR_YEAR, 12, 31), "1d", eager=True
         )
-        means.append(
-            RainStore(
-                timespan_id=mean_31_days_tsid,
-                rain_mm=await _get_mean_data_between_two_mon_day_dates(
-                    df,
-                    prev_31_days.month,
-                    prev_31_days.day,
-                    this_day.month,
-                    this_day.day,
-                    number_of_years,
+        .alias("end")
+        .to_frame()
+    )
+    periods_df = (
+        pl.concat(
+            [
+                days_df.select(
+                    pl.lit(0).alias("rank"),
+                    pl.col("end").dt.month_start().alias("beg"),
+                    pl.col("end"),
                 ),
-            )
+                days_df.select(
+                    pl.lit(1).alias("rank"),
+                    pl.col("end").dt.offset_by("-30d").alias("beg"),
+                    pl.col("end"),
+                ),
+                days_df.filter(
+                    pl.col("end").dt.offset_by("-30d") <= feb_29,
+                    pl.col("end") > feb_29,
+                ).select(
+                    pl.lit(2).alias("rank"),
+                    pl.col("end").dt.offset_by("-31d").alias("beg"),
+                    pl.col("end"),
+                ),
+            ]
+        )
+        .sort("end", "rank")
+        .with_columns(
+            pl.format(
+                "M{}-M{}",
+                pl.col("beg").dt.strftime("%m%d"),
+                pl.col("end").dt.strftime("%m%d"),
+            ).alias("timespan_id"),
+            _calendar_index(pl.col("beg")).alias("beg_idx"),
+            _calendar_index(pl.col("end")).alias("end_idx"),
         )
+    )
+    cumsums_df = pl.DataFrame(
+        {
+            "station_id": [index.station_id for index in indexes],
+            "number_of_years": [index.number_of_years for index in indexes],
+            "cumsum": [index.cumulated_rain_tenths for index in indexes],
+        },
+        schema={
+            "station_id": pl.Int64,
+            "number_of_years": pl.Int64,
+            "cumsum": pl.List(pl.Int64),
+        },
+    )
+    cumsum = pl.col("cumsum")
+    period_sum = (
+        cumsum.list.get(pl.col("end_idx") + 1)
+        - cumsum.list.get(pl.col("beg_idx"))
+        + (pl.col("beg_idx") > pl.col("end_idx")).cast(pl.Int64) * cumsum.list.last()
+    )
+    # Means are rounded to the tenth of mm with ties away from zero, in integer
+    # arithmetic, as _get_index_mean does, whatever Polars float rounding mode
+    years = pl.col("number_of_years")
+    means_df = cumsums_df.join(
+        periods_df, how="cross", maintain_order="left_right"
+    ).select(
+        pl.when(pl.col("station_id") == STATION_ID)
+        .then(pl.col("timespan_id"))
+        .otherwise(pl.format("{}#{}", pl.col("station_id"), pl.col("timespan_id")))
+        .alias("timespan_id"),
+        (((2 * period_sum + years) // (2 * years)) / 10).alias("rain_mm"),
+    )
+    return RainBatch(means_df)
+
+
+# Distinct from M0101-M0101 scalar mean key, that tables initialized before
+# climatology indexes already hold, so that indexes can be built over them
+INITIALIZATION_TSID: TimespanId = "INDEX#M0101-M0101"
+
+
+def _initialization_claim_key(station_ids: list[int] | None) -> TimespanId:
+    """
+    Get the single key claimed by an initialization run, whatever its stations count.
+
+    A run over a station list is keyed by a digest of its sorted stations, a run over
+    all stations by a dedicated key.
+    """
+    if station_ids is None:
+        return f"ALL#{INITIALIZATION_TSID}"
+    stations_digest = sha256(
+        ",".join(str(station_id) for station_id in sorted(station_ids)).encode()
+    ).hexdigest()[:16]
+    return f"STATIONS#{stations_digest}#{INITIALIZATION_TSID}"
+
+
+async def _get_initialized_stations(
+    key_value_db_repo: KeyValueDbProtocol, station_ids: list[int]
+) -> set[int]:
+    """
+    Get given stations whose climatology index is already stored.
 
-    return means
+    Args :
+    - key_value_db_repo : cache db backend repository
+    - station_ids, list[int] : stations to check
+    Returns :
+    - set[int] : stations already initialized
+    """
+    indexes = await asyncio.gather(
+        *(key_value_db_repo.get_index(station_id) for station_id in station_ids)
+    )
+    return {
+        station_id
+        for station_id, index in zip(station_ids, indexes)
+        if index is not None
+    }
+
+
+def _compute_bulk_file_indexes(
+    file_path: Path,
+    begin_date: date,
+    end_date: date,
+    station_ids: list[int] | None,
+    strict_validation: bool = False,
+) -> list[ClimatologyIndex]:
+    """
+    Read, validate and aggregate a bulk file into per station climatology indexes.
+
+    Args :
+    - file_path, Path : path to read CSV bulk file (possibly gzipped)
+    - begin_date, date : date to keep measurements from
+    - end_date, date : date to keep measurements until
+    - station_ids, list[int] | None : stations to keep, all of them if None
+    - strict_validation, bool : also validate data file with pandera, besides native
+      validation
+    Returns :
+    - list[ClimatologyIndex] : one index per bulk file station
+    """
+    bulk_file_df = _scan_bulk_data(file_path, begin_date, end_date, station_ids)
+    BulkFileSchema.raise_if_invalid(bulk_file_df, strict=strict_validation)
+    prep_df = _preprocess_bulk_data(bulk_file_df)
+    return _compute_climatology_indexes(prep_df)
+
+
+async def _compute_department_indexes(
+    data_file_repo: DataFileProtocol,
+    department: str | None,
+    begin_date: date,
+    end_date: date,
+    station_ids: list[int] | None,
+    semaphore: asyncio.Semaphore,
+    executor: Executor | None,
+    cache_dir: Path | None,
+    strict_validation: bool = False,
+) -> list[ClimatologyIndex]:
+    """
+    Download a department bulk file and compute its stations climatology indexes.
+
+    Args :
+    - data_file_repo : download data backend repository
+    - department, str | None : department to download bulk file of, default one
+      if None
+    - begin_date, date : date to keep measurements from
+    - end_date, date : date to keep measurements until
+    - station_ids, list[int] | None : stations to keep, all of them if None
+    - semaphore, asyncio.Semaphore : bounds the number of departments in flight
+    - executor, Executor | None : pool to parse and aggregate file in,
+      compute_executor if None
+    - cache_dir, Path | None : directory of cached bulk data, no cache if None
+    - strict_validation, bool : also validate bulk file with pandera, besides native
+      validation
+    Returns :
+    - list[ClimatologyIndex] : one index per department station
+    """
+    async with semaphore:
+        async with _get_bulk_data_path(
+            data_file_repo, department, cache_dir
+        ) as bulk_file_path:
+            return await _run_blocking(
+                _compute_bulk_file_indexes,
+                bulk_file_path,
+                begin_date,
+                end_date,
+                station_ids,
+                strict_validation,
+                executor=executor,
+            )
 
 
 async def initialize_mean_data(
@@ -302,47 +882,169 @@ async def initialize_mean_data(
     data_file_repo: DataFileProtocol,
     year_beg_incl: int,
     year_end_incl: int,
+    station_ids: list[int] | None = None,
+    departments: list[str] | None = None,
+    max_concurrency: int = 1,
+    process_workers: int = 0,
+    cache_dir: Path | None = None,
+    scalar_means: bool = False,
+    strict_validation: bool = False,
 ) -> None:
     """
-    Initialize mean data : fetch history file, compute means and store them.
+    Initialize mean data : fetch history files, compute means and store them.
+
+    Means of all selected stations are computed from a single bulk file download per
+    department, and stored as one climatology index item per station. Departments
+    are downloaded concurrently, at most max_concurrency at a time, and parsed out of
+    event loop, in a process or thread pool, so that downloads overlap with
+    computations and requests keep being served.
+    Keys are namespaced per station, except for reference station ones. A single key
+    of the run is claimed before any download so that concurrent initializations fail
+    fast, then selected stations are checked not to be initialized yet. A run over
+    all stations skips the already initialized ones instead.
 
     Args :
     - key_value_db_repo : cache db backend repository
     - data_file_repo : download data backend repository
     - year_beg_incl, int : year to begin averaging data from (included)
     - year_end_incl, int : year to end averaging data until (INCLUDED)
+    - station_ids, list[int] | None : stations to compute means for, duplicates
+      ignored, all bulk files stations if None
+    - departments, list[str] | None : departments to fetch bulk files of, default
+      bulk file only if None
+    - max_concurrency, int : maximum number of departments processed at once
+    - process_workers, int : number of worker processes to parse bulk files, 0 to
+      parse them in compute_executor threads
+    - cache_dir, Path | None : directory to cache parsed bulk files in as Arrow IPC,
+      no cache if None
+    - scalar_means, bool : also store means of every day as separate items, besides
+      each station climatology index item
+    - strict_validation, bool : also validate bulk files with pandera, besides native
+      validation
     Returns :
     - none
+    Raises :
+    - AlreadyInitialized : if another run holds the claim, if any given station is
+      already initialized, or if all bulk files stations are
     """
-    beginning_tsid: TimespanId = "M0101-M0101"
-    if await key_value_db_repo.has(beginning_tsid):
-        raise AlreadyInitialized
+    if station_ids is not None:
+        station_ids = list(dict.fromkeys(station_ids))
+    claim_keys = [_initialization_claim_key(station_ids)]
+    async with _claim(key_value_db_repo, claim_keys, AlreadyInitialized):
+        if station_ids is not None and await _get_initialized_stations(
+            key_value_db_repo, station_ids
+        ):
+            raise AlreadyInitialized
+        begin_date = date(year_beg_incl, 1, 1)
+        end_date = date(year_end_incl, 12, 31)
+        semaphore = asyncio.Semaphore(max_concurrency)
 
-    begin_date = date(year_beg_incl, 1, 1)
-    end_date = date(year_end_incl, 12, 31)
+        with (
+            ProcessPoolExecutor(
+                max_workers=process_workers, mp_context=get_context("spawn")
+            )
+            if process_workers > 0
+            else nullcontext()
+        ) as executor:
+            departments_indexes = await asyncio.gather(
+                *(
+                    _compute_department_indexes(
+                        data_file_repo,
+                        department,
+                        begin_date,
+                        end_date,
+                        station_ids,
+                        semaphore,
+                        executor,
+                        cache_dir,
+                        strict_validation,
+                    )
+                    for department in (departments or [None])
+                )
+            )
+        indexes = [index for indexes in departments_indexes for index in indexes]
 
-    async with data_file_repo.get_bulk_file_path() as bulk_file_path:
-        bulk_file_df = pl.read_csv(
-            bulk_file_path,
-            has_header=True,
-            columns=["NUM_POSTE", "AAAAMMJJ", "RR"],
-            new_columns=["station_id", "date", "rainfall_mm"],
-            separator=";",
+        if station_ids is None:
+            # Stations are only known once bulk files are read : already initialized
+            # ones are skipped, so that a run adds stations new to bulk files
+            initialized_stations = await _get_initialized_stations(
+                key_value_db_repo, [index.station_id for index in indexes]
+            )
+            indexes = [
+                index
+                for index in indexes
+                if index.station_id not in initialized_stations
+            ]
+            if not indexes:
+                raise AlreadyInitialized
+        if scalar_means:
+            rain_means = await _run_blocking(_compute_history_means, indexes)
+            await key_value_db_repo.post(rains=rain_means)
+        await asyncio.gather(
+            *(key_value_db_repo.post_index(index) for index in indexes)
         )
-    BulkFileSchema.validate(bulk_file_df)
-    prep_df = await _preprocess_bulk_data(bulk_file_df, begin_date, end_date)
 
-    rain_means: list[RainStore] = []
-    number_of_years = 1 + (prep_df["date"].max().year - prep_df["date"].min().year)
 
-    for day in pl.date_range(
-        date(2000, 1, 1), date(2000, 12, 31), "1d", eager=True
-    ).to_list():
-        day_means = await _compute_history_means(prep_df, day, number_of_years)
-        rain_means.extend(deepcopy(day_means))  # need deepcopy because of pydantic obj
+def _calendar_day(day: date) -> date:
+    """Get calendar day of given day, i.e. same month and day in CALENDAR_YEAR."""
+    return date(CALENDAR_YEAR, day.month, day.day)
 
-    await key_value_db_repo.post(rains=rain_means)
+
+def _get_index_mean(index: ClimatologyIndex, beg: date, end: date) -> Decimal:
+    """
+    Compute mean cumulated rain between two calendar days from a climatology index.
+
+    Args :
+    - index, ClimatologyIndex : calendar cumulated sums to average
+    - beg, date : calendar day to begin average (included)
+    - end, date : calendar day to end average (included), before beg if period wraps
+      over new year
+    Returns :
+    - Decimal : Mean rainfall on considered period, at tenth of mm
+    """
+    cumsum = index.cumulated_rain_tenths
+    beg_idx = (beg - date(CALENDAR_YEAR, 1, 1)).days
+    end_idx = (end - date(CALENDAR_YEAR, 1, 1)).days
+    period_sum = cumsum[end_idx + 1] - cumsum[beg_idx]
+    if beg_idx > end_idx:
+        period_sum += cumsum[-1]
+    return (Decimal(period_sum) / (10 * index.number_of_years)).quantize(
+        Decimal("0.1"), rounding=ROUND_HALF_UP
+    )
+
+
+async def get_mean_data(
+    key_value_db_repo: KeyValueDbProtocol, timespan_id: TimespanId
+) -> RainStore:
+    """
+    Get mean cumulated rain on any calendar period, from stored climatology index.
+
+    Args :
+    - key_value_db_repo : cache db backend repository
+    - timespan_id, TimespanId : mean period, as M%m%d-M%m%d
+    Returns :
+    - RainStore : mean rain on given period
+    """
+    try:
+        beg, end = (
+            datetime.strptime(f"{CALENDAR_YEAR}{tsid_date[1:]}", "%Y%m%d").date()
+            for tsid_date in timespan_id.split("-")
+        )
+    except ValueError as exc:
+        raise InvalidTimespan from exc
+
+    index = await key_value_db_repo.get_index(STATION_ID)
+    if index is None:
+        raise NotInitialized
+
+    return RainStore(timespan_id=timespan_id, rain_mm=_get_index_mean(index, beg, end))
 
 
 async def get_last_data_date(data_file_repo: DataFileProtocol) -> date:
     return await data_file_repo.get_last_data_date()
+
+
+async def get_next_data_datetime(
+    data_file_repo: DataFileProtocol, last_data_day: date
+) -> datetime:
+    return await data_file_repo.get_next_data_datetime(last_data_day)
@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import polars as pl
+
+from core.exceptions import InvalidDataFile
+
+
+@dataclass(frozen=True)
+class ColumnSchema:
+    dtype: type[pl.DataType]
+    nullable: bool = False
+    # Same type as dtype, so that column is compared without being cast
+    min_value: int | float | None = None
+    max_value: int | float | None = None
+    pattern: str | None = None  # regex string values must match
+
+    def range_check(self, name: str) -> tuple[str, pl.Expr] | None:
+        """Get name and failure expression of column range check, None if unbounded."""
+        column = pl.col(name)
+        if self.min_value is not None and self.max_value is not None:
+            return (
+                f"in_range({self.min_value}, {self.max_value})",
+                ~column.is_between(self.min_value, self.max_value),
+            )
+        if self.min_value is not None:
+            return (
+                f"greater_than_or_equal_to({self.min_value})",
+                column < self.min_value,
+            )
+        if self.max_value is not None:
+            return f"less_than_or_equal_to({self.max_value})", column > self.max_value
+        return None
+
+
+@dataclass(frozen=True)
+class Violation:
+    column: str
+    check: str
+    failure_count: int | None = None  # None for checks on frame schema, not on rows
+
+
+@dataclass
+class ValidationReport:
+    schema_name: str
+    row_count: int
+    violations: list[Violation] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.violations
+
+    def __str__(self) -> str:
+        failures = ", ".join(
+            f"{violation.column} {violation.check}"
+            + (
+                f" ({violation.failure_count} rows)"
+                if violation.failure_count is not None
+                else ""
+            )
+            for violation in self.violations
+        )
+        return f"{self.schema_name} of {self.row_count} rows: {failures or 'valid'}"
+
+
+@dataclass(frozen=True)
+class FrameSchema:
+    """
+    Columns constraints of a data file, checked natively with Polars.
+
+    Constraints are compiled once into failure counting expressions, all evaluated in
+    a single pass over the data. Same constraints can be checked by pandera too, in a
+    slower but stricter mode.
+    """
+
+    name: str
+    columns: dict[str, ColumnSchema]
+
+    @cached_property
+    def checks(self) -> list[pl.Expr]:
+        """Expressions counting failing rows of each check, aliased column:check."""
+        checks = []
+        for name, column in self.columns.items():
+            if not column.nullable:
+                checks.append(pl.col(name).null_count().alias(f"{name}:not_nullable"))
+            if (range_check := column.range_check(name)) is not None:
+                check_name, failure = range_check
+                checks.append(failure.sum().alias(f"{name}:{check_name}"))
+            if column.pattern is not None:
+                checks.append(
+                    (~pl.col(name).str.contains(column.pattern))
+                    .sum()
+                    .alias(f"{name}:str_matches({column.pattern})")
+                )
+        return checks
+
+    def validate(self, df: pl.DataFrame) -> ValidationReport:
+        """
+        Check df against schema, reporting every failing check.
+
+        Columns presence and dtypes are read from df schema, and rows are only checked
+        if they are right.
+
+        Args :
+        - df, pl.DataFrame : data to check
+        Returns :
+        - ValidationReport : failing checks, with their number of failing rows
+        """
+        report = ValidationReport(schema_name=self.name, row_count=df.height)
+        for name, column in self.columns.items():
+            if name not in df.schema:
+                report.violations.append(Violation(name, "column_in_dataframe"))
+            elif df.schema[name] != column.dtype:
+                report.violations.append(Violation(name, f"dtype('{column.dtype}')"))
+        if report.violations or not self.checks:
+            return report
+
+        failure_counts = df.select(self.checks).row(0, named=True)
+        for alias, failure_count in failure_counts.items():
+            if failure_count:
+                name, check = alias.split(":", 1)
+                report.violations.append(Violation(name, check, failure_count))
+        return report
+
+    def to_pandera(self):
+        """Get pandera equivalent of schema, importing pandera only when needed."""
+        import pandera.polars as pa
+
+        def pandera_checks(column: ColumnSchema) -> list[pa.Check]:
+            checks = []
+            if column.min_value is not None and column.max_value is not None:
+                checks.append(pa.Check.in_range(column.min_value, column.max_value))
+            elif column.min_value is not None:
+                checks.append(pa.Check.ge(column.min_value))
+            elif column.max_value is not None:
+                checks.append(pa.Check.le(column.max_value))
+            if column.pattern is not None:
+                checks.append(pa.Check.str_matches(column.pattern))
+            return checks
+
+        return pa.DataFrameSchema(
+            {
+                name: pa.Column(
+                    column.dtype,
+                    checks=pandera_checks(column),
+                    nullable=column.nullable,
+                )
+                for name, column in self.columns.items()
+            },
+            name=self.name,
+        )
+
+    def raise_if_invalid(self, df: pl.DataFrame, strict: bool = False) -> None:
+        """
+        Raise InvalidDataFile if df does not match schema.
+
+        Args :
+        - df, pl.DataFrame : data to check
+        - strict, bool : also check df with pandera
+        Returns :
+        - None
+        """
+        report = self.validate(df)
+        if not report.is_valid:
+            raise InvalidDataFile(report)
+        if strict:
+            self.to_pandera().validate(df)
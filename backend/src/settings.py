@@ -22,14 +22,48 @@ class Settings(BaseSettings):
     api_version: str = "0.1.0"
     year_beg_incl: int
     year_end_incl: int
+    station_ids: list[int] | None = [75114001]  # None for all bulk file stations
     backend_table_name: str = "rainfall"
     backend_table_key_name: str = "timestamp_id"
     backend_table_value_name: str = "rain_mm"
+    backend_table_document_name: str = "document"
+    backend_table_expires_at_name: str = "expires_at"  # DynamoDb TTL attribute
     mf_token_url: str = "https://portail-api.meteofrance.fr/token"
     mf_climate_app_id: str
     mf_climate_app_url: str = "https://public-api.meteofrance.fr/public/DPClim/v1"
+    mf_token_refresh_margin: float = 300
+    mf_poll_first_delay: float = 1
+    mf_poll_base_delay: float = 0.5
+    mf_poll_max_delay: float = 8
+    mf_poll_timeout: float = 120
+    mf_request_timeout: float = 30
     dgf_historical_data_url: str = "https://object.files.data.gouv.fr/meteofrance/data/synchro_ftp/BASE/QUOT/Q_75_previous-1950-2023_RR-T-Vent.csv.gz"  # noqa
+    dgf_historical_data_url_template: str = "https://object.files.data.gouv.fr/meteofrance/data/synchro_ftp/BASE/QUOT/Q_{department}_previous-1950-2023_RR-T-Vent.csv.gz"  # noqa
+    dgf_download_chunk_size: int = 1024 * 1024
+    departments: list[str] | None = None  # None for dgf_historical_data_url only
+    ingestion_concurrency: int = 4
+    ingestion_process_workers: int = 0  # 0 to parse bulk files in app process
+    strict_validation: bool = False  # True to also validate data files with pandera
+    compute_thread_workers: int = 0  # 0 to compute in event loop default thread pool
+    history_cache_dir: str | None = None  # None to disable bulk files local cache
+    store_scalar_means: bool = False  # True to also store means as one item per day
+    sqlite_db_path: str | None = None  # None to use DynamoDb as key value db
+    key_value_cache_size: int = 4096  # 0 to disable key value db in-process cache
+    daily_cache_ttl: float = 3600
+    backfill_max_days: int = 366
+    claim_lease_time: float = 900  # claims of crashed runs can be taken over after it
+    http_max_connections: int = 100
+    http_max_connections_per_host: int = 10
+    http_dns_cache_ttl: int = 300
+    http_keepalive_timeout: float = 30
+    http_connect_timeout: float = 10
+    http_sock_read_timeout: float = 60
     aws_endpoint: str | None = None
+    aws_max_pool_connections: int = 10
+    aws_keepalive_timeout: float = 60
+    aws_batch_max_attempts: int = 8
+    aws_batch_write_concurrency: int = 8
+    aws_batch_retry_base_delay: float = 0.05
     fake_last_data_day: str | None = None
 
     @property
@@ -1,8 +1,22 @@
+import logging
+import time
+
 import pytest
+from aioboto3 import Session
 
 from backend.aws.dynamodb_service import (
+    DynamoDbPool,
+    UnprocessedItems,
+    claim_items,
+    delete_items,
+    get_aws_session,
+    get_document,
+    get_dynamodb_client,
+    get_dynamodb_pool,
+    get_dynamodb_resource,
     get_items,
     has_item,
+    write_document,
     write_items,
 )
 
@@ -30,15 +44,107 @@ async def test_get_items(event_loop, mocker, settings, dynamodb_client):
             },
         )
 
-    keys = ["key1", "key4"]
+    keys = ["key1", "key4", "key9"]
+    result = await get_items(dynamodb_client, keys)
+    assert result == {"key1": 1, "key4": 4}
+    await dynamodb_client.delete_table(TableName=settings.backend_table_name)
+
+
+@pytest.mark.anyio
+async def test_get_items_chunks(event_loop, mocker, settings, dynamodb_client):
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    await dynamodb_client.create_table(
+        TableName=settings.backend_table_name,
+        KeySchema=[
+            {"AttributeName": settings.backend_table_key_name, "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": settings.backend_table_key_name, "AttributeType": "S"},
+        ],
+        ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+    )
+    for k in range(0, 250, 10):
+        await dynamodb_client.put_item(
+            TableName=settings.backend_table_name,
+            Item={
+                settings.backend_table_key_name: {"S": f"key{k}"},
+                settings.backend_table_value_name: {"N": f"{k}"},
+            },
+        )
+    spy = mocker.spy(dynamodb_client, "batch_get_item")
+
+    keys = [f"key{k}" for k in range(250)] + ["key0"]
     result = await get_items(dynamodb_client, keys)
-    assert result == [1, 4]
+
+    assert result == {f"key{k}": k for k in range(0, 250, 10)}
+    assert spy.call_count == 3
     await dynamodb_client.delete_table(TableName=settings.backend_table_name)
 
 
+@pytest.mark.anyio
+async def test_get_items_unprocessed_keys(mocker, settings):
+    settings.aws_batch_retry_base_delay = 0
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    key_name = settings.backend_table_key_name
+    value_name = settings.backend_table_value_name
+    unprocessed = {settings.backend_table_name: {"Keys": [{key_name: {"S": "key2"}}]}}
+    ddb_client = mocker.Mock()
+    ddb_client.batch_get_item = mocker.AsyncMock(
+        side_effect=[
+            {
+                "Responses": {
+                    settings.backend_table_name: [
+                        {key_name: {"S": "key1"}, value_name: {"N": "1"}}
+                    ]
+                },
+                "UnprocessedKeys": unprocessed,
+            },
+            {
+                "Responses": {
+                    settings.backend_table_name: [
+                        {key_name: {"S": "key2"}, value_name: {"N": "2"}}
+                    ]
+                },
+                "UnprocessedKeys": {},
+            },
+        ]
+    )
+    result = await get_items(ddb_client, ["key1", "key2"])
+    assert result == {"key1": 1, "key2": 2}
+    assert ddb_client.batch_get_item.call_args.kwargs == {"RequestItems": unprocessed}
+
+
+@pytest.mark.anyio
+async def test_get_items_unprocessed_keys_after_all_attempts(mocker, settings):
+    settings.aws_batch_max_attempts = 3
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    unprocessed = {
+        settings.backend_table_name: {
+            "Keys": [{settings.backend_table_key_name: {"S": "key1"}}]
+        }
+    }
+    ddb_client = mocker.Mock()
+    ddb_client.batch_get_item = mocker.AsyncMock(
+        return_value={
+            "Responses": {settings.backend_table_name: []},
+            "UnprocessedKeys": unprocessed,
+        }
+    )
+    uniform_mock = mocker.patch(
+        "backend.aws.dynamodb_service.random.uniform", return_value=0
+    )
+    with pytest.raises(UnprocessedItems):
+        await get_items(ddb_client, ["key1"])
+    assert ddb_client.batch_get_item.call_count == 3
+    assert uniform_mock.call_args_list == [
+        mocker.call(0, settings.aws_batch_retry_base_delay),
+        mocker.call(0, settings.aws_batch_retry_base_delay * 2),
+    ]
+
+
 @pytest.mark.anyio
 async def test_write_items(
-    event_loop, mocker, settings, dynamodb_resource, dynamodb_client
+    event_loop, mocker, caplog, settings, dynamodb_resource, dynamodb_client
 ):
     mocker.patch("backend.aws.dynamodb_service.settings", settings)
     await dynamodb_resource.create_table(
@@ -51,15 +157,67 @@ async def test_write_items(
         ],
         ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
     )
-    items = {"key1": 1, "key2": 2}
-    await write_items(dynamodb_resource, items)
+    items = {f"key{k}": k / 10 for k in range(60)}
+    spy = mocker.spy(dynamodb_client, "batch_write_item")
+    with caplog.at_level(logging.INFO, logger="backend.aws.dynamodb_service"):
+        await write_items(dynamodb_client, items)
 
-    table = await dynamodb_resource.Table(settings.backend_table_name)
-    response = await table.get_item(Key={settings.backend_table_key_name: "key1"})
-    assert response["Item"][settings.backend_table_value_name] == 1
+    assert spy.call_count == 3
+    assert "60 items written" in caplog.text
+    result = await get_items(dynamodb_client, list(items))
+    assert result == items
     await dynamodb_client.delete_table(TableName=settings.backend_table_name)
 
 
+@pytest.mark.anyio
+async def test_write_items_unprocessed_items(mocker, settings):
+    settings.aws_batch_retry_base_delay = 0
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    unprocessed = {
+        settings.backend_table_name: [
+            {
+                "PutRequest": {
+                    "Item": {
+                        settings.backend_table_key_name: {"S": "key2"},
+                        settings.backend_table_value_name: {"N": "2.5"},
+                    }
+                }
+            }
+        ]
+    }
+    ddb_client = mocker.Mock()
+    ddb_client.batch_write_item = mocker.AsyncMock(
+        side_effect=[
+            {
+                "UnprocessedItems": unprocessed,
+                "ConsumedCapacity": [{"CapacityUnits": 1.0}],
+            },
+            {"UnprocessedItems": {}, "ConsumedCapacity": [{"CapacityUnits": 1.0}]},
+        ]
+    )
+    await write_items(ddb_client, {"key1": 1, "key2": 2.5})
+    batch_write_item = ddb_client.batch_write_item
+    assert batch_write_item.call_count == 2
+    assert batch_write_item.call_args.kwargs == {
+        "RequestItems": unprocessed,
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+
+
+@pytest.mark.anyio
+async def test_write_items_unprocessed_items_after_all_attempts(mocker, settings):
+    settings.aws_batch_retry_base_delay = 0
+    settings.aws_batch_max_attempts = 2
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    ddb_client = mocker.Mock()
+    ddb_client.batch_write_item = mocker.AsyncMock(
+        return_value={"UnprocessedItems": {settings.backend_table_name: [{}]}}
+    )
+    with pytest.raises(UnprocessedItems):
+        await write_items(ddb_client, {"key1": 1})
+    assert ddb_client.batch_write_item.call_count == 2
+
+
 @pytest.mark.anyio
 async def test_has_item(event_loop, mocker, settings, dynamodb_client):
     mocker.patch("backend.aws.dynamodb_service.settings", settings)
@@ -84,3 +242,172 @@ async def test_has_item(event_loop, mocker, settings, dynamodb_client):
     assert await has_item(dynamodb_client, "key1") is True
     assert await has_item(dynamodb_client, "key2") is False
     await dynamodb_client.delete_table(TableName=settings.backend_table_name)
+
+
+@pytest.mark.anyio
+async def test_claim_and_delete_items(event_loop, mocker, settings, dynamodb_client):
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    await dynamodb_client.create_table(
+        TableName=settings.backend_table_name,
+        KeySchema=[
+            {"AttributeName": settings.backend_table_key_name, "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": settings.backend_table_key_name, "AttributeType": "S"},
+        ],
+        ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+    )
+    await dynamodb_client.put_item(
+        TableName=settings.backend_table_name,
+        Item={
+            settings.backend_table_key_name: {"S": "key1"},
+            settings.backend_table_value_name: {"N": "1.0"},
+        },
+    )
+
+    assert await claim_items(dynamodb_client, {"key1": "CLAIM#key1"}) is False
+    assert await claim_items(dynamodb_client, {"key2": "CLAIM#key2"}) is True
+    assert await claim_items(dynamodb_client, {"key2": "CLAIM#key2"}) is False
+    assert (
+        await claim_items(dynamodb_client, {"key3": "CLAIM#key3", "key2": "CLAIM#key2"})
+        is False
+    )
+    assert await has_item(dynamodb_client, "CLAIM#key3") is False
+    await delete_items(dynamodb_client, ["CLAIM#key2"])
+    assert await has_item(dynamodb_client, "CLAIM#key2") is False
+    assert await claim_items(dynamodb_client, {"key2": "CLAIM#key2"}) is True
+    await dynamodb_client.delete_table(TableName=settings.backend_table_name)
+
+
+@pytest.mark.anyio
+async def test_claim_items_takes_over_expired_claims(
+    event_loop, mocker, settings, dynamodb_client
+):
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    await dynamodb_client.create_table(
+        TableName=settings.backend_table_name,
+        KeySchema=[
+            {"AttributeName": settings.backend_table_key_name, "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": settings.backend_table_key_name, "AttributeType": "S"},
+        ],
+        ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+    )
+
+    settings.claim_lease_time = -60
+    assert await claim_items(dynamodb_client, {"key1": "CLAIM#key1"}) is True
+    settings.claim_lease_time = 900
+    assert await claim_items(dynamodb_client, {"key1": "CLAIM#key1"}) is True
+    assert await claim_items(dynamodb_client, {"key1": "CLAIM#key1"}) is False
+    item = await dynamodb_client.get_item(
+        TableName=settings.backend_table_name,
+        Key={settings.backend_table_key_name: {"S": "CLAIM#key1"}},
+    )
+    assert float(item["Item"][settings.backend_table_expires_at_name]["N"]) > (
+        time.time()
+    )
+    await dynamodb_client.delete_table(TableName=settings.backend_table_name)
+
+
+@pytest.mark.anyio
+async def test_claim_items_over_transaction_limit(mocker):
+    ddb_client = mocker.Mock()
+    with pytest.raises(ValueError):
+        await claim_items(ddb_client, {f"key{i}": f"CLAIM#key{i}" for i in range(51)})
+    ddb_client.transact_write_items.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_get_document(event_loop, mocker, settings, dynamodb_client):
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    await dynamodb_client.create_table(
+        TableName=settings.backend_table_name,
+        KeySchema=[
+            {"AttributeName": settings.backend_table_key_name, "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": settings.backend_table_key_name, "AttributeType": "S"},
+        ],
+        ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+    )
+    await dynamodb_client.put_item(
+        TableName=settings.backend_table_name,
+        Item={
+            settings.backend_table_key_name: {"S": "key1"},
+            settings.backend_table_document_name: {"B": b"\x01\x02"},
+        },
+    )
+
+    assert await get_document(dynamodb_client, "key1") == b"\x01\x02"
+    assert await get_document(dynamodb_client, "key2") is None
+    await dynamodb_client.delete_table(TableName=settings.backend_table_name)
+
+
+@pytest.mark.anyio
+async def test_write_document(
+    event_loop, mocker, settings, dynamodb_resource, dynamodb_client
+):
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    await dynamodb_resource.create_table(
+        TableName=settings.backend_table_name,
+        KeySchema=[
+            {"AttributeName": settings.backend_table_key_name, "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": settings.backend_table_key_name, "AttributeType": "S"},
+        ],
+        ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+    )
+    await write_document(dynamodb_resource, "key1", b"\x01\x02")
+
+    table = await dynamodb_resource.Table(settings.backend_table_name)
+    response = await table.get_item(Key={settings.backend_table_key_name: "key1"})
+    assert response["Item"][settings.backend_table_document_name].value == b"\x01\x02"
+    await dynamodb_client.delete_table(TableName=settings.backend_table_name)
+
+
+@pytest.mark.anyio
+async def test_dynamodb_pool(event_loop, mocker, settings, dynamodb_server):
+    settings.aws_endpoint = dynamodb_server
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    ddb_pool = DynamoDbPool(
+        Session(
+            region_name="eu-central-1",
+            aws_secret_access_key="xxx",
+            aws_access_key_id="xxx",
+        )
+    )
+    await ddb_pool.open()
+    ddb_client, ddb_resource = ddb_pool.client, ddb_pool.resource
+    await ddb_pool.open()
+    assert ddb_pool.client is ddb_client and ddb_pool.resource is ddb_resource
+    assert ddb_client.meta.config.max_pool_connections == 10
+    assert "TableNames" in await ddb_client.list_tables()
+    await ddb_pool.close()
+    assert ddb_pool.client is None and ddb_pool.resource is None
+    await ddb_pool.close()
+    await ddb_pool.open()
+    assert ddb_pool.client is not ddb_client
+    await ddb_pool.close()
+
+
+@pytest.mark.anyio
+async def test_get_dynamodb_client_and_resource(mocker):
+    pool_mock = mocker.patch("backend.aws.dynamodb_service.get_dynamodb_pool")
+    pool_mock.return_value.open = mocker.AsyncMock()
+    assert await get_dynamodb_client() is pool_mock.return_value.client
+    assert await get_dynamodb_resource() is pool_mock.return_value.resource
+    assert pool_mock.return_value.open.await_count == 2
+
+
+def test_get_dynamodb_pool(mocker):
+    session_mock = mocker.patch("backend.aws.dynamodb_service.Session")
+    get_aws_session.cache_clear()
+    get_dynamodb_pool.cache_clear()
+    pool = get_dynamodb_pool()
+    assert get_dynamodb_pool() is pool
+    assert pool.session is session_mock.return_value
+    assert pool.client is None
+    get_aws_session.cache_clear()
+    get_dynamodb_pool.cache_clear()
@@ -1,40 +1,70 @@
 import pytest
-from aioboto3 import Session
 
 from backend.aws.key_value_db_repository import KeyValueDbRepository
-from core.entities import RainStore
+from backend.climatology_index import pack_index
+from core.entities import ClimatologyIndex, RainStore
 
 
-@pytest.fixture(scope="module")
-def key_value_db_repository(aws_session: Session) -> KeyValueDbRepository:
-    return KeyValueDbRepository(session=aws_session)
+@pytest.fixture
+def ddb_resource(mocker):
+    return mocker.Mock()
+
+
+@pytest.fixture
+def ddb_client(mocker):
+    return mocker.Mock()
+
+
+@pytest.fixture
+def key_value_db_repository(ddb_client, ddb_resource) -> KeyValueDbRepository:
+    return KeyValueDbRepository(ddb_client=ddb_client, ddb_resource=ddb_resource)
 
 
 @pytest.mark.anyio
-async def test_get(mocker, key_value_db_repository):
+async def test_get(mocker, ddb_client, ddb_resource, key_value_db_repository):
     input_keys = ["20250401-20250410", "M0401-M0410"]
-    mocked_values = [0, 10]
+    mocked_values = {"M0401-M0410": 10, "20250401-20250410": 0}
     get_mock = mocker.patch(
         "backend.aws.key_value_db_repository.get_items", return_value=mocked_values
     )
     result = await key_value_db_repository.get(input_keys)
     expected = {"20250401-20250410": 0, "M0401-M0410": 10}
     assert result == expected
-    get_mock.assert_called_once_with(ddb_client=mocker.ANY, keys=input_keys)
+    get_mock.assert_called_once_with(ddb_client=ddb_client, keys=input_keys)
 
 
 @pytest.mark.anyio
-async def test_has(mocker, key_value_db_repository):
+async def test_has(mocker, ddb_client, ddb_resource, key_value_db_repository):
     input_key = "20250401-20250410"
     has_mock = mocker.patch(
         "backend.aws.key_value_db_repository.has_item", return_value=True
     )
     assert await key_value_db_repository.has(key=input_key) is True
-    has_mock.assert_called_once_with(ddb_client=mocker.ANY, key=input_key)
+    has_mock.assert_called_once_with(ddb_client=ddb_client, key=input_key)
+
+
+@pytest.mark.anyio
+async def test_claim(mocker, ddb_client, key_value_db_repository):
+    claim_mock = mocker.patch(
+        "backend.aws.key_value_db_repository.claim_items", return_value=True
+    )
+    assert await key_value_db_repository.claim(["M0101-M0101"]) is True
+    claim_mock.assert_called_once_with(
+        ddb_client=ddb_client, claims={"M0101-M0101": "CLAIM#M0101-M0101"}
+    )
+
+
+@pytest.mark.anyio
+async def test_release(mocker, ddb_client, key_value_db_repository):
+    delete_mock = mocker.patch("backend.aws.key_value_db_repository.delete_items")
+    await key_value_db_repository.release(["M0101-M0101"])
+    delete_mock.assert_called_once_with(
+        ddb_client=ddb_client, keys=["CLAIM#M0101-M0101"]
+    )
 
 
 @pytest.mark.anyio
-async def test_post(mocker, key_value_db_repository):
+async def test_post(mocker, ddb_client, ddb_resource, key_value_db_repository):
     input_rains = [
         RainStore(timespan_id="20250401-20250410", rain_mm=0),
         RainStore(timespan_id="M0401-M0410", rain_mm=10),
@@ -42,5 +72,92 @@ async def test_post(mocker, key_value_db_repository):
     write_mock = mocker.patch("backend.aws.key_value_db_repository.write_items")
     await key_value_db_repository.post(input_rains)
     write_mock.assert_called_once_with(
-        ddb_resource=mocker.ANY, items={"20250401-20250410": 0, "M0401-M0410": 10}
+        ddb_client=ddb_client, items={"20250401-20250410": 0, "M0401-M0410": 10}
+    )
+
+
+@pytest.mark.anyio
+async def test_get_index(mocker, ddb_client, ddb_resource, key_value_db_repository):
+    index = ClimatologyIndex(
+        station_id=75114001, number_of_years=2, cumulated_rain_tenths=[0] * 367
+    )
+    get_mock = mocker.patch(
+        "backend.aws.key_value_db_repository.get_document",
+        return_value=pack_index(index),
+    )
+    assert await key_value_db_repository.get_index(75114001) == index
+    get_mock.assert_called_once_with(ddb_client=ddb_client, key="INDEX#75114001")
+
+
+@pytest.mark.anyio
+async def test_get_index_not_stored(
+    mocker, ddb_client, ddb_resource, key_value_db_repository
+):
+    mocker.patch("backend.aws.key_value_db_repository.get_document", return_value=None)
+    assert await key_value_db_repository.get_index(75114001) is None
+
+
+@pytest.mark.anyio
+async def test_post_index(mocker, ddb_client, ddb_resource, key_value_db_repository):
+    index = ClimatologyIndex(
+        station_id=75114001, number_of_years=2, cumulated_rain_tenths=[0] * 367
+    )
+    write_mock = mocker.patch("backend.aws.key_value_db_repository.write_document")
+    await key_value_db_repository.post_index(index)
+    write_mock.assert_called_once_with(
+        ddb_resource=ddb_resource,
+        key="INDEX#75114001",
+        document=pack_index(index),
+    )
+
+
+@pytest.fixture
+async def moto_key_value_db_repository(
+    mocker, settings, dynamodb_client, dynamodb_resource
+) -> KeyValueDbRepository:
+    mocker.patch("backend.aws.dynamodb_service.settings", settings)
+    await dynamodb_client.create_table(
+        TableName=settings.backend_table_name,
+        KeySchema=[
+            {"AttributeName": settings.backend_table_key_name, "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": settings.backend_table_key_name, "AttributeType": "S"},
+        ],
+        ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+    )
+    yield KeyValueDbRepository(
+        ddb_client=dynamodb_client, ddb_resource=dynamodb_resource
+    )
+    await dynamodb_client.delete_table(TableName=settings.backend_table_name)
+
+
+@pytest.mark.anyio
+async def test_round_trips(event_loop, moto_key_value_db_repository):
+    repo = moto_key_value_db_repository
+    await repo.post(
+        [
+            RainStore(timespan_id="20250401-20250410", rain_mm=0),
+            RainStore(timespan_id="M0401-M0410", rain_mm=10.5),
+        ]
+    )
+    assert await repo.get(["M0401-M0410", "20250401-20250410", "M0411-M0411"]) == {
+        "20250401-20250410": 0,
+        "M0401-M0410": 10.5,
+    }
+    assert await repo.has("M0401-M0410") is True
+    assert await repo.has("M0411-M0411") is False
+
+    assert await repo.claim(["20250411-20250411"]) is True
+    assert await repo.claim(["20250411-20250411"]) is False
+    await repo.release(["20250411-20250411"])
+    assert await repo.claim(["20250411-20250411"]) is True
+
+    index = ClimatologyIndex(
+        station_id=75114001,
+        number_of_years=2,
+        cumulated_rain_tenths=[10 * i for i in range(367)],
     )
+    assert await repo.get_index(75114001) is None
+    await repo.post_index(index)
+    assert await repo.get_index(75114001) == index
@@ -0,0 +1,149 @@
+from decimal import Decimal
+
+import pytest
+
+import backend.cache.key_value_db_repository as cache_module
+from backend.cache.key_value_db_repository import (
+    CacheStats,
+    KeyValueDbRepository,
+    clear_caches,
+)
+from core.entities import ClimatologyIndex, RainStore
+from core.protocol import KeyValueDbProtocol
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    clear_caches()
+    yield
+    clear_caches()
+
+
+@pytest.fixture
+def repo_mock(mock_module):
+    return mock_module("key_value_db", KeyValueDbProtocol)
+
+
+@pytest.fixture
+def index():
+    return ClimatologyIndex(
+        station_id=1, number_of_years=2, cumulated_rain_tenths=list(range(367))
+    )
+
+
+@pytest.mark.parametrize(
+    ("hits", "misses", "expected"), [(0, 0, 0.0), (3, 1, 0.75), (0, 2, 0.0)]
+)
+def test_cache_stats_hit_ratio(hits, misses, expected):
+    assert CacheStats(hits=hits, misses=misses).hit_ratio == expected
+
+
+@pytest.mark.anyio
+class TestKeyValueDbRepository:
+    async def test_get_reads_only_uncached_keys(self, repo_mock):
+        repo_mock.get.return_value = {"M0101-M0101": 1.0, "20250101-20250101": 2.0}
+        repo = KeyValueDbRepository(repo_mock)
+        first_result = await repo.get(["M0101-M0101", "20250101-20250101", "M0102"])
+        repo_mock.get.reset_mock(return_value=True)
+        repo_mock.get.return_value = {}
+        second_result = await repo.get(["M0101-M0101", "20250101-20250101"])
+        assert (
+            first_result
+            == second_result
+            == {
+                "M0101-M0101": 1.0,
+                "20250101-20250101": 2.0,
+            }
+        )
+        repo_mock.get.assert_not_awaited()
+        assert cache_module.cache_stats["climatology"].hits == 1
+        assert cache_module.cache_stats["climatology"].misses == 2
+        assert cache_module.cache_stats["daily"].hits == 1
+        assert cache_module.cache_stats["daily"].misses == 1
+
+    async def test_get_tiers(self, repo_mock):
+        repo_mock.get.return_value = {"1#M0101-M0101": 1.0, "20250101-20250101": 2.0}
+        await KeyValueDbRepository(repo_mock).get(
+            ["1#M0101-M0101", "20250101-20250101"]
+        )
+        assert dict(cache_module.climatology_cache) == {"1#M0101-M0101": 1.0}
+        assert dict(cache_module.daily_cache) == {"20250101-20250101": 2.0}
+
+    async def test_get_daily_expires(self, mocker, repo_mock):
+        mocker.patch.object(
+            cache_module,
+            "daily_cache",
+            cache_module.TTLCache(maxsize=10, ttl=0),
+        )
+        repo_mock.get.return_value = {"20250101-20250101": 2.0}
+        repo = KeyValueDbRepository(repo_mock)
+        await repo.get(["20250101-20250101"])
+        await repo.get(["20250101-20250101"])
+        assert repo_mock.get.await_count == 2
+
+    @pytest.mark.parametrize(
+        ("cached", "in_db", "expected"),
+        [(True, False, True), (False, True, True), (False, False, False)],
+    )
+    async def test_has(self, repo_mock, cached, in_db, expected):
+        if cached:
+            cache_module.daily_cache["20250101-20250101"] = 2.0
+        repo_mock.has.return_value = in_db
+        assert await KeyValueDbRepository(repo_mock).has("20250101-20250101") is (
+            expected
+        )
+
+    async def test_claim_and_release_pass_through(self, repo_mock):
+        repo_mock.claim.return_value = False
+        repo = KeyValueDbRepository(repo_mock)
+        assert await repo.claim(["20250101-20250101"]) is False
+        await repo.release(["20250101-20250101"])
+        repo_mock.claim.assert_awaited_once_with(["20250101-20250101"])
+        repo_mock.release.assert_awaited_once_with(["20250101-20250101"])
+
+    async def test_post_writes_through(self, repo_mock):
+        rains = [
+            RainStore(timespan_id="M0101-M0101", rain_mm=Decimal("1.5")),
+            RainStore(timespan_id="20250101-20250101", rain_mm=Decimal("2.0")),
+        ]
+        repo = KeyValueDbRepository(repo_mock)
+        await repo.post(rains)
+        repo_mock.post.assert_awaited_once()
+        assert repo_mock.post.await_args.args[0].to_dict() == {
+            "M0101-M0101": 1.5,
+            "20250101-20250101": 2.0,
+        }
+        assert await repo.get(["M0101-M0101", "20250101-20250101"]) == {
+            "M0101-M0101": 1.5,
+            "20250101-20250101": 2.0,
+        }
+        repo_mock.get.assert_not_awaited()
+
+    async def test_post_failure_is_not_cached(self, repo_mock):
+        repo_mock.post.side_effect = RuntimeError
+        with pytest.raises(RuntimeError):
+            await KeyValueDbRepository(repo_mock).post(
+                [RainStore(timespan_id="M0101-M0101", rain_mm=Decimal("1.5"))]
+            )
+        assert len(cache_module.climatology_cache) == 0
+
+    async def test_get_index_cached(self, repo_mock, index):
+        repo_mock.get_index.return_value = index
+        repo = KeyValueDbRepository(repo_mock)
+        assert await repo.get_index(1) == index
+        assert await repo.get_index(1) == index
+        repo_mock.get_index.assert_awaited_once_with(1)
+
+    async def test_get_index_missing_not_cached(self, repo_mock):
+        repo_mock.get_index.return_value = None
+        repo = KeyValueDbRepository(repo_mock)
+        assert await repo.get_index(1) is None
+        assert await repo.get_index(1) is None
+        assert repo_mock.get_index.await_count == 2
+
+    async def test_post_index_writes_through(self, repo_mock, index):
+        repo = KeyValueDbRepository(repo_mock)
+        await repo.post_index(index)
+        repo_mock.post_index.assert_awaited_once_with(index)
+        assert await repo.get_index(1) == index
+        repo_mock.get_index.assert_not_awaited()
@@ -2,20 +2,28 @@ import datetime as dt
 from unittest.mock import AsyncMock
 
 import pytest
+from fastapi import HTTPException
 
 from backend.meteofrance.data_file_repository import DataFileRepository
 
 
 @pytest.fixture
-async def data_file_repository(mocker, aiohttp_session) -> DataFileRepository:
-    mocker.patch(
-        "backend.meteofrance.data_file_repository.get_mf_access_token",
-        return_value=aiohttp_session,
+def token_manager_mock(mocker):
+    manager_mock = mocker.patch(
+        "backend.meteofrance.data_file_repository.mf_token_manager"
     )
+    manager_mock.get_token = AsyncMock(return_value="id1234")
+    manager_mock.refresh = AsyncMock(return_value="id5678")
+    return manager_mock
+
+
+@pytest.fixture
+async def data_file_repository(
+    mocker, aiohttp_session, token_manager_mock
+) -> DataFileRepository:
     mocker.patch(
-        "backend.meteofrance.data_file_repository.get_mf_access_token",
-        return_value="id1234",
-        new_callable=AsyncMock,
+        "backend.meteofrance.data_file_repository.get_client_session",
+        return_value=aiohttp_session,
     )
     dfr = DataFileRepository()
     await dfr.lazy_init()
@@ -24,25 +32,48 @@ async def data_file_repository(mocker, aiohttp_session) -> DataFileRepository:
 
 @pytest.mark.anyio
 async def test_lazy_init(mocker):
-    mocker.patch(
-        "backend.meteofrance.data_file_repository.get_mf_access_token",
-        return_value="to87",
+    session_mock = mocker.patch(
+        "backend.meteofrance.data_file_repository.get_client_session",
         new_callable=AsyncMock,
     )
     dfr = DataFileRepository()
     assert dfr.session is None
-    assert dfr.mf_api_token is None
     await dfr.lazy_init()
-    assert dfr.session is not None
-    assert dfr.mf_api_token == "to87"
-    mocker.patch(
-        "backend.meteofrance.data_file_repository.get_mf_access_token",
-        return_value="newto87",
-        new_callable=AsyncMock,
-    )
     await dfr.lazy_init()
-    assert dfr.session is not None
-    assert dfr.mf_api_token == "to87"
+    assert dfr.session is session_mock.return_value
+    session_mock.assert_awaited_once()
+
+
+@pytest.mark.anyio
+class TestCallWithToken:
+    async def test_call(self, data_file_repository, token_manager_mock):
+        call = AsyncMock(return_value="result")
+        assert await data_file_repository._call_with_token(call) == "result"
+        call.assert_awaited_once_with(token="id1234")
+        token_manager_mock.refresh.assert_not_awaited()
+
+    async def test_retry_once_on_unauthorized(
+        self, data_file_repository, token_manager_mock
+    ):
+        call = AsyncMock(side_effect=[HTTPException(status_code=401), "result"])
+        assert await data_file_repository._call_with_token(call) == "result"
+        assert [c.kwargs for c in call.await_args_list] == [
+            {"token": "id1234"},
+            {"token": "id5678"},
+        ]
+        token_manager_mock.refresh.assert_awaited_once_with(
+            data_file_repository.session, rejected_token="id1234"
+        )
+
+    @pytest.mark.parametrize("second_status", [None, 401])
+    async def test_raise(self, data_file_repository, second_status):
+        side_effect = [HTTPException(status_code=500)]
+        if second_status:
+            side_effect = [HTTPException(status_code=401)] * 2
+        call = AsyncMock(side_effect=side_effect)
+        with pytest.raises(HTTPException):
+            await data_file_repository._call_with_token(call)
+        assert call.await_count == len(side_effect)
 
 
 @pytest.mark.anyio
@@ -58,9 +89,15 @@ async def test_get_last_data_date(mocker, data_file_repository):
 
 
 @pytest.mark.anyio
-async def test_get_daily_file_path(mocker, data_file_repository):
+async def test_get_next_data_datetime(data_file_repository):
+    result = await data_file_repository.get_next_data_datetime(dt.date(2025, 4, 1))
+    assert result == dt.datetime(2025, 4, 3, 11, 35, tzinfo=dt.timezone.utc)
+
+
+@pytest.mark.anyio
+async def test_get_daily_file_buffer(mocker, data_file_repository):
     input_begin_date = dt.date(2025, 4, 1)
-    expected_results = "RR\n55"
+    expected_results = b"RR\n55"
     launch_mock = mocker.patch(
         "backend.meteofrance.data_file_repository.launch_daily_data_computation",
         return_value="id9",
@@ -70,12 +107,11 @@ async def test_get_daily_file_path(mocker, data_file_repository):
         return_value=expected_results,
     )
 
-    async with data_file_repository.get_daily_file_path(
+    result = await data_file_repository.get_daily_file_buffer(
         begin_date=input_begin_date
-    ) as dfp:
-        with open(dfp, "r") as test_file:
-            assert test_file.read() == expected_results
+    )
 
+    assert result == expected_results
     launch_mock.assert_called_once_with(
         session=mocker.ANY, begin_date=input_begin_date, token="id1234"
     )
@@ -87,13 +123,33 @@ async def test_get_daily_file_path(mocker, data_file_repository):
 @pytest.mark.anyio
 async def test_get_bulk_file_path(mocker, data_file_repository):
     expected_contents = bytes("RR\n55", "utf8")
-    content_mock = mocker.patch(
-        "backend.meteofrance.data_file_repository.get_bulk_file_content",
-        return_value=expected_contents,
+
+    async def mock_download_bulk_file(session, file_path, department):
+        file_path.write_bytes(expected_contents)
+        return len(expected_contents)
+
+    download_mock = mocker.patch(
+        "backend.meteofrance.data_file_repository.download_bulk_file",
+        side_effect=mock_download_bulk_file,
     )
 
-    async with data_file_repository.get_bulk_file_path() as bfp:
+    async with data_file_repository.get_bulk_file_path("92") as bfp:
         with open(bfp, "rb") as test_file:
             assert test_file.read() == expected_contents
 
-    content_mock.assert_called_once_with(session=mocker.ANY)
+    download_mock.assert_called_once_with(
+        session=mocker.ANY, file_path=bfp, department="92"
+    )
+
+
+@pytest.mark.anyio
+async def test_get_bulk_file_version(mocker, data_file_repository):
+    version_mock = mocker.patch(
+        "backend.meteofrance.data_file_repository.get_bulk_file_version",
+        return_value='www.dgfbulkdata.com "abc"',
+    )
+
+    result = await data_file_repository.get_bulk_file_version("92")
+
+    assert result == 'www.dgfbulkdata.com "abc"'
+    version_mock.assert_called_once_with(session=mocker.ANY, department="92")
@@ -1,26 +1,110 @@
+import gzip
+
 import pytest
 from fastapi import HTTPException
 
-from backend.meteofrance.data_gouv_service import get_bulk_file_content
+from backend.meteofrance.data_gouv_service import (
+    download_bulk_file,
+    get_bulk_file_url,
+    get_bulk_file_version,
+)
+
+
+@pytest.mark.anyio
+async def test_download_bulk_file(
+    mocker, settings, aiohttp_session, mock_responses, tmp_path
+):
+    settings.dgf_download_chunk_size = 3
+    mocker.patch("backend.meteofrance.data_gouv_service.settings", settings)
+    expected_content = bytes("NUM_POSTE;RR\n75114001;1.5\n" * 100, "utf8")
+    gzipped_content = gzip.compress(expected_content)
+    mock_responses.get("www.dgfbulkdata.com", status=200, body=gzipped_content)
+    input_file_path = tmp_path / "bulk_file.csv"
+
+    result = await download_bulk_file(
+        session=aiohttp_session, file_path=input_file_path
+    )
+
+    assert result == len(gzipped_content)
+    assert input_file_path.read_bytes() == expected_content
 
 
 @pytest.mark.anyio
-async def test_get_bulk_file_content(mocker, settings, aiohttp_session, mock_responses):
+async def test_download_bulk_file_of_department(
+    mocker, settings, aiohttp_session, mock_responses, tmp_path
+):
+    settings.dgf_historical_data_url_template = "www.dgfbulkdata.com/Q_{department}"
     mocker.patch("backend.meteofrance.data_gouv_service.settings", settings)
     expected_content = bytes("testabcd", "utf8")
-    mock_responses.get("www.dgfbulkdata.com", status=200, body=expected_content)
+    mock_responses.get(
+        "www.dgfbulkdata.com/Q_92", status=200, body=gzip.compress(expected_content)
+    )
+    input_file_path = tmp_path / "bulk_file.csv"
 
-    result = await get_bulk_file_content(session=aiohttp_session)
+    await download_bulk_file(
+        session=aiohttp_session, file_path=input_file_path, department="92"
+    )
 
-    assert result == expected_content
+    assert input_file_path.read_bytes() == expected_content
 
 
 @pytest.mark.anyio
-async def test_get_bulk_file_content_raise_if_error(
-    mocker, settings, aiohttp_session, mock_responses
+async def test_download_bulk_file_raise_if_error(
+    mocker, settings, aiohttp_session, mock_responses, tmp_path
 ):
     mocker.patch("backend.meteofrance.data_gouv_service.settings", settings)
     mock_responses.get("www.dgfbulkdata.com", status=500, body="Internal server error")
+    input_file_path = tmp_path / "bulk_file.csv"
+
+    with pytest.raises(HTTPException):
+        await download_bulk_file(session=aiohttp_session, file_path=input_file_path)
+    assert not input_file_path.exists()
+
+
+@pytest.mark.parametrize(
+    "department,expected",
+    [
+        (None, "www.dgfbulkdata.com"),
+        (
+            "2A",
+            "https://object.files.data.gouv.fr/meteofrance/data/synchro_ftp/BASE/QUOT/Q_2A_previous-1950-2023_RR-T-Vent.csv.gz",
+        ),
+    ],
+)
+def test_get_bulk_file_url(mocker, settings, department, expected):
+    mocker.patch("backend.meteofrance.data_gouv_service.settings", settings)
+    assert get_bulk_file_url(department) == expected
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "headers,expected",
+    [
+        ({"ETag": '"abc"'}, 'www.dgfbulkdata.com "abc"'),
+        (
+            {"Last-Modified": "Wed, 21 Oct 2025 07:28:00 GMT"},
+            "www.dgfbulkdata.com Wed, 21 Oct 2025 07:28:00 GMT",
+        ),
+        ({}, None),
+    ],
+)
+async def test_get_bulk_file_version(
+    mocker, settings, aiohttp_session, mock_responses, headers, expected
+):
+    mocker.patch("backend.meteofrance.data_gouv_service.settings", settings)
+    mock_responses.head("www.dgfbulkdata.com", status=200, headers=headers)
+
+    result = await get_bulk_file_version(session=aiohttp_session)
+
+    assert result == expected
+
+
+@pytest.mark.anyio
+async def test_get_bulk_file_version_raise_if_error(
+    mocker, settings, aiohttp_session, mock_responses
+):
+    mocker.patch("backend.meteofrance.data_gouv_service.settings", settings)
+    mock_responses.head("www.dgfbulkdata.com", status=404)
 
     with pytest.raises(HTTPException):
-        await get_bulk_file_content(session=aiohttp_session)
+        await get_bulk_file_version(session=aiohttp_session)
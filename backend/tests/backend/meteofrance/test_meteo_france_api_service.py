@@ -1,13 +1,20 @@
+import asyncio
 import datetime as dt
 
 import pytest
+from aiohttp import ClientTimeout
 from fastapi import HTTPException
 from freezegun import freeze_time
 
 from backend.meteofrance.meteo_france_api_service import (
+    ClientSessionPool,
+    MfTokenManager,
+    _poll_delay,
     fetch_daily_data_computation_results,
+    get_client_session,
+    get_client_session_pool,
     get_last_mfapi_data_date,
-    get_mf_access_token,
+    get_next_mfapi_data_datetime,
     launch_daily_data_computation,
 )
 
@@ -25,6 +32,20 @@ async def test_get_last_mfapi_data_date(test_date, expected):
         assert await get_last_mfapi_data_date() == expected
 
 
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "test_date",
+    ["2025-04-03 11:58:45", "2025-04-04 08:12:33", "2025-04-04 11:34:59"],
+)
+async def test_get_next_mfapi_data_datetime(test_date):
+    with freeze_time(test_date):
+        last_data_date = await get_last_mfapi_data_date()
+    assert last_data_date == dt.date(2025, 4, 2)
+    assert get_next_mfapi_data_datetime(last_data_date) == dt.datetime(
+        2025, 4, 4, 11, 35, tzinfo=dt.timezone.utc
+    )
+
+
 @pytest.mark.anyio
 async def test_get_last_mfapi_fake_data_date(mocker, settings_with_fake_date):
     mocker.patch(
@@ -36,14 +57,98 @@ async def test_get_last_mfapi_fake_data_date(mocker, settings_with_fake_date):
 
 
 @pytest.mark.anyio
-async def test_get_mf_access_token(mocker, settings, aiohttp_session, mock_responses):
-    expected = "toktok"
-    mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
-    mock_responses.post(
-        "www.testtoken.com", status=200, payload={"access_token": expected}
-    )
-    result = await get_mf_access_token(session=aiohttp_session)
-    assert result == expected
+class TestMfTokenManager:
+    @pytest.fixture(autouse=True)
+    def patch_settings(self, mocker, settings):
+        mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
+
+    async def test_get_token(self, aiohttp_session, mock_responses):
+        mock_responses.post(
+            "www.testtoken.com",
+            status=200,
+            payload={"access_token": "toktok", "expires_in": 3600},
+        )
+        manager = MfTokenManager()
+        assert await manager.get_token(aiohttp_session) == "toktok"
+        assert await manager.get_token(aiohttp_session) == "toktok"
+        assert len(mock_responses.requests) == 1
+
+    async def test_get_token_dedupes_concurrent_refreshes(
+        self, aiohttp_session, mock_responses
+    ):
+        mock_responses.post(
+            "www.testtoken.com", status=200, payload={"access_token": "toktok"}
+        )
+        manager = MfTokenManager()
+        results = await asyncio.gather(
+            *(manager.get_token(aiohttp_session) for _ in range(5))
+        )
+        assert results == ["toktok"] * 5
+        assert len(mock_responses.requests) == 1
+        assert manager.refresh_task is None
+
+    async def test_get_token_refreshes_expired_token(
+        self, aiohttp_session, mock_responses
+    ):
+        mock_responses.post(
+            "www.testtoken.com", status=200, payload={"access_token": "newtok"}
+        )
+        manager = MfTokenManager()
+        manager.token = "oldtok"
+        manager.expires_at = asyncio.get_running_loop().time() - 1
+        assert await manager.get_token(aiohttp_session) == "newtok"
+
+    async def test_get_token_refreshes_in_background(
+        self, aiohttp_session, mock_responses
+    ):
+        mock_responses.post(
+            "www.testtoken.com", status=200, payload={"access_token": "newtok"}
+        )
+        manager = MfTokenManager()
+        manager.token = "oldtok"
+        manager.expires_at = asyncio.get_running_loop().time() + 60
+        assert await manager.get_token(aiohttp_session) == "oldtok"
+        assert manager.refresh_task is not None
+        await manager.refresh_task
+        assert await manager.get_token(aiohttp_session) == "newtok"
+
+    async def test_get_token_background_refresh_failure(
+        self, aiohttp_session, mock_responses, caplog
+    ):
+        mock_responses.post("www.testtoken.com", status=500, payload={})
+        manager = MfTokenManager()
+        manager.token = "oldtok"
+        manager.expires_at = asyncio.get_running_loop().time() + 60
+        assert await manager.get_token(aiohttp_session) == "oldtok"
+        with pytest.raises(KeyError):
+            await manager.refresh_task
+        assert manager.refresh_task is None
+        assert "token refresh failed" in caplog.text
+        assert await manager.get_token(aiohttp_session) == "oldtok"
+
+    async def test_refresh_cancelled(self, mocker, aiohttp_session):
+        manager = MfTokenManager()
+
+        async def never_answering_fetch(session):
+            await asyncio.sleep(10)
+
+        mocker.patch.object(manager, "_fetch_token", never_answering_fetch)
+        task = manager._refresh(aiohttp_session)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert manager.refresh_task is None
+
+    async def test_refresh(self, aiohttp_session, mock_responses):
+        mock_responses.post(
+            "www.testtoken.com", status=200, payload={"access_token": "newtok"}
+        )
+        manager = MfTokenManager()
+        manager.token = "oldtok"
+        manager.expires_at = asyncio.get_running_loop().time() + 3600
+        assert await manager.refresh(aiohttp_session, "oldtok") == "newtok"
+        assert await manager.refresh(aiohttp_session, "oldtok") == "newtok"
+        assert len(mock_responses.requests) == 1
 
 
 @pytest.mark.anyio
@@ -104,7 +209,8 @@ async def test_fetch_daily_data_computation_results(
     input_id_command = "id5678"
     input_token = "1234ab"
     mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
-    expected_content = "RR\n55"
+    sleep_mock = mocker.patch("asyncio.sleep")
+    expected_content = b"RR\n55"
     mock_responses.get(
         url=f"www.mfapp.com/commande/fichier?id-cmde={input_id_command}",
         status=200,
@@ -116,6 +222,13 @@ async def test_fetch_daily_data_computation_results(
     )
 
     assert result == expected_content
+    sleep_mock.assert_awaited_once_with(settings.mf_poll_first_delay)
+    (request,) = next(iter(mock_responses.requests.values()))
+    assert request.kwargs["timeout"] == ClientTimeout(
+        total=settings.mf_request_timeout,
+        connect=settings.http_connect_timeout,
+        sock_read=settings.http_sock_read_timeout,
+    )
 
 
 @pytest.mark.anyio
@@ -125,6 +238,7 @@ async def test_fetch_daily_data_computation_results_raise_if_error(
     input_id_command = "id5678"
     input_token = "1234ab"
     mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
+    mocker.patch("asyncio.sleep")
     mock_responses.get(
         url=f"www.mfapp.com/commande/fichier?id-cmde={input_id_command}",
         status=500,
@@ -135,3 +249,123 @@ async def test_fetch_daily_data_computation_results_raise_if_error(
         await fetch_daily_data_computation_results(
             session=aiohttp_session, id_command=input_id_command, token=input_token
         )
+
+
+@pytest.mark.anyio
+async def test_fetch_daily_data_computation_results_polls_until_ready(
+    mocker, settings, aiohttp_session, mock_responses
+):
+    input_id_command = "id5678"
+    url = f"www.mfapp.com/commande/fichier?id-cmde={input_id_command}"
+    mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
+    mocker.patch(
+        "backend.meteofrance.meteo_france_api_service._poll_delay",
+        side_effect=[0.5, 1.0],
+    )
+    sleep_mock = mocker.patch("asyncio.sleep")
+    expected_content = b"RR\n55"
+    mock_responses.get(url=url, status=204)
+    mock_responses.get(url=url, status=202, body="Production en cours")
+    mock_responses.get(url=url, status=201, body=expected_content)
+
+    result = await fetch_daily_data_computation_results(
+        session=aiohttp_session, id_command=input_id_command, token="1234ab"
+    )
+
+    assert result == expected_content
+    assert [call.args[0] for call in sleep_mock.await_args_list] == [
+        settings.mf_poll_first_delay,
+        0.5,
+        1.0,
+    ]
+
+
+@pytest.mark.anyio
+async def test_fetch_daily_data_computation_results_raise_after_deadline(
+    mocker, settings, aiohttp_session, mock_responses
+):
+    input_id_command = "id5678"
+    settings.mf_poll_first_delay = 0
+    settings.mf_poll_timeout = 0.1
+    mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
+    mocker.patch(
+        "backend.meteofrance.meteo_france_api_service._poll_delay", return_value=0.02
+    )
+    mock_responses.get(
+        url=f"www.mfapp.com/commande/fichier?id-cmde={input_id_command}",
+        status=204,
+        repeat=True,
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await fetch_daily_data_computation_results(
+            session=aiohttp_session, id_command=input_id_command, token="1234ab"
+        )
+
+    assert exc_info.value.status_code == 504
+    assert len(next(iter(mock_responses.requests.values()))) > 1
+
+
+@pytest.mark.anyio
+async def test_fetch_daily_data_computation_results_raise_if_stalled(
+    mocker, settings, aiohttp_session
+):
+    settings.mf_poll_first_delay = 0
+    settings.mf_poll_timeout = 0.05
+    mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
+
+    async def stalled_fetch(session, id_command, token):
+        await asyncio.Event().wait()
+
+    mocker.patch(
+        "backend.meteofrance.meteo_france_api_service._fetch_results_if_ready",
+        side_effect=stalled_fetch,
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await fetch_daily_data_computation_results(
+            session=aiohttp_session, id_command="id5678", token="1234ab"
+        )
+
+    assert exc_info.value.status_code == 504
+
+
+@pytest.mark.parametrize(("attempt", "expected_max"), [(0, 0.5), (2, 2.0), (10, 8.0)])
+def test_poll_delay(mocker, settings, attempt, expected_max):
+    mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
+    delays = [_poll_delay(attempt) for _ in range(20)]
+    assert all(expected_max / 2 <= delay <= expected_max for delay in delays)
+
+
+@pytest.mark.anyio
+async def test_client_session_pool(mocker, settings):
+    mocker.patch("backend.meteofrance.meteo_france_api_service.settings", settings)
+    session_pool = ClientSessionPool()
+    await session_pool.open()
+    session = session_pool.session
+    await session_pool.open()
+    assert session_pool.session is session
+    assert session.connector.limit == settings.http_max_connections
+    assert session.connector.limit_per_host == settings.http_max_connections_per_host
+    assert session.timeout.total is None
+    assert session.timeout.sock_read == settings.http_sock_read_timeout
+    await session_pool.close()
+    assert session.closed
+    assert session_pool.session is None
+    await session_pool.close()
+
+
+def test_get_client_session_pool():
+    session_pool = get_client_session_pool()
+    assert isinstance(session_pool, ClientSessionPool)
+    assert get_client_session_pool() is session_pool
+
+
+@pytest.mark.anyio
+async def test_get_client_session(mocker):
+    pool_mock = mocker.patch(
+        "backend.meteofrance.meteo_france_api_service.get_client_session_pool"
+    )
+    pool_mock.return_value.open = mocker.AsyncMock()
+    assert await get_client_session() is pool_mock.return_value.session
+    pool_mock.return_value.open.assert_awaited_once()
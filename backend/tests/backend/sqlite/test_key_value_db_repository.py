@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from backend.sqlite.key_value_db_repository import KeyValueDbRepository
+from backend.sqlite.sqlite_service import open_connection
+from core.entities import ClimatologyIndex, RainStore
+from core.exceptions import AlreadyInitialized
+from core.protocol import DataFileProtocol
+from core.service import get_mean_data, initialize_mean_data
+
+
+@pytest.fixture
+def key_value_db_repository(mocker, settings, tmp_path) -> KeyValueDbRepository:
+    mocker.patch("backend.sqlite.sqlite_service.settings", settings)
+    connection = open_connection(str(tmp_path / "test.db"))
+    yield KeyValueDbRepository(connection=connection)
+    connection.close()
+
+
+@pytest.mark.anyio
+async def test_post_get_and_has(key_value_db_repository):
+    input_rains = [
+        RainStore(timespan_id="20250401-20250410", rain_mm=0),
+        RainStore(timespan_id="M0401-M0410", rain_mm=10.5),
+    ]
+    await key_value_db_repository.post(input_rains)
+    result = await key_value_db_repository.get(
+        ["M0401-M0410", "20250401-20250410", "20250411-20250411"]
+    )
+    assert result == {"20250401-20250410": 0, "M0401-M0410": 10.5}
+    assert await key_value_db_repository.has("M0401-M0410") is True
+    assert await key_value_db_repository.has("20250411-20250411") is False
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls(key_value_db_repository):
+    await asyncio.gather(
+        *(
+            key_value_db_repository.post(
+                [RainStore(timespan_id=f"202504{day:02}-202504{day:02}", rain_mm=day)]
+            )
+            for day in range(1, 31)
+        )
+    )
+    result = await key_value_db_repository.get(
+        [f"202504{day:02}-202504{day:02}" for day in range(1, 31)]
+    )
+    assert len(result) == 30
+
+
+@pytest.mark.anyio
+async def test_claim_and_release(key_value_db_repository):
+    assert await key_value_db_repository.claim(["M0101-M0101"]) is True
+    assert await key_value_db_repository.claim(["M0101-M0101"]) is False
+    assert await key_value_db_repository.has("CLAIM#M0101-M0101") is True
+    await key_value_db_repository.release(["M0101-M0101"])
+    assert await key_value_db_repository.claim(["M0101-M0101"]) is True
+
+
+@pytest.mark.anyio
+async def test_post_and_get_index(key_value_db_repository):
+    index = ClimatologyIndex(
+        station_id=75114001,
+        number_of_years=2,
+        cumulated_rain_tenths=[10 * i for i in range(367)],
+    )
+    assert await key_value_db_repository.get_index(75114001) is None
+    await key_value_db_repository.post_index(index)
+    assert await key_value_db_repository.get_index(75114001) == index
+    assert await key_value_db_repository.has("INDEX#75114001") is True
+
+
+@pytest.mark.anyio
+async def test_initialize_over_table_without_index(
+    mock_module, key_value_db_repository, tmp_path
+):
+    # Table initialized with scalar means only, before climatology indexes
+    await key_value_db_repository.post(
+        [RainStore(timespan_id="M0101-M0101", rain_mm=1.2)]
+    )
+    input_file_path = tmp_path / "bulk_file.csv"
+    input_file_path.write_text(
+        "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n75114001;A;20200101;1.0\n"
+    )
+    data_file_repo = mock_module("core.protocol", DataFileProtocol)
+
+    @asynccontextmanager
+    async def mock_get_bulk_file_path(department):
+        yield input_file_path
+
+    data_file_repo.get_bulk_file_path = mock_get_bulk_file_path
+
+    await initialize_mean_data(
+        key_value_db_repository, data_file_repo, 2020, 2020, [75114001]
+    )
+
+    result = await get_mean_data(key_value_db_repository, "M0101-M0101")
+    assert result == RainStore(timespan_id="M0101-M0101", rain_mm=1.0)
+    with pytest.raises(AlreadyInitialized):
+        await initialize_mean_data(
+            key_value_db_repository, data_file_repo, 2020, 2020, [75114001]
+        )
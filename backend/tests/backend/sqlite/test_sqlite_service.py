@@ -0,0 +1,121 @@
+import sqlite3
+import time
+
+import pytest
+
+from backend.sqlite.sqlite_service import (
+    claim_items,
+    delete_items,
+    get_document,
+    get_items,
+    get_sqlite_connection,
+    has_item,
+    open_connection,
+    write_document,
+    write_items,
+)
+
+
+@pytest.fixture
+def connection(mocker, settings, tmp_path):
+    mocker.patch("backend.sqlite.sqlite_service.settings", settings)
+    connection = open_connection(str(tmp_path / "test.db"))
+    yield connection
+    connection.close()
+
+
+def test_open_connection(connection, settings):
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    columns = connection.execute(
+        f"PRAGMA table_info({settings.backend_table_name})"
+    ).fetchall()
+    assert [column[1] for column in columns] == [
+        "test_key",
+        "test_value",
+        "test_document",
+        "test_expires_at",
+    ]
+
+
+def test_open_connection_adds_expiry_column(mocker, settings, tmp_path):
+    mocker.patch("backend.sqlite.sqlite_service.settings", settings)
+    db_path = str(tmp_path / "test.db")
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE test_table (test_key TEXT PRIMARY KEY, test_value REAL, "
+        "test_document BLOB) WITHOUT ROWID"
+    )
+    connection.execute("INSERT INTO test_table (test_key) VALUES ('key1')")
+    connection.commit()
+    connection.close()
+
+    connection = open_connection(db_path)
+    columns = connection.execute("PRAGMA table_info(test_table)").fetchall()
+    assert columns[-1][1] == "test_expires_at"
+    assert has_item(connection, "key1") is True
+    connection.close()
+
+
+def test_get_sqlite_connection(mocker, settings, tmp_path):
+    settings.sqlite_db_path = str(tmp_path / "test.db")
+    mocker.patch("backend.sqlite.sqlite_service.settings", settings)
+    get_sqlite_connection.cache_clear()
+    connection = get_sqlite_connection()
+    assert get_sqlite_connection() is connection
+    get_sqlite_connection.cache_clear()
+    connection.close()
+
+
+def test_write_and_get_items(connection):
+    items = {f"key{k}": k / 10 for k in range(1200)}
+    write_items(connection, items)
+    keys = [f"key{k}" for k in range(0, 1300, 2)] + ["key0"]
+    assert get_items(connection, keys) == {f"key{k}": k / 10 for k in range(0, 1200, 2)}
+    write_items(connection, {"key0": 1.5})
+    assert get_items(connection, ["key0"]) == {"key0": 1.5}
+
+
+def test_write_items_rollback(connection):
+    with pytest.raises(TypeError):
+        write_items(connection, {"key1": 1, "key2": None})
+    assert get_items(connection, ["key1"]) == {}
+
+
+def test_has_item(connection):
+    write_items(connection, {"key1": 1})
+    assert has_item(connection, "key1") is True
+    assert has_item(connection, "key2") is False
+
+
+def test_claim_and_delete_items(connection):
+    write_items(connection, {"key1": 1})
+    assert claim_items(connection, {"key1": "CLAIM#key1"}) is False
+    assert claim_items(connection, {"key2": "CLAIM#key2"}) is True
+    assert claim_items(connection, {"key2": "CLAIM#key2"}) is False
+    assert (
+        claim_items(connection, {"key3": "CLAIM#key3", "key2": "CLAIM#key2"}) is False
+    )
+    assert has_item(connection, "CLAIM#key3") is False
+    delete_items(connection, ["CLAIM#key2"])
+    assert has_item(connection, "CLAIM#key2") is False
+    assert claim_items(connection, {"key2": "CLAIM#key2"}) is True
+
+
+def test_claim_items_takes_over_expired_claims(connection, settings):
+    settings.claim_lease_time = -60
+    assert claim_items(connection, {"key1": "CLAIM#key1"}) is True
+    settings.claim_lease_time = 900
+    assert claim_items(connection, {"key1": "CLAIM#key1"}) is True
+    assert claim_items(connection, {"key1": "CLAIM#key1"}) is False
+    (expires_at,) = connection.execute(
+        "SELECT test_expires_at FROM test_table WHERE test_key = 'CLAIM#key1'"
+    ).fetchone()
+    assert expires_at > time.time()
+
+
+def test_write_and_get_document(connection):
+    write_document(connection, "key1", b"\x01\x02")
+    assert get_document(connection, "key1") == b"\x01\x02"
+    write_document(connection, "key1", b"\x03")
+    assert get_document(connection, "key1") == b"\x03"
+    assert get_document(connection, "key2") is None
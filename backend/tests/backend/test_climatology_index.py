@@ -0,0 +1,13 @@
+from backend.climatology_index import pack_index, unpack_index
+from core.entities import ClimatologyIndex
+
+
+def test_pack_index():
+    index = ClimatologyIndex(
+        station_id=75114001,
+        number_of_years=30,
+        cumulated_rain_tenths=[i * 5000 for i in range(367)],
+    )
+    document = pack_index(index)
+    assert len(document) == 4 + 4 * 367
+    assert unpack_index(75114001, document) == index
@@ -1,5 +1,6 @@
 import pytest
 
+import core.service
 from settings import Settings
 
 
@@ -8,6 +9,12 @@ def mock_module(mocker):
     return lambda name, spec: mocker.Mock(name=name, spec=spec)
 
 
+@pytest.fixture(autouse=True)
+def clear_data_cache():
+    yield
+    core.service._data_cache.clear()
+
+
 @pytest.fixture
 def anyio_backend():
     return "asyncio"
@@ -22,6 +29,8 @@ def settings():
         backend_table_name="test_table",
         backend_table_key_name="test_key",
         backend_table_value_name="test_value",
+        backend_table_document_name="test_document",
+        backend_table_expires_at_name="test_expires_at",
         mf_climate_app_id="1234ab",
         mf_token_url="www.testtoken.com",
         mf_climate_app_url="www.mfapp.com",
@@ -38,6 +47,8 @@ def settings_with_fake_date():
         backend_table_name="test_table",
         backend_table_key_name="test_key",
         backend_table_value_name="test_value",
+        backend_table_document_name="test_document",
+        backend_table_expires_at_name="test_expires_at",
         mf_climate_app_id="1234ab",
         mf_token_url="www.testtoken.com",
         mf_climate_app_url="www.mfapp.com",
@@ -0,0 +1,64 @@
+import re
+from decimal import Decimal
+
+import polars as pl
+import pytest
+
+from core.entities import RainBatch, RainStore
+
+
+class TestRainBatch:
+    def test_init_normalizes_columns(self):
+        batch = RainBatch(
+            pl.DataFrame(
+                {"rain_mm": [1, 2], "timespan_id": ["M0101-M0101", "M0101-M0102"]}
+            )
+        )
+        assert batch.df.schema == {"timespan_id": pl.String, "rain_mm": pl.Float64}
+        assert batch.to_dict() == {"M0101-M0101": 1.0, "M0101-M0102": 2.0}
+
+    def test_init_rounds_rains(self):
+        batch = RainBatch.from_columns(["M0101-M0101", "M0101-M0102"], [0.04, 2.06])
+        assert batch.to_dict() == {"M0101-M0101": 0.0, "M0101-M0102": 2.1}
+
+    @pytest.mark.parametrize(
+        ("timespan_ids", "rains_mm", "expected_message"),
+        [
+            (["M0101-M0101", "2025-01-01"], [1.0, 2.0], "timespan_id str_matches"),
+            (["M0101-M0101"], [-1.0], "rain_mm greater_than_or_equal_to(0.0)"),
+            (["M0101-M0101"], [None], "rain_mm not_nullable"),
+        ],
+    )
+    def test_init_validates(self, timespan_ids, rains_mm, expected_message):
+        with pytest.raises(ValueError, match=re.escape(expected_message)):
+            RainBatch.from_columns(timespan_ids, rains_mm)
+
+    def test_from_columns_empty(self):
+        batch = RainBatch.from_columns([], [])
+        assert len(batch) == 0
+        assert batch.to_dict() == {}
+
+    def test_of(self):
+        rains = [
+            RainStore(timespan_id="20250101-20250101", rain_mm=Decimal("0.3")),
+            RainStore(timespan_id="1#M0101-M0101", rain_mm=Decimal("12.5")),
+        ]
+        batch = RainBatch.of(rains)
+        assert RainBatch.of(batch) is batch
+        assert batch.to_dict() == {"20250101-20250101": 0.3, "1#M0101-M0101": 12.5}
+
+    def test_concat(self):
+        batch = RainBatch.concat(
+            [
+                RainBatch.from_columns(["M0101-M0101", "M0101-M0102"], [1.0, 2.0]),
+                RainBatch.from_columns([], []),
+                RainBatch.from_columns(["M0101-M0101"], [3.0]),
+            ]
+        )
+        assert len(batch) == 3
+        assert batch.to_dict() == {"M0101-M0101": 3.0, "M0101-M0102": 2.0}
+
+    def test_slots(self):
+        batch = RainBatch.from_columns([], [])
+        with pytest.raises(AttributeError):
+            batch.other = 1
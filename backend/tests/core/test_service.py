@@ -1,24 +1,47 @@
+import asyncio
 import datetime as dt
+import gzip
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 from unittest.mock import call
 
 import polars as pl
 import pytest
-from pandera.errors import SchemaError
 from polars.testing import assert_frame_equal
 
-from core.entities import RainCompleteInfo, RainStore
-from core.exceptions import AlreadyAddedData, AlreadyInitialized
+from core.entities import ClimatologyIndex, RainCompleteInfo, RainStore
+from core.exceptions import (
+    AlreadyAddedData,
+    AlreadyInitialized,
+    InvalidDataFile,
+    InvalidTimespan,
+    MissingDailyData,
+    NotInitialized,
+)
 from core.protocol import DataFileProtocol, KeyValueDbProtocol
 from core.service import (
-    _compute_daily_data,
+    MIN_BACKFILL_DAY,
+    _cache_bulk_file,
+    _compute_bulk_file_indexes,
+    _compute_climatology_indexes,
     _compute_history_means,
-    _get_mean_data_between_two_mon_day_dates,
+    _data_cache,
+    _get_bulk_data_path,
+    _initialization_claim_key,
     _preprocess_bulk_data,
+    _read_daily_data,
+    _run_blocking,
+    _scan_bulk_data,
+    backfill_daily_data,
     fetch_daily_data_if_not_in_cache,
+    get_cached_data,
     get_data,
     get_last_data_date,
+    get_mean_data,
+    get_next_data_datetime,
     initialize_mean_data,
 )
 
@@ -33,17 +56,25 @@ def key_value_db_repo(mock_module):
     return mock_module("core.protocol", KeyValueDbProtocol)
 
 
+@pytest.fixture
+def index() -> ClimatologyIndex:
+    return ClimatologyIndex(
+        station_id=75114001,
+        number_of_years=2,
+        cumulated_rain_tenths=[10 * i for i in range(367)],
+    )
+
+
 class TestGetData:
     @pytest.mark.anyio
-    async def test_get_data(self, key_value_db_repo):
+    async def test_get_data(self, key_value_db_repo, index):
         input_last_data_date = dt.date(2025, 4, 15)
         key_value_db_repo.get.return_value = {
             "20250415-20250415": 0,
             "20250401-20250415": 10,
             "20250316-20250415": 20,
-            "M0401-M0415": 40,
-            "M0316-M0415": 50,
         }
+        key_value_db_repo.get_index.return_value = index
 
         result = await get_data(
             key_value_db_repo=key_value_db_repo, last_data_day=input_last_data_date
@@ -54,50 +85,158 @@ class TestGetData:
             last_day_rain_mm=0,
             month_beg=dt.date(2025, 4, 1),
             since_month_beg_mm=10,
-            mean_month_beg_mm=40,
+            mean_month_beg_mm=7.5,
             prev_30_days=dt.date(2025, 3, 16),
             last_31_days_mm=20,
-            mean_31_days_mm=50,
+            mean_31_days_mm=15.5,
         )
         key_value_db_repo.get.assert_called_once_with(
             keys=[
                 "20250415-20250415",
                 "20250401-20250415",
                 "20250316-20250415",
-                "M0401-M0415",
-                "M0316-M0415",
             ]
         )
+        key_value_db_repo.get_index.assert_called_once_with(75114001)
         assert result == expected
 
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("year", [2024, 2025])
+    async def test_get_data_means_match_scalar_means(self, key_value_db_repo, year):
+        index = ClimatologyIndex(
+            station_id=75114001,
+            number_of_years=3,
+            cumulated_rain_tenths=[0]
+            + list(itertools.accumulate((i * 37) % 101 for i in range(366))),
+        )
+        scalar_means = _compute_history_means([index]).to_dict()
+        key_value_db_repo.get.side_effect = lambda keys: dict.fromkeys(keys, 0)
+        key_value_db_repo.get_index.return_value = index
+        for day in pl.date_range(
+            dt.date(year, 1, 1), dt.date(year, 12, 31), eager=True
+        ):
+            result = await get_data(key_value_db_repo, day)
+            assert (
+                float(result.mean_month_beg_mm)
+                == scalar_means[f"M{result.month_beg:%m%d}-M{day:%m%d}"]
+            )
+            assert (
+                float(result.mean_31_days_mm)
+                == scalar_means[f"M{result.prev_30_days:%m%d}-M{day:%m%d}"]
+            )
 
-class TestComputeDailyData:
     @pytest.mark.anyio
-    async def test_compute_daily_data(self):
+    async def test_get_data_raise_if_not_initialized(self, key_value_db_repo):
+        key_value_db_repo.get.return_value = {}
+        key_value_db_repo.get_index.return_value = None
+        with pytest.raises(NotInitialized):
+            await get_data(key_value_db_repo, dt.date(2025, 4, 15))
+
+
+class TestGetCachedData:
+    @staticmethod
+    def rain_data(last_data_day: dt.date) -> dict[str, float]:
+        return {
+            f"{last_data_day:%Y%m%d}-{last_data_day:%Y%m%d}": 0,
+            f"{last_data_day:%Y%m01}-{last_data_day:%Y%m%d}": 10,
+            f"{last_data_day - dt.timedelta(days=30):%Y%m%d}-{last_data_day:%Y%m%d}": 20,
+        }
+
+    @pytest.mark.anyio
+    async def test_get_cached_data_single_flight(self, key_value_db_repo, index):
+        input_last_data_date = dt.date(2025, 4, 15)
+        key_value_db_repo.get.return_value = self.rain_data(input_last_data_date)
+        key_value_db_repo.get_index.return_value = index
+
+        results = await asyncio.gather(
+            *(
+                get_cached_data(key_value_db_repo, input_last_data_date)
+                for _ in range(5)
+            )
+        )
+        result = await get_cached_data(key_value_db_repo, input_last_data_date)
+
+        key_value_db_repo.get.assert_called_once()
+        assert all(r == result for r in results)
+        assert result.since_month_beg_mm == 10
+
+    @pytest.mark.anyio
+    async def test_get_cached_data_expires_on_rollover(self, key_value_db_repo, index):
+        key_value_db_repo.get_index.return_value = index
+        key_value_db_repo.get.side_effect = [
+            self.rain_data(dt.date(2025, 4, 15)),
+            self.rain_data(dt.date(2025, 4, 16)),
+        ]
+
+        await get_cached_data(key_value_db_repo, dt.date(2025, 4, 15))
+        result = await get_cached_data(key_value_db_repo, dt.date(2025, 4, 16))
+
+        assert key_value_db_repo.get.call_count == 2
+        assert result.last_day == dt.date(2025, 4, 16)
+        assert list(_data_cache) == [dt.date(2025, 4, 16)]
+
+    @pytest.mark.anyio
+    async def test_get_cached_data_keeps_later_day(self, key_value_db_repo, index):
+        key_value_db_repo.get_index.return_value = index
+        key_value_db_repo.get.side_effect = [
+            self.rain_data(dt.date(2025, 4, 16)),
+            self.rain_data(dt.date(2025, 4, 15)),
+        ]
+
+        await get_cached_data(key_value_db_repo, dt.date(2025, 4, 16))
+        result = await get_cached_data(key_value_db_repo, dt.date(2025, 4, 15))
+
+        assert result.last_day == dt.date(2025, 4, 15)
+        assert list(_data_cache) == [dt.date(2025, 4, 16)]
+
+    @pytest.mark.anyio
+    async def test_get_cached_data_does_not_cache_errors(
+        self, key_value_db_repo, index
+    ):
+        input_last_data_date = dt.date(2025, 4, 15)
+        key_value_db_repo.get_index.return_value = index
+        key_value_db_repo.get.side_effect = [
+            {},
+            self.rain_data(input_last_data_date),
+        ]
+
+        with pytest.raises(KeyError):
+            await get_cached_data(key_value_db_repo, input_last_data_date)
+        result = await get_cached_data(key_value_db_repo, input_last_data_date)
+
+        assert key_value_db_repo.get.call_count == 2
+        assert result.last_31_days_mm == 20
+
+
+class TestReadDailyData:
+    def test_read_daily_data(self):
         input_file_path = Path(__file__).parent.joinpath(
             "resources", "input_compute_daily_data.csv"
         )
-        input_this_day = dt.date(2025, 4, 2)
-        expected_this_day = 5
-        expected_this_month = 10.5
-        expected_last_31_days = 14.5
-        (
-            result_this_day,
-            result_this_month,
-            result_last_31_days,
-        ) = await _compute_daily_data(input_file_path, input_this_day)
-        assert result_this_day == expected_this_day
-        assert expected_this_month == result_this_month
-        assert expected_last_31_days == result_last_31_days
-
-    @pytest.mark.anyio
-    async def test_compute_daily_data_should_raise_validation_error(self):
+        result = _read_daily_data(input_file_path)
+        assert result[dt.date(2025, 4, 2)] == 5
+        assert (
+            round(result[dt.date(2025, 4, 1)] + result[dt.date(2025, 4, 2)], 1) == 10.5
+        )
+        assert round(sum(result.values()), 1) == 14.5
+
+    def test_read_daily_data_from_buffer(self):
+        result = _read_daily_data(b"DATE;RR\n20250401;5,5\n20250402;0\n")
+        assert result == {dt.date(2025, 4, 1): 5.5, dt.date(2025, 4, 2): 0}
+
+    def test_read_daily_data_should_raise_validation_error(self):
         input_file_path = Path(__file__).parent.joinpath(
             "resources", "input_compute_daily_data_wrong_format.csv"
         )
-        input_this_day = dt.date(2025, 4, 2)
-        with pytest.raises(SchemaError):
-            await _compute_daily_data(input_file_path, input_this_day)
+        with pytest.raises(InvalidDataFile):
+            _read_daily_data(input_file_path)
+
+    def test_read_daily_data_strict_validation(self):
+        input_file_path = Path(__file__).parent.joinpath(
+            "resources", "input_compute_daily_data.csv"
+        )
+        result = _read_daily_data(input_file_path, strict_validation=True)
+        assert result[dt.date(2025, 4, 2)] == 5
 
 
 class TestFetchDailyDataIfNotInCache:
@@ -106,80 +245,451 @@ class TestFetchDailyDataIfNotInCache:
         self, data_file_repo, key_value_db_repo
     ):
         input_last_data_day = dt.date(2025, 4, 2)
-        key_value_db_repo.has.return_value = False
-
-        @asynccontextmanager
-        async def mock_daily_file_path(begin_date):
-            yield Path(__file__).parent.joinpath(
-                "resources", "input_compute_daily_data.csv"
-            )
-
-        data_file_repo.get_daily_file_path = mock_daily_file_path
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get.return_value = {}
+        data_file_repo.get_daily_file_buffer.return_value = (
+            Path(__file__)
+            .parent.joinpath("resources", "input_compute_daily_data.csv")
+            .read_bytes()
+        )
         await fetch_daily_data_if_not_in_cache(
             key_value_db_repo, data_file_repo, input_last_data_day
         )
-        key_value_db_repo.post.assert_called_once_with(
-            [
-                RainStore(timespan_id="20250402-20250402", rain_mm=5),
-                RainStore(timespan_id="20250401-20250402", rain_mm=10.5),
-                RainStore(timespan_id="20250303-20250402", rain_mm=14.5),
+        data_file_repo.get_daily_file_buffer.assert_awaited_once_with(
+            begin_date=dt.date(2025, 3, 3)
+        )
+        key_value_db_repo.get.assert_called_once_with(
+            keys=[
+                f"{day:%Y%m%d}-{day:%Y%m%d}"
+                for day in pl.date_range(
+                    dt.date(2025, 3, 3), dt.date(2025, 4, 2), eager=True
+                )
             ]
+            + ["20250303-20250402"]
+        )
+        posted = key_value_db_repo.post.call_args.args[0].df.rows()
+        assert posted[-3:] == [
+            ("20250402-20250402", 5),
+            ("20250401-20250402", 10.5),
+            ("20250303-20250402", 14.5),
+        ]
+        assert ("20250401-20250401", 5.5) in posted
+        key_value_db_repo.release.assert_called_once_with(["20250402-20250402"])
+
+    @pytest.mark.anyio
+    async def test_fetch_daily_data_partially_in_cache(
+        self, data_file_repo, key_value_db_repo
+    ):
+        input_last_data_day = dt.date(2025, 4, 2)
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get.return_value = {
+            "20250303-20250303": 1.2,
+            "20250320-20250320": 3.1,
+            "20250331-20250331": 0.1,
+            "20250401-20250401": 0.2,
+        }
+        data_file_repo.get_daily_file_buffer.return_value = (
+            b"DATE;RR\n20250331;9,9\n20250401;9,9\n20250402;0,3\n"
         )
+        await fetch_daily_data_if_not_in_cache(
+            key_value_db_repo, data_file_repo, input_last_data_day
+        )
+        data_file_repo.get_daily_file_buffer.assert_awaited_once_with(
+            begin_date=dt.date(2025, 3, 4)
+        )
+        key_value_db_repo.post.assert_called_once()
+        assert key_value_db_repo.post.call_args.args[0].df.rows() == [
+            ("20250402-20250402", 0.3),
+            ("20250401-20250402", 0.5),
+            ("20250303-20250402", 4.9),
+        ]
+
+    @pytest.mark.anyio
+    async def test_fetch_daily_data_not_published(
+        self, data_file_repo, key_value_db_repo
+    ):
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get.return_value = {}
+        data_file_repo.get_daily_file_buffer.return_value = b"DATE;RR\n20250401;0,2\n"
+        with pytest.raises(MissingDailyData):
+            await fetch_daily_data_if_not_in_cache(
+                key_value_db_repo, data_file_repo, dt.date(2025, 4, 2)
+            )
+        key_value_db_repo.post.assert_not_called()
+        key_value_db_repo.release.assert_called_once_with(["20250402-20250402"])
 
     @pytest.mark.anyio
     async def test_fetch_daily_data_already_in_cache(
         self, data_file_repo, key_value_db_repo
     ):
         input_last_data_day = dt.date(2025, 4, 2)
-        key_value_db_repo.has.return_value = True
+        key_value_db_repo.claim.return_value = False
         with pytest.raises(AlreadyAddedData):
             await fetch_daily_data_if_not_in_cache(
                 key_value_db_repo, data_file_repo, input_last_data_day
             )
+        key_value_db_repo.claim.assert_called_once_with(["20250402-20250402"])
+        key_value_db_repo.get.assert_not_called()
+        key_value_db_repo.release.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_fetch_daily_data_releases_claim_on_failure(
+        self, data_file_repo, key_value_db_repo
+    ):
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get.side_effect = RuntimeError
+        with pytest.raises(RuntimeError):
+            await fetch_daily_data_if_not_in_cache(
+                key_value_db_repo, data_file_repo, dt.date(2025, 4, 2)
+            )
+        key_value_db_repo.release.assert_called_once_with(["20250402-20250402"])
+
+
+class TestBackfillDailyData:
+    @pytest.fixture
+    def begin_dates(self, data_file_repo) -> list[dt.date]:
+        begin_dates = []
+
+        async def mock_daily_file_buffer(begin_date):
+            begin_dates.append(begin_date)
+            return b"DATE;RR\n20250331;2\n20250401;0,5\n20250402;3\n"
+
+        data_file_repo.get_daily_file_buffer = mock_daily_file_buffer
+        return begin_dates
+
+    @pytest.mark.anyio
+    async def test_backfill_daily_data(
+        self, data_file_repo, key_value_db_repo, begin_dates
+    ):
+        key_value_db_repo.get.return_value = {
+            f"202503{day:02}-202503{day:02}": 1 for day in range(1, 31)
+        }
+        await backfill_daily_data(
+            key_value_db_repo,
+            data_file_repo,
+            dt.date(2025, 3, 31),
+            dt.date(2025, 4, 2),
+        )
+        assert begin_dates == [dt.date(2025, 3, 31)]
+        assert len(key_value_db_repo.get.call_args.kwargs["keys"]) == 36
+        key_value_db_repo.post.assert_called_once()
+        assert key_value_db_repo.post.call_args.args[0].df.rows() == [
+            ("20250331-20250331", 2),
+            ("20250301-20250331", 32),
+            ("20250301-20250331", 32),
+            ("20250401-20250401", 0.5),
+            ("20250401-20250401", 0.5),
+            ("20250302-20250401", 31.5),
+            ("20250402-20250402", 3),
+            ("20250401-20250402", 3.5),
+            ("20250303-20250402", 33.5),
+        ]
+
+    @pytest.mark.anyio
+    async def test_backfill_daily_data_missing_in_file(
+        self, data_file_repo, key_value_db_repo, begin_dates
+    ):
+        key_value_db_repo.get.return_value = {}
+        with pytest.raises(MissingDailyData):
+            await backfill_daily_data(
+                key_value_db_repo,
+                data_file_repo,
+                dt.date(2025, 4, 2),
+                dt.date(2025, 4, 3),
+            )
+        assert begin_dates == [dt.date(2025, 3, 3)]
+        key_value_db_repo.post.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_backfill_daily_data_already_added(
+        self, data_file_repo, key_value_db_repo, begin_dates
+    ):
+        key_value_db_repo.get.return_value = {
+            "20250301-20250331": 31,
+            "20250302-20250401": 31,
+            "20250303-20250402": 31,
+        }
+        with pytest.raises(AlreadyAddedData):
+            await backfill_daily_data(
+                key_value_db_repo,
+                data_file_repo,
+                dt.date(2025, 3, 31),
+                dt.date(2025, 4, 2),
+            )
+        assert begin_dates == []
+
+    @pytest.mark.anyio
+    async def test_backfill_daily_data_stored_as_previous_days(
+        self, data_file_repo, key_value_db_repo, begin_dates
+    ):
+        # Gap days rains were stored alone, as preceding days of a later day
+        key_value_db_repo.get.return_value = {
+            f"{day:%Y%m%d}-{day:%Y%m%d}": 1
+            for day in pl.date_range(
+                dt.date(2025, 3, 1), dt.date(2025, 4, 2), eager=True
+            )
+        } | {"20250303-20250402": 31}
+        await backfill_daily_data(
+            key_value_db_repo,
+            data_file_repo,
+            dt.date(2025, 3, 31),
+            dt.date(2025, 4, 2),
+        )
+        assert begin_dates == []
+        assert key_value_db_repo.post.call_args.args[0].df.rows() == [
+            ("20250331-20250331", 1),
+            ("20250301-20250331", 31),
+            ("20250301-20250331", 31),
+            ("20250401-20250401", 1),
+            ("20250401-20250401", 1),
+            ("20250302-20250401", 31),
+        ]
+
+    @pytest.mark.parametrize(
+        "begin_date, last_data_day",
+        [
+            # After last data day
+            (dt.date(2025, 4, 3), dt.date(2025, 4, 2)),
+            # Last 31 days window starts before first daily data file day
+            (dt.date(2025, 1, 10), dt.date(2025, 4, 2)),
+            # Gap over max days
+            (dt.date(2025, 3, 3), dt.date(2026, 3, 4)),
+        ],
+    )
+    @pytest.mark.anyio
+    async def test_backfill_daily_data_invalid_begin_date(
+        self, data_file_repo, key_value_db_repo, begin_date, last_data_day
+    ):
+        with pytest.raises(InvalidTimespan):
+            await backfill_daily_data(
+                key_value_db_repo, data_file_repo, begin_date, last_data_day
+            )
+        key_value_db_repo.get.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_backfill_daily_data_bounds(
+        self, data_file_repo, key_value_db_repo, begin_dates
+    ):
+        key_value_db_repo.get.return_value = {
+            "20250101-20250131": 31,
+            "20250102-20250201": 31,
+        }
+        assert MIN_BACKFILL_DAY == dt.date(2025, 1, 31)
+        with pytest.raises(AlreadyAddedData):
+            await backfill_daily_data(
+                key_value_db_repo,
+                data_file_repo,
+                MIN_BACKFILL_DAY,
+                dt.date(2025, 2, 1),
+                max_days=2,
+            )
+
+
+class TestScanBulkData:
+    @pytest.mark.anyio
+    async def test_scan_bulk_data(self, mocker, tmp_path):
+        input_file_path = tmp_path / "bulk_file.csv.gz"
+        with gzip.open(input_file_path, "wt") as bulk_file:
+            bulk_file.write(
+                "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR;TN\n"
+                "1;A;20250410;0.0;1\n"
+                "1;A;20250411;1.5;2\n"
+                "1;A;20250412;;3\n"
+                "2;B;20250412;3.0;4\n"
+                "1;A;20250416;4.0;5\n"
+            )
+        input_begin_date = dt.date(2025, 4, 11)
+        input_end_date = dt.date(2025, 4, 15)
+        expected_df = pl.DataFrame(
+            data={
+                "station_id": [1, 1],
+                "date": [20250411, 20250412],
+                "rainfall_mm": [1.5, None],
+            },
+            schema={"station_id": pl.Int64, "date": pl.Int64, "rainfall_mm": float},
+        )
+        result = _scan_bulk_data(input_file_path, input_begin_date, input_end_date, [1])
+        assert_frame_equal(result, expected_df)
+
+    @pytest.mark.anyio
+    async def test_scan_bulk_data_all_stations(self, tmp_path):
+        input_file_path = tmp_path / "bulk_file.csv"
+        input_file_path.write_text(
+            "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n"
+            "1;A;20250410;0.0\n"
+            "1;A;20250411;1.5\n"
+            "2;B;20250412;3.0\n"
+        )
+        input_begin_date = dt.date(2025, 4, 11)
+        input_end_date = dt.date(2025, 4, 15)
+        expected_df = pl.DataFrame(
+            data={
+                "station_id": [1, 2],
+                "date": [20250411, 20250412],
+                "rainfall_mm": [1.5, 3.0],
+            },
+            schema={"station_id": pl.Int64, "date": pl.Int64, "rainfall_mm": float},
+        )
+        result = _scan_bulk_data(input_file_path, input_begin_date, input_end_date)
+        assert_frame_equal(result, expected_df)
+
+
+class TestCacheBulkFile:
+    @pytest.mark.anyio
+    async def test_cache_bulk_file(self, tmp_path):
+        input_file_path = tmp_path / "bulk_file.csv"
+        input_file_path.write_text(
+            "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n"
+            "1;A;20250410;0.0\n"
+            "1;A;20250411;1.5\n"
+            "2;B;20250412;3.0\n"
+        )
+        input_cache_path = tmp_path / "cache" / "bulk_file.arrow"
+
+        _cache_bulk_file(input_file_path, input_cache_path)
+
+        assert not input_cache_path.with_suffix(".tmp").exists()
+        result = _scan_bulk_data(
+            input_cache_path, dt.date(2025, 4, 11), dt.date(2025, 4, 15), [1]
+        )
+        expected_df = pl.DataFrame(
+            data={"station_id": [1], "date": [20250411], "rainfall_mm": [1.5]},
+            schema={"station_id": pl.Int64, "date": pl.Int64, "rainfall_mm": float},
+        )
+        assert_frame_equal(result, expected_df)
+
+
+class TestGetBulkDataPath:
+    @pytest.fixture()
+    def bulk_file_path(self, tmp_path):
+        bulk_file_path = tmp_path / "bulk_file.csv"
+        bulk_file_path.write_text("NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n1;A;20250410;0.0\n")
+        return bulk_file_path
+
+    @pytest.fixture()
+    def data_file_repo(self, data_file_repo, bulk_file_path):
+        data_file_repo.get_bulk_file_version.return_value = "www.dgf.com/75 abc"
+
+        @asynccontextmanager
+        async def mock_get_bulk_file_path(department):
+            data_file_repo.downloads += 1
+            yield bulk_file_path
+
+        data_file_repo.downloads = 0
+        data_file_repo.get_bulk_file_path = mock_get_bulk_file_path
+        return data_file_repo
+
+    @pytest.mark.anyio
+    async def test_get_bulk_data_path_without_cache(
+        self, data_file_repo, bulk_file_path
+    ):
+        async with _get_bulk_data_path(data_file_repo, "75", None) as path:
+            assert path == bulk_file_path
+        data_file_repo.get_bulk_file_version.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_get_bulk_data_path_without_version(
+        self, data_file_repo, bulk_file_path, tmp_path
+    ):
+        data_file_repo.get_bulk_file_version.return_value = None
+        async with _get_bulk_data_path(data_file_repo, "75", tmp_path) as path:
+            assert path == bulk_file_path
+        assert list(tmp_path.glob("*.arrow")) == []
+
+    @pytest.mark.anyio
+    async def test_get_bulk_data_path_with_cache(self, data_file_repo, tmp_path):
+        cache_dir = tmp_path / "cache"
+        async with _get_bulk_data_path(data_file_repo, "75", cache_dir) as path:
+            assert path.parent == cache_dir
+            assert path.suffix == ".arrow"
+            assert pl.read_ipc(path)["station_id"].to_list() == [1]
+        async with _get_bulk_data_path(data_file_repo, "75", cache_dir) as same_path:
+            assert same_path == path
+        assert data_file_repo.downloads == 1
+        data_file_repo.get_bulk_file_version.assert_called_with("75")
+
+        data_file_repo.get_bulk_file_version.return_value = "www.dgf.com/75 def"
+        async with _get_bulk_data_path(data_file_repo, "75", cache_dir) as new_path:
+            assert new_path != path
+        assert data_file_repo.downloads == 2
 
 
 class TestPreprocessBulkData:
     @pytest.mark.anyio
-    async def test_preprocess_bulk_data(self, mocker):
+    async def test_preprocess_bulk_data(self):
         input_df = pl.DataFrame(
             data={
-                "station_id": [1, 1, 1, 2],
-                "date": [20250410, 20250411, 20250412, 20250413],
-                "rainfall_mm": [0, 1.5, 2, 3],
+                "station_id": [1, 1, 2],
+                "date": [20250411, 20250412, 20250413],
+                "rainfall_mm": [1.5, 2, None],
             },
             schema={"station_id": int, "date": int, "rainfall_mm": float},
         )
-        input_begin_date = dt.date(2025, 4, 11)
-        input_end_date = dt.date(2025, 4, 15)
         expected_df = pl.DataFrame(
             data={
-                "date": [dt.date(2025, 4, 11), dt.date(2025, 4, 12)],
-                "rainfall_mm": [1.5, 2],
-                "month": [4, 4],
-                "day": [11, 12],
+                "station_id": [1, 1, 2],
+                "date": [
+                    dt.date(2025, 4, 11),
+                    dt.date(2025, 4, 12),
+                    dt.date(2025, 4, 13),
+                ],
+                "rainfall_mm": [1.5, 2, None],
+                "month": [4, 4, 4],
+                "day": [11, 12, 13],
             },
             schema={
+                "station_id": int,
                 "date": dt.date,
                 "rainfall_mm": float,
                 "month": pl.Int8,
                 "day": pl.Int8,
             },
         )
-        mocker.patch("core.service.STATION_ID", 1)
-        result = await _preprocess_bulk_data(input_df, input_begin_date, input_end_date)
+        result = _preprocess_bulk_data(input_df)
         assert_frame_equal(result, expected_df)
 
 
-class TestGetMeanDataBetweenTwoMonDayDates:
+class TestComputeClimatologyIndexes:
     @pytest.mark.anyio
-    async def test_get_mean_data_between_two_mon_day_dates_normal_case(self):
-        input_beg_mon = 3
-        input_beg_day = 30
-        input_end_mon = 4
-        input_end_day = 2
-        input_number_of_years = 2
+    async def test_compute_climatology_indexes(self):
         input_df = pl.DataFrame(
             data={
+                "station_id": [2, 2, 2, 2, 1],
+                "date": [
+                    dt.date(2023, 1, 1),
+                    dt.date(2024, 1, 1),
+                    dt.date(2024, 2, 29),
+                    dt.date(2024, 12, 31),
+                    dt.date(2024, 3, 1),
+                ],
+                "rainfall_mm": [0.5, 1.2, 2, None, 0.3],
+                "month": [1, 1, 2, 12, 3],
+                "day": [1, 1, 29, 31, 1],
+            }
+        )
+        result_1, result_2 = _compute_climatology_indexes(input_df)
+
+        assert result_1.station_id == 1
+        assert result_1.number_of_years == 1
+        assert result_1.cumulated_rain_tenths == [0] * 61 + [3] * 306
+
+        assert result_2.station_id == 2
+        assert result_2.number_of_years == 2
+        cumsum = result_2.cumulated_rain_tenths
+        assert len(cumsum) == 367
+        assert cumsum[0] == 0
+        assert cumsum[1] == 17
+        assert cumsum[59] == 17
+        assert cumsum[60] == 37
+        assert cumsum[366] == 37
+
+
+class TestComputeHistoryMeans:
+    @pytest.mark.anyio
+    async def test_compute_history_means(self):
+        input_df = pl.DataFrame(
+            data={
+                "station_id": [75114001] * 8,
                 "date": [
                     dt.date(2024, 3, 29),
                     dt.date(2024, 3, 30),
@@ -195,26 +705,20 @@ class TestGetMeanDataBetweenTwoMonDayDates:
                 "day": [29, 30, 1, 2, 30, 1, 2, 3],
             }
         )
-        expected_mean = 10.5
-        result = await _get_mean_data_between_two_mon_day_dates(
-            input_df,
-            input_beg_mon,
-            input_beg_day,
-            input_end_mon,
-            input_end_day,
-            input_number_of_years,
-        )
-        assert result == expected_mean
+        input_indexes = _compute_climatology_indexes(input_df)
+        results = _compute_history_means(input_indexes).df.rows()
+        assert len(results) == 366 * 2 + 30
+        assert results[0] == ("M0101-M0101", 0)
+        assert results[1] == ("M1202-M0101", 0)
+        april_2nd_idx = results.index(("M0401-M0402", 8))
+        assert results[april_2nd_idx + 1] == ("M0303-M0402", 10.8)
+        assert ("M0330-M0402", 10.5) not in results
 
     @pytest.mark.anyio
-    async def test_get_mean_data_between_two_mon_day_dates_between_years(self):
-        input_beg_mon = 12
-        input_beg_day = 31
-        input_end_mon = 1
-        input_end_day = 2
-        input_number_of_years = 2
+    async def test_compute_history_means_between_years(self):
         input_df = pl.DataFrame(
             data={
+                "station_id": [75114001] * 8,
                 "date": [
                     dt.date(2023, 12, 30),
                     dt.date(2023, 12, 31),
@@ -230,52 +734,19 @@ class TestGetMeanDataBetweenTwoMonDayDates:
                 "day": [30, 31, 1, 2, 31, 1, 2, 3],
             }
         )
-        expected_mean = 10.5
-        result = await _get_mean_data_between_two_mon_day_dates(
-            input_df,
-            input_beg_mon,
-            input_beg_day,
-            input_end_mon,
-            input_end_day,
-            input_number_of_years,
-        )
-        assert result == expected_mean
-
-
-class TestComputeHistoryMeans:
-    @pytest.mark.anyio
-    async def test_compute_history_means(self):
-        input_df = pl.DataFrame(
-            data={
-                "date": [
-                    dt.date(2024, 3, 29),
-                    dt.date(2024, 3, 30),
-                    dt.date(2024, 4, 1),
-                    dt.date(2024, 4, 2),
-                    dt.date(2025, 3, 30),
-                    dt.date(2025, 4, 1),
-                    dt.date(2025, 4, 2),
-                    dt.date(2025, 4, 3),
-                ],
-                "rainfall_mm": [0.5, 1, 2, 3, 4, 5, 6, 7],
-                "month": [3, 3, 4, 4, 3, 4, 4, 4],
-                "day": [29, 30, 1, 2, 30, 1, 2, 3],
-            }
-        )
-        input_this_day = dt.date(2000, 4, 2)
-        input_number_of_years = 2
-        result_rain_1, result_rain_2 = await _compute_history_means(
-            input_df, input_this_day, input_number_of_years
-        )
-        expected_rain_1 = RainStore(timespan_id="M0401-M0402", rain_mm=8)
-        expected_rain_2 = RainStore(timespan_id="M0303-M0402", rain_mm=10.8)
-        assert result_rain_1 == expected_rain_1
-        assert result_rain_2 == expected_rain_2
+        input_indexes = _compute_climatology_indexes(input_df)
+        results = _compute_history_means(input_indexes).df.rows()
+        # data spans over 2023, 2024 and 2025 years
+        assert results[2:4] == [
+            ("M0101-M0102", 5.3),
+            ("M1203-M0102", 7.2),
+        ]
 
     @pytest.mark.anyio
     async def test_compute_history_means_leap_year_case(self):
         input_df = pl.DataFrame(
             data={
+                "station_id": [75114001] * 8,
                 "date": [
                     dt.date(2024, 2, 28),
                     dt.date(2024, 2, 29),
@@ -291,45 +762,219 @@ class TestComputeHistoryMeans:
                 "day": [28, 29, 1, 2, 28, 1, 2, 3],
             }
         )
-        input_this_day = dt.date(2000, 3, 2)
-        input_number_of_years = 2
-        results = await _compute_history_means(
-            input_df, input_this_day, input_number_of_years
-        )
+        input_indexes = _compute_climatology_indexes(input_df)
+        results = _compute_history_means(input_indexes).df.rows()
+        march_2nd_idx = results.index(("M0301-M0302", 8))
         expected = [
-            RainStore(timespan_id="M0301-M0302", rain_mm=8),
-            RainStore(timespan_id="M0201-M0302", rain_mm=10.8),
-            RainStore(timespan_id="M0131-M0302", rain_mm=10.8),
+            ("M0301-M0302", 8),
+            ("M0201-M0302", 10.8),
+            ("M0131-M0302", 10.8),
+            ("M0301-M0303", 11.5),
+        ]
+        assert results[march_2nd_idx : march_2nd_idx + 4] == expected
+        assert ("M0301-M0331", 11.5) in results
+        assert ("M0228-M0331", 0) not in results
+
+    @pytest.mark.anyio
+    async def test_compute_history_means_multiple_stations(self):
+        input_indexes = [
+            ClimatologyIndex(
+                station_id=75114001,
+                number_of_years=1,
+                cumulated_rain_tenths=[0] + [10] * 366,
+            ),
+            ClimatologyIndex(
+                station_id=75116001,
+                number_of_years=2,
+                cumulated_rain_tenths=[0] + [30] * 366,
+            ),
+        ]
+        results = _compute_history_means(input_indexes).df.rows()
+        assert len(results) == 2 * (366 * 2 + 30)
+        assert results[:2] == [
+            ("M0101-M0101", 1),
+            ("M1202-M0101", 1),
         ]
-        assert results == expected
+        assert results[762:764] == [
+            ("75116001#M0101-M0101", 1.5),
+            ("75116001#M1202-M0101", 1.5),
+        ]
+        assert results[-1] == ("75116001#M1201-M1231", 0)
+
+    @pytest.mark.anyio
+    async def test_compute_history_means_rounds_half_up(self, key_value_db_repo):
+        # 52.5 tenths of mm on average : 5.25 mm, rounded as index means are
+        index = ClimatologyIndex(
+            station_id=75114001,
+            number_of_years=2,
+            cumulated_rain_tenths=[0] + [105] * 366,
+        )
+        results = _compute_history_means([index]).to_dict()
+        key_value_db_repo.get_index.return_value = index
+        index_mean = await get_mean_data(key_value_db_repo, "M0101-M0101")
+        assert results["M0101-M0101"] == float(index_mean.rain_mm) == 5.3
+
+
+class TestRunBlocking:
+    @pytest.mark.anyio
+    async def test_run_blocking_out_of_event_loop(self):
+        result = await _run_blocking(threading.current_thread)
+        assert result is not threading.main_thread()
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("configured", [True, False])
+    async def test_run_blocking_executor(self, mocker, configured):
+        with ThreadPoolExecutor(thread_name_prefix="compute") as executor:
+            if configured:
+                mocker.patch("core.service.compute_executor", executor)
+                kwargs = {}
+            else:
+                kwargs = {"executor": executor}
+            result = await _run_blocking(
+                lambda prefix: threading.current_thread().name.startswith(prefix),
+                "compute",
+                **kwargs,
+            )
+        assert result
+
+
+class TestComputeBulkFileIndexes:
+    def test_compute_bulk_file_indexes(self, tmp_path):
+        input_file_path = tmp_path / "bulk_file.csv"
+        input_file_path.write_text(
+            "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n"
+            "75114001;A;20200101;1.0\n"
+            "75116001;B;20200101;2.0\n"
+        )
+        (result,) = _compute_bulk_file_indexes(
+            input_file_path, dt.date(2020, 1, 1), dt.date(2020, 12, 31), [75116001]
+        )
+        assert result.station_id == 75116001
+        assert result.cumulated_rain_tenths == [0] + [20] * 366
 
 
 class TestInitializeMeanData:
     @pytest.mark.anyio
-    async def test_initialize_mean_data(self, mocker, data_file_repo, key_value_db_repo):
+    async def test_initialize_mean_data(
+        self, mocker, data_file_repo, key_value_db_repo
+    ):
         input_year_beg_incl = 2020
         input_year_end_incl = 2020
-        key_value_db_repo.has.return_value = False
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get_index.return_value = None
 
         @asynccontextmanager
-        async def mock_get_bulk_file_path():
-            yield Path(__file__).parent.joinpath("resources", "input_init_mean_data.csv")
+        async def mock_get_bulk_file_path(department):
+            yield Path(__file__).parent.joinpath(
+                "resources", "input_init_mean_data.csv"
+            )
 
         data_file_repo.get_bulk_file_path = mock_get_bulk_file_path
-        mocker.patch("core.service.STATION_ID", 75000001)
         compute_history_patch = mocker.patch(
-            "core.service._compute_history_means", return_value=[5, 5]
+            "core.service._compute_history_means", return_value=[5] * 762
         )
 
         await initialize_mean_data(
-            key_value_db_repo, data_file_repo, input_year_beg_incl, input_year_end_incl
+            key_value_db_repo,
+            data_file_repo,
+            input_year_beg_incl,
+            input_year_end_incl,
+            [75000001, 75000001],
+            scalar_means=True,
         )
 
-        assert compute_history_patch.call_args_list[0] == call(
-            mocker.ANY, dt.date(2000, 1, 1), 1
+        key_value_db_repo.claim.assert_called_once_with(
+            [_initialization_claim_key([75000001])]
         )
-        assert compute_history_patch.call_count == 366
-        key_value_db_repo.post.assert_called_once_with(rains=[5] * 732)
+        key_value_db_repo.get_index.assert_called_once_with(75000001)
+        compute_history_patch.assert_called_once_with(mocker.ANY)
+        (index,) = compute_history_patch.call_args.args[0]
+        assert index.station_id == 75000001
+        assert index.number_of_years == 1
+        key_value_db_repo.post.assert_called_once_with(rains=[5] * 762)
+        key_value_db_repo.post_index.assert_called_once_with(index)
+
+    @pytest.mark.anyio
+    async def test_initialize_mean_data_all_stations(
+        self, mocker, data_file_repo, key_value_db_repo, tmp_path
+    ):
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get_index.return_value = None
+        input_file_path = tmp_path / "bulk_file.csv"
+        input_file_path.write_text(
+            "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n"
+            "75114001;A;20200101;1.0\n"
+            "75116001;B;20200101;2.0\n"
+        )
+
+        @asynccontextmanager
+        async def mock_get_bulk_file_path(department):
+            yield input_file_path
+
+        data_file_repo.get_bulk_file_path = mock_get_bulk_file_path
+        compute_history_patch = mocker.patch(
+            "core.service._compute_history_means", return_value=[5] * 1524
+        )
+
+        await initialize_mean_data(
+            key_value_db_repo, data_file_repo, 2020, 2020, scalar_means=True
+        )
+
+        key_value_db_repo.claim.assert_called_once_with(["ALL#INDEX#M0101-M0101"])
+        assert key_value_db_repo.get_index.call_args_list == [
+            call(75114001),
+            call(75116001),
+        ]
+        indexes = compute_history_patch.call_args.args[0]
+        assert [index.station_id for index in indexes] == [75114001, 75116001]
+        key_value_db_repo.post.assert_called_once_with(rains=[5] * 1524)
+        assert key_value_db_repo.post_index.call_args_list == [
+            call(index) for index in indexes
+        ]
+
+    @pytest.mark.anyio
+    async def test_initialize_mean_data_departments(
+        self, mocker, data_file_repo, key_value_db_repo, tmp_path
+    ):
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get_index.return_value = None
+        for department, station_id in [("75", 75114001), ("92", 92073001)]:
+            tmp_path.joinpath(f"{department}.csv").write_text(
+                f"NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n{station_id};A;20200101;1.0\n"
+            )
+
+        @asynccontextmanager
+        async def mock_get_bulk_file_path(department):
+            yield tmp_path / f"{department}.csv"
+
+        data_file_repo.get_bulk_file_path = mock_get_bulk_file_path
+        data_file_repo.get_bulk_file_version.side_effect = lambda department: (
+            f"www.dgf.com/{department} abc"
+        )
+        mocker.patch(
+            "core.service.ProcessPoolExecutor",
+            lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+        )
+        compute_history_patch = mocker.patch(
+            "core.service._compute_history_means", return_value=[5] * 1524
+        )
+
+        await initialize_mean_data(
+            key_value_db_repo,
+            data_file_repo,
+            2020,
+            2020,
+            departments=["75", "92"],
+            max_concurrency=2,
+            process_workers=2,
+            cache_dir=tmp_path / "cache",
+        )
+
+        compute_history_patch.assert_not_called()
+        key_value_db_repo.post.assert_not_called()
+        indexes = [c.args[0] for c in key_value_db_repo.post_index.call_args_list]
+        assert [index.station_id for index in indexes] == [75114001, 92073001]
+        assert len(list(tmp_path.joinpath("cache").glob("*.arrow"))) == 2
 
     @pytest.mark.anyio
     async def test_initialize_mean_data_raise_if_already_init(
@@ -337,7 +982,7 @@ class TestInitializeMeanData:
     ):
         input_year_beg_incl = 2020
         input_year_end_incl = 2020
-        key_value_db_repo.has.return_value = True
+        key_value_db_repo.claim.return_value = False
 
         with pytest.raises(AlreadyInitialized):
             await initialize_mean_data(
@@ -345,7 +990,129 @@ class TestInitializeMeanData:
                 data_file_repo,
                 input_year_beg_incl,
                 input_year_end_incl,
+                [75114001, 75116001],
+            )
+        key_value_db_repo.claim.assert_called_once_with(
+            [_initialization_claim_key([75116001, 75114001])]
+        )
+        data_file_repo.get_bulk_file_version.assert_not_called()
+        key_value_db_repo.post.assert_not_called()
+        key_value_db_repo.release.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_initialize_mean_data_stations_raise_if_already_init(
+        self, data_file_repo, key_value_db_repo, index
+    ):
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get_index.side_effect = [None, index]
+
+        with pytest.raises(AlreadyInitialized):
+            await initialize_mean_data(
+                key_value_db_repo, data_file_repo, 2020, 2020, [75116001, 75114001]
             )
+        data_file_repo.get_bulk_file_version.assert_not_called()
+        key_value_db_repo.release.assert_called_once_with(
+            [_initialization_claim_key([75114001, 75116001])]
+        )
+
+    def test_initialization_claim_key(self):
+        stations_key = _initialization_claim_key(list(range(1000)))
+        assert stations_key.startswith("STATIONS#")
+        assert stations_key.endswith("#INDEX#M0101-M0101")
+        assert stations_key == _initialization_claim_key(list(range(999, -1, -1)))
+        assert stations_key != _initialization_claim_key(list(range(999)))
+        assert _initialization_claim_key(None) == "ALL#INDEX#M0101-M0101"
+
+    @pytest.mark.anyio
+    async def test_initialize_mean_data_all_stations_skips_initialized(
+        self, mocker, data_file_repo, key_value_db_repo, tmp_path, index
+    ):
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get_index.side_effect = [None, index]
+        input_file_path = tmp_path / "bulk_file.csv"
+        input_file_path.write_text(
+            "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n"
+            "75114001;A;20200101;1.0\n"
+            "75116001;B;20200101;2.0\n"
+        )
+
+        @asynccontextmanager
+        async def mock_get_bulk_file_path(department):
+            yield input_file_path
+
+        data_file_repo.get_bulk_file_path = mock_get_bulk_file_path
+        compute_history_patch = mocker.patch(
+            "core.service._compute_history_means", return_value=[5] * 762
+        )
+
+        await initialize_mean_data(
+            key_value_db_repo, data_file_repo, 2020, 2020, scalar_means=True
+        )
+
+        indexes = compute_history_patch.call_args.args[0]
+        assert [index.station_id for index in indexes] == [75114001]
+        key_value_db_repo.post_index.assert_called_once_with(indexes[0])
+        key_value_db_repo.release.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_initialize_mean_data_all_stations_raise_if_already_init(
+        self, data_file_repo, key_value_db_repo, tmp_path, index
+    ):
+        key_value_db_repo.claim.return_value = True
+        key_value_db_repo.get_index.return_value = index
+        input_file_path = tmp_path / "bulk_file.csv"
+        input_file_path.write_text(
+            "NUM_POSTE;NOM_USUEL;AAAAMMJJ;RR\n"
+            "75114001;A;20200101;1.0\n"
+            "75116001;B;20200101;2.0\n"
+        )
+
+        @asynccontextmanager
+        async def mock_get_bulk_file_path(department):
+            yield input_file_path
+
+        data_file_repo.get_bulk_file_path = mock_get_bulk_file_path
+
+        with pytest.raises(AlreadyInitialized):
+            await initialize_mean_data(key_value_db_repo, data_file_repo, 2020, 2020)
+        key_value_db_repo.post.assert_not_called()
+        key_value_db_repo.release.assert_called_once_with(["ALL#INDEX#M0101-M0101"])
+
+
+class TestGetMeanData:
+    @pytest.mark.anyio
+    async def test_get_mean_data(self, key_value_db_repo, index):
+        key_value_db_repo.get_index.return_value = index
+        result = await get_mean_data(key_value_db_repo, "M0301-M0303")
+        assert result == RainStore(timespan_id="M0301-M0303", rain_mm=1.5)
+        key_value_db_repo.get_index.assert_called_once_with(75114001)
+
+    @pytest.mark.anyio
+    async def test_get_mean_data_between_years(self, key_value_db_repo, index):
+        key_value_db_repo.get_index.return_value = index
+        result = await get_mean_data(key_value_db_repo, "M1231-M0102")
+        assert result == RainStore(timespan_id="M1231-M0102", rain_mm=1.5)
+
+    @pytest.mark.anyio
+    async def test_get_mean_data_rounds_half_up(self, key_value_db_repo, index):
+        index.cumulated_rain_tenths[1:] = [
+            v + 1 for v in index.cumulated_rain_tenths[1:]
+        ]
+        key_value_db_repo.get_index.return_value = index
+        result = await get_mean_data(key_value_db_repo, "M0101-M0101")
+        assert result == RainStore(timespan_id="M0101-M0101", rain_mm=0.6)
+
+    @pytest.mark.anyio
+    async def test_get_mean_data_raise_if_invalid_timespan(self, key_value_db_repo):
+        with pytest.raises(InvalidTimespan):
+            await get_mean_data(key_value_db_repo, "M0230-M0303")
+        key_value_db_repo.get_index.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_get_mean_data_raise_if_not_initialized(self, key_value_db_repo):
+        key_value_db_repo.get_index.return_value = None
+        with pytest.raises(NotInitialized):
+            await get_mean_data(key_value_db_repo, "M0301-M0303")
 
 
 class TestGetLastDataDate:
@@ -355,3 +1122,15 @@ class TestGetLastDataDate:
         result = await get_last_data_date(data_file_repo)
         data_file_repo.get_last_data_date.assert_called_once()
         assert result == dt.date(2025, 4, 1)
+
+
+class TestGetNextDataDatetime:
+    @pytest.mark.anyio
+    async def test_get_next_data_datetime(self, data_file_repo):
+        expected = dt.datetime(2025, 4, 3, 11, 35, tzinfo=dt.timezone.utc)
+        data_file_repo.get_next_data_datetime.return_value = expected
+        result = await get_next_data_datetime(data_file_repo, dt.date(2025, 4, 1))
+        data_file_repo.get_next_data_datetime.assert_called_once_with(
+            dt.date(2025, 4, 1)
+        )
+        assert result == expected
@@ -0,0 +1,129 @@
+import polars as pl
+import pytest
+from pandera.errors import SchemaError
+
+from core.entities import BulkFileSchema, CurrentFileSchema
+from core.exceptions import InvalidDataFile
+from core.validation import ColumnSchema, FrameSchema, ValidationReport, Violation
+
+
+@pytest.fixture
+def bulk_df() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "station_id": [75114001, 75116001, 92073001],
+            "date": [20200101, 20200102, 20200103],
+            "rainfall_mm": [0.0, None, 2.5],
+        }
+    )
+
+
+class TestColumnSchema:
+    @pytest.mark.parametrize(
+        ("column", "expected_check", "expected_failures"),
+        [
+            (ColumnSchema(pl.Int64, min_value=0, max_value=2), "in_range(0, 2)", 2),
+            (ColumnSchema(pl.Int64, min_value=0), "greater_than_or_equal_to(0)", 1),
+            (ColumnSchema(pl.Int64, max_value=2), "less_than_or_equal_to(2)", 1),
+        ],
+    )
+    def test_range_check(self, column, expected_check, expected_failures):
+        check_name, failure = column.range_check("value")
+        assert check_name == expected_check
+        df = pl.DataFrame({"value": [-1, 0, 2, 3, None]})
+        assert df.select(failure.sum()).item() == expected_failures
+
+    def test_range_check_unbounded(self):
+        assert ColumnSchema(pl.Int64).range_check("value") is None
+
+
+class TestFrameSchema:
+    def test_validate(self, bulk_df):
+        report = BulkFileSchema.validate(bulk_df)
+        assert report == ValidationReport("BulkFileSchema", 3, [])
+        assert report.is_valid
+        assert str(report) == "BulkFileSchema of 3 rows: valid"
+
+    def test_validate_reports_every_failing_check(self):
+        df = pl.DataFrame(
+            {
+                "station_id": [1, None, 75114001],
+                "date": [20200101, 20990101, 20200103],
+                "rainfall_mm": [-1.0, None, 2.5],
+            }
+        )
+        report = BulkFileSchema.validate(df)
+        assert not report.is_valid
+        assert report.violations == [
+            Violation("station_id", "not_nullable", 1),
+            Violation("station_id", "in_range(1000000, 99000000)", 1),
+            Violation("date", "in_range(19500101, 20250101)", 1),
+            Violation("rainfall_mm", "greater_than_or_equal_to(0.0)", 1),
+        ]
+        assert "station_id not_nullable (1 rows)" in str(report)
+
+    def test_validate_frame_schema(self):
+        df = pl.DataFrame({"date": ["20250101"]})
+        report = CurrentFileSchema.validate(df)
+        assert report.violations == [
+            Violation("date", "dtype('Int64')"),
+            Violation("rainfall_mm", "column_in_dataframe"),
+        ]
+        assert str(report) == (
+            "CurrentFileSchema of 1 rows: date dtype('Int64'),"
+            " rainfall_mm column_in_dataframe"
+        )
+
+    def test_validate_without_checks(self):
+        schema = FrameSchema("Schema", {"value": ColumnSchema(pl.Int64, True)})
+        assert schema.validate(pl.DataFrame({"value": [None, 1]})).is_valid
+
+    def test_validate_pattern(self):
+        schema = FrameSchema(
+            "Schema", {"value": ColumnSchema(pl.String, pattern=r"^\d+$")}
+        )
+        report = schema.validate(pl.DataFrame({"value": ["12", "1a", "b"]}))
+        assert report.violations == [Violation("value", r"str_matches(^\d+$)", 2)]
+
+    def test_checks_compiled_once(self):
+        schema = FrameSchema("Schema", {"value": ColumnSchema(pl.Int64)})
+        assert schema.checks is schema.checks
+
+    def test_raise_if_invalid(self, bulk_df):
+        BulkFileSchema.raise_if_invalid(bulk_df)
+        with pytest.raises(InvalidDataFile) as exc_info:
+            BulkFileSchema.raise_if_invalid(
+                bulk_df.with_columns(pl.lit(-1.0).alias("rainfall_mm"))
+            )
+        assert exc_info.value.report.violations == [
+            Violation("rainfall_mm", "greater_than_or_equal_to(0.0)", 3)
+        ]
+
+    def test_raise_if_invalid_strict(self, mocker, bulk_df):
+        BulkFileSchema.raise_if_invalid(bulk_df, strict=True)
+        mocker.patch.object(
+            FrameSchema, "validate", return_value=ValidationReport("Schema", 3)
+        )
+        with pytest.raises(SchemaError):
+            BulkFileSchema.raise_if_invalid(
+                bulk_df.with_columns(pl.lit(-1.0).alias("rainfall_mm")), strict=True
+            )
+
+    @pytest.mark.parametrize(
+        ("column", "invalid_value"),
+        [
+            (ColumnSchema(pl.Int64, min_value=0, max_value=2), 3),
+            (ColumnSchema(pl.Int64, min_value=0), -1),
+            (ColumnSchema(pl.Int64, max_value=2), 3),
+            (ColumnSchema(pl.Int64), None),
+            (ColumnSchema(pl.String, pattern=r"^\d$"), "a"),
+        ],
+    )
+    def test_to_pandera(self, column, invalid_value):
+        pandera_schema = FrameSchema("Schema", {"value": column}).to_pandera()
+        valid_value = "1" if column.dtype == pl.String else 1
+        pandera_schema.validate(pl.DataFrame({"value": [valid_value]}))
+        with pytest.raises(SchemaError):
+            pandera_schema.validate(
+                pl.DataFrame({"value": [invalid_value]}, schema={"value": column.dtype})
+            )
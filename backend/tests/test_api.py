@@ -1,20 +1,123 @@
 import datetime as dt
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
+from fastapi import FastAPI
+from freezegun import freeze_time
 from httpx import ASGITransport, AsyncClient
 
-from api import app, get_last_data_day
-from core.entities import RainCompleteInfo
-from core.exceptions import AlreadyAddedData, AlreadyInitialized
+import core.service
+from api import (
+    app,
+    configure_compute_executor,
+    configure_key_value_db,
+    get_etag,
+    get_key_value_db_repo,
+    get_last_data_day,
+    lifespan,
+)
+from backend.aws.key_value_db_repository import KeyValueDbRepository
+from backend.cache.key_value_db_repository import (
+    KeyValueDbRepository as CachedKeyValueDbRepository,
+)
+from backend.sqlite.key_value_db_repository import (
+    KeyValueDbRepository as SqliteKeyValueDbRepository,
+)
+from core.entities import RainCompleteInfo, RainStore
+from core.exceptions import (
+    AlreadyAddedData,
+    AlreadyInitialized,
+    InvalidDataFile,
+    InvalidTimespan,
+    MissingDailyData,
+    NotInitialized,
+)
 
 
 @pytest.fixture
-async def async_client():
+async def async_client(mocker):
+    # Routes get a mocked key value db, instead of opening the DynamoDb pool
+    dependency_overrides = app.dependency_overrides.copy()
+    key_value_db_repo_mock = mocker.Mock()
+    app.dependency_overrides[KeyValueDbRepository] = lambda: key_value_db_repo_mock
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as ac:
         yield ac
+    app.dependency_overrides = dependency_overrides
+
+
+@pytest.fixture
+def session_pool_mock(mocker):
+    session_pool_mock = mocker.patch("api.get_client_session_pool").return_value
+    session_pool_mock.open = mocker.AsyncMock()
+    session_pool_mock.close = mocker.AsyncMock()
+    return session_pool_mock
+
+
+@pytest.mark.anyio
+async def test_lifespan(mocker, session_pool_mock):
+    pool_mock = mocker.patch("api.get_dynamodb_pool").return_value
+    pool_mock.open = mocker.AsyncMock()
+    pool_mock.close = mocker.AsyncMock()
+    async with lifespan(app):
+        pool_mock.open.assert_awaited_once()
+        session_pool_mock.open.assert_awaited_once()
+        pool_mock.close.assert_not_awaited()
+        session_pool_mock.close.assert_not_awaited()
+    pool_mock.close.assert_awaited_once()
+    session_pool_mock.close.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_lifespan_sqlite(mocker, settings, session_pool_mock):
+    settings.sqlite_db_path = "test.db"
+    mocker.patch("api.settings", settings)
+    pool_mock = mocker.patch("api.get_dynamodb_pool")
+    async with lifespan(app):
+        pass
+    pool_mock.assert_not_called()
+    session_pool_mock.close.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_lifespan_closes_on_error(mocker, settings, session_pool_mock):
+    settings.sqlite_db_path = "test.db"
+    mocker.patch("api.settings", settings)
+    with pytest.raises(RuntimeError):
+        async with lifespan(app):
+            raise RuntimeError
+    session_pool_mock.close.assert_awaited_once()
+
+
+def test_configure_key_value_db(mocker, settings):
+    mocker.patch("api.settings", settings)
+    dynamodb_app = FastAPI()
+    configure_key_value_db(dynamodb_app)
+    assert dynamodb_app.dependency_overrides == {}
+
+    settings.sqlite_db_path = "test.db"
+    sqlite_app = FastAPI()
+    configure_key_value_db(sqlite_app)
+    assert sqlite_app.dependency_overrides == {
+        KeyValueDbRepository: SqliteKeyValueDbRepository
+    }
+
+
+@pytest.mark.parametrize("thread_workers", [0, 2])
+def test_configure_compute_executor(mocker, settings, thread_workers):
+    settings.compute_thread_workers = thread_workers
+    mocker.patch("api.settings", settings)
+    mocker.patch("api.core_service.compute_executor", None)
+    configure_compute_executor()
+    executor = core.service.compute_executor
+    if thread_workers:
+        assert isinstance(executor, ThreadPoolExecutor)
+        assert executor._max_workers == thread_workers
+        executor.shutdown()
+    else:
+        assert executor is None
 
 
 @pytest.mark.anyio
@@ -29,24 +132,107 @@ async def test_get_last_data_day(mocker):
 
 
 @pytest.mark.anyio
-async def test_get(mocker, async_client):
-    expected_date = dt.date(2025, 4, 1)
-    mocker.patch("api.core_service.get_last_data_date", return_value=expected_date)
-    expected_data = RainCompleteInfo(
-        last_day=dt.date(2025, 4, 1),
-        last_day_rain_mm=0,
-        month_beg=dt.date(2025, 4, 1),
-        since_month_beg_mm=0,
-        mean_month_beg_mm=2,
-        prev_30_days=dt.date(2025, 3, 2),
-        last_31_days_mm=56.5,
-        mean_31_days_mm=72.3,
+class TestGet:
+    @pytest.fixture(autouse=True)
+    def mock_dates(self, mocker):
+        mocker.patch(
+            "api.core_service.get_last_data_date", return_value=dt.date(2025, 4, 1)
+        )
+        mocker.patch(
+            "api.core_service.get_next_data_datetime",
+            return_value=dt.datetime(2025, 4, 3, 11, 35, tzinfo=dt.timezone.utc),
+        )
+
+    async def test_get(self, mocker, async_client):
+        expected_date = dt.date(2025, 4, 1)
+        expected_data = RainCompleteInfo(
+            last_day=dt.date(2025, 4, 1),
+            last_day_rain_mm=0,
+            month_beg=dt.date(2025, 4, 1),
+            since_month_beg_mm=0,
+            mean_month_beg_mm=2,
+            prev_30_days=dt.date(2025, 3, 2),
+            last_31_days_mm=56.5,
+            mean_31_days_mm=72.3,
+        )
+        service_mock = mocker.patch(
+            "api.core_service.get_data", return_value=expected_data
+        )
+        with freeze_time("2025-04-03 10:35:00"):
+            response = await async_client.get("/")
+        assert response.status_code == 200
+        assert response.json() == json.loads(expected_data.model_dump_json())
+        assert response.headers["etag"] == get_etag(expected_date)
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        service_mock.assert_called_once_with(mocker.ANY, expected_date)
+
+    async def test_get_not_initialized(self, mocker, async_client):
+        mocker.patch("api.core_service.get_data", side_effect=NotInitialized)
+        response = await async_client.get("/")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Key value DB is not initialized yet."}
+
+    @pytest.mark.parametrize(
+        "if_none_match",
+        [
+            '"20250401-{version}"',
+            'W/"other", "20250401-{version}"',
+            'W/"20250401-{version}"',
+            "*",
+        ],
     )
-    service_mock = mocker.patch("api.core_service.get_data", return_value=expected_data)
-    response = await async_client.get("/")
-    assert response.status_code == 200
-    assert response.json() == json.loads(expected_data.model_dump_json())
-    service_mock.assert_called_once_with(mocker.ANY, expected_date)
+    async def test_get_not_modified(self, mocker, async_client, if_none_match):
+        version = get_etag(dt.date(2025, 4, 1)).strip('"').split("-")[1]
+        service_mock = mocker.patch("api.core_service.get_data")
+        with freeze_time("2025-04-04 10:35:00"):
+            response = await async_client.get(
+                "/", headers={"If-None-Match": if_none_match.format(version=version)}
+            )
+        assert response.status_code == 304
+        assert response.headers["etag"] == get_etag(dt.date(2025, 4, 1))
+        assert response.headers["cache-control"] == "public, max-age=0"
+        service_mock.assert_not_called()
+
+    def test_get_etag(self, mocker, settings):
+        etag = get_etag(dt.date(2025, 4, 1))
+        assert etag.startswith('"20250401-') and etag.endswith('"')
+        assert get_etag(dt.date(2025, 4, 2)) != etag
+        settings.year_beg_incl = 1991
+        mocker.patch("api.settings", settings)
+        assert get_etag(dt.date(2025, 4, 1)) != etag
+
+
+@pytest.mark.anyio
+class TestGetMean:
+    async def test_get_mean_normal_case(self, mocker, async_client):
+        expected_data = RainStore(timespan_id="M1215-M0115", rain_mm=52.1)
+        service_mock = mocker.patch(
+            "api.core_service.get_mean_data", return_value=expected_data
+        )
+        response = await async_client.get("/mean?timespan_id=M1215-M0115")
+        assert response.status_code == 200
+        assert response.json() == json.loads(expected_data.model_dump_json())
+        service_mock.assert_called_once_with(mocker.ANY, "M1215-M0115")
+
+    async def test_get_mean_not_initialized_case(self, mocker, async_client):
+        mocker.patch("api.core_service.get_mean_data", side_effect=NotInitialized)
+        response = await async_client.get("/mean?timespan_id=M1215-M0115")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Key value DB is not initialized yet."}
+
+    async def test_get_mean_invalid_timespan_case(self, mocker, async_client):
+        mocker.patch("api.core_service.get_mean_data", side_effect=InvalidTimespan)
+        response = await async_client.get("/mean?timespan_id=M0230-M0315")
+        assert response.status_code == 422
+        assert response.json() == {
+            "detail": "Timespan is not made of valid calendar days."
+        }
+
+    async def test_get_mean_wrong_format_case(self, mocker, async_client):
+        service_mock = mocker.patch("api.core_service.get_mean_data")
+        response = await async_client.get("/mean?timespan_id=20250101-20250102")
+        assert response.status_code == 422
+        service_mock.assert_not_called()
 
 
 @pytest.mark.anyio
@@ -57,7 +243,9 @@ class TestAdd:
         service_mock = mocker.patch("api.core_service.fetch_daily_data_if_not_in_cache")
         response = await async_client.get("/add")
         assert response.status_code == 201
-        service_mock.assert_called_once_with(mocker.ANY, mocker.ANY, expected_date)
+        service_mock.assert_called_once_with(
+            mocker.ANY, mocker.ANY, expected_date, strict_validation=False
+        )
 
     async def test_add_already_added_data_case(self, mocker, async_client):
         expected_date = dt.date(2025, 4, 1)
@@ -69,7 +257,98 @@ class TestAdd:
         response = await async_client.get("/add")
         assert response.status_code == 409
         assert response.json() == {"detail": "Data is already in backend."}
-        service_mock.assert_called_once_with(mocker.ANY, mocker.ANY, expected_date)
+        service_mock.assert_called_once_with(
+            mocker.ANY, mocker.ANY, expected_date, strict_validation=False
+        )
+
+    async def test_add_missing_daily_data_case(self, mocker, async_client):
+        mocker.patch(
+            "api.core_service.get_last_data_date", return_value=dt.date(2025, 4, 1)
+        )
+        mocker.patch(
+            "api.core_service.fetch_daily_data_if_not_in_cache",
+            side_effect=MissingDailyData,
+        )
+        response = await async_client.get("/add")
+        assert response.status_code == 503
+        assert response.json() == {
+            "detail": "Daily data is not published yet for all requested days."
+        }
+
+    async def test_add_invalid_data_file_case(self, mocker, async_client):
+        mocker.patch(
+            "api.core_service.get_last_data_date", return_value=dt.date(2025, 4, 1)
+        )
+        mocker.patch(
+            "api.core_service.fetch_daily_data_if_not_in_cache",
+            side_effect=InvalidDataFile("date in_range(20250101, 20990101) (1 rows)"),
+        )
+        response = await async_client.get("/add")
+        assert response.status_code == 502
+        assert response.json() == {
+            "detail": "Data file does not match its schema: "
+            "date in_range(20250101, 20990101) (1 rows)."
+        }
+
+
+@pytest.mark.anyio
+class TestBackfill:
+    async def test_backfill_normal_case(self, mocker, async_client):
+        expected_date = dt.date(2025, 4, 1)
+        mocker.patch("api.core_service.get_last_data_date", return_value=expected_date)
+        service_mock = mocker.patch("api.core_service.backfill_daily_data")
+        response = await async_client.get("/backfill?begin_date=2025-03-20")
+        assert response.status_code == 201
+        service_mock.assert_called_once_with(
+            mocker.ANY,
+            mocker.ANY,
+            dt.date(2025, 3, 20),
+            expected_date,
+            strict_validation=False,
+            max_days=366,
+        )
+
+    async def test_backfill_already_added_data_case(self, mocker, async_client):
+        mocker.patch(
+            "api.core_service.get_last_data_date", return_value=dt.date(2025, 4, 1)
+        )
+        mocker.patch(
+            "api.core_service.backfill_daily_data", side_effect=AlreadyAddedData
+        )
+        response = await async_client.get("/backfill?begin_date=2025-03-20")
+        assert response.status_code == 409
+        assert response.json() == {"detail": "Data is already in backend."}
+
+    async def test_backfill_missing_daily_data_case(self, mocker, async_client):
+        mocker.patch(
+            "api.core_service.get_last_data_date", return_value=dt.date(2025, 4, 1)
+        )
+        mocker.patch(
+            "api.core_service.backfill_daily_data", side_effect=MissingDailyData
+        )
+        response = await async_client.get("/backfill?begin_date=2025-03-20")
+        assert response.status_code == 503
+
+    async def test_backfill_invalid_data_file_case(self, mocker, async_client):
+        mocker.patch(
+            "api.core_service.get_last_data_date", return_value=dt.date(2025, 4, 1)
+        )
+        mocker.patch(
+            "api.core_service.backfill_daily_data",
+            side_effect=InvalidDataFile("rainfall_mm not_nullable (1 rows)"),
+        )
+        response = await async_client.get("/backfill?begin_date=2025-03-20")
+        assert response.status_code == 502
+
+    async def test_backfill_invalid_begin_date_case(self, mocker, async_client):
+        mocker.patch(
+            "api.core_service.get_last_data_date", return_value=dt.date(2025, 4, 1)
+        )
+        mocker.patch(
+            "api.core_service.backfill_daily_data", side_effect=InvalidTimespan
+        )
+        response = await async_client.get("/backfill?begin_date=2025-04-20")
+        assert response.status_code == 422
 
 
 @pytest.mark.anyio
@@ -79,7 +358,19 @@ class TestInitialize:
         service_mock = mocker.patch("api.core_service.initialize_mean_data")
         response = await async_client.get("/initialize")
         assert response.status_code == 201
-        service_mock.assert_called_once_with(mocker.ANY, mocker.ANY, 2020, 2021)
+        service_mock.assert_called_once_with(
+            mocker.ANY,
+            mocker.ANY,
+            2020,
+            2021,
+            station_ids=[75114001],
+            departments=None,
+            max_concurrency=4,
+            process_workers=0,
+            cache_dir=None,
+            scalar_means=False,
+            strict_validation=False,
+        )
 
     async def test_add_already_initialized_data_case(
         self, mocker, async_client, settings
@@ -92,4 +383,40 @@ class TestInitialize:
         response = await async_client.get("/initialize")
         assert response.status_code == 409
         assert response.json() == {"detail": "Key value DB is already initialized."}
-        service_mock.assert_called_once_with(mocker.ANY, mocker.ANY, 2020, 2021)
+        service_mock.assert_called_once_with(
+            mocker.ANY,
+            mocker.ANY,
+            2020,
+            2021,
+            station_ids=[75114001],
+            departments=None,
+            max_concurrency=4,
+            process_workers=0,
+            cache_dir=None,
+            scalar_means=False,
+            strict_validation=False,
+        )
+
+    async def test_initialize_invalid_data_file_case(
+        self, mocker, async_client, settings
+    ):
+        mocker.patch("api.settings", settings)
+        mocker.patch(
+            "api.core_service.initialize_mean_data",
+            side_effect=InvalidDataFile("station_id in_range (1 rows)"),
+        )
+        response = await async_client.get("/initialize")
+        assert response.status_code == 502
+
+
+@pytest.mark.parametrize("cache_size", [0, 10])
+def test_get_key_value_db_repo(mocker, settings, cache_size):
+    settings.key_value_cache_size = cache_size
+    mocker.patch("api.settings", settings)
+    repo_mock = mocker.Mock()
+    result = get_key_value_db_repo(repo_mock)
+    if cache_size:
+        assert isinstance(result, CachedKeyValueDbRepository)
+        assert result.repo is repo_mock
+    else:
+        assert result is repo_mock